@@ -0,0 +1,204 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from sqlmodel import Session
+from typing import Callable, List, Optional, Type
+from app.cache import get_or_load, invalidate_tables, json_response
+from app.core.database import get_db, get_read_db
+from app.schemas.bulk import BulkDeleteRequest, BulkSelection, bulk_update_request
+from app.services.crud import CRUDRepository
+from app.utils.pagination import Pagination
+from app.utils.fields import equality_filters, parse_fields, rows_to_dicts
+from app.utils.serializer import FastJSONResponse, dumps
+
+# Tempo (segundos) que as páginas da listagem ficam no cache
+LIST_CACHE_EXPIRATION = 60
+# Tempo (segundos) que um registro individual fica no cache
+RECORD_CACHE_EXPIRATION = 300
+
+
+# Registra no router as rotas de CRUD comuns a todas as entidades.
+# As rotas específicas (by-X, count-*) devem ser declaradas antes da chamada,
+# pois "/{id}" capturaria os demais caminhos.
+def register_crud_routes(
+    router: APIRouter,
+    repository: CRUDRepository,
+    bulk_request: Type[BulkSelection] = BulkDeleteRequest,
+    bulk_filters: Optional[Callable] = None,
+    cache_records: bool = False,
+    after_write: Optional[Callable[[], None]] = None,
+):
+    model = repository.model
+    update_model = repository.update_model
+    name = repository.name
+    plural = repository.plural
+    id_name = repository.primary_key.name
+    table = model.__tablename__
+    not_found = f"{name} not found"
+    bulk_update = bulk_update_request(bulk_request, update_model)
+
+    # Por padrão o filtro do DELETE/PATCH /bulk é igualdade por coluna
+    if bulk_filters is None:
+        bulk_filters = lambda criteria: equality_filters(model, criteria)
+
+    # Após cada escrita: executa o gancho da entidade (ex: marcar projeções
+    # que dependem dela) e invalida o cache da tabela, avisando os processos
+    def written():
+        if after_write is not None:
+            after_write()
+        invalidate_tables(table)
+
+    # ID lido do parâmetro de caminho com o nome da chave primária (ex: vehicle_id)
+    def path_id(value: int = Path(alias=id_name)) -> int:
+        return value
+
+    # Inserção em massa
+    def create_many(records: List[model], db: Session = Depends(get_db)):
+        repository.create_many(db, records)
+        written()
+        return {"message": f"Bulk {plural} created successfully"}
+
+    # Criar um único registro
+    def create(record: model, db: Session = Depends(get_db)):
+        record = repository.create(db, record)
+        written()
+        return FastJSONResponse(content=record)
+
+    # Recuperação em massa com paginação (offset ou keyset com "after")
+    def list_records(
+        request: Request,
+        page: Pagination = Depends(),
+        after: Optional[int] = None,
+        fields: Optional[str] = None,
+        db: Session = Depends(get_read_db),
+    ):
+        columns = parse_fields(model, fields)
+        skip = page.skip
+        limit = page.size(db, model, columns)
+
+        # Gerar chave única para cache com base nos parâmetros de consulta
+        cache_key = f"{plural}_skip_{skip}_limit_{limit}"
+        if after is not None:
+            cache_key = f"{plural}_after_{after}_limit_{limit}"
+        if columns:
+            cache_key += f"_fields_{','.join(columns)}"
+
+        # Se não estiver no cache, consulta o banco de dados (apenas as colunas pedidas)
+        def load(session: Session):
+            records = repository.list(session, skip, limit, columns, after)
+            return dumps(rows_to_dicts(records, columns) if columns else records)
+
+        # Cache com ETag, invalidado a cada escrita na tabela
+        # (If-None-Match válido responde 304)
+        entry = get_or_load(
+            cache_key, load, LIST_CACHE_EXPIRATION, tables=[table], session=db
+        )
+        return json_response(request, entry.body, entry.etag)
+
+    # Recuperar um único registro por ID
+    def get(
+        request: Request,
+        record_id: int = Depends(path_id),
+        db: Session = Depends(get_read_db),
+    ):
+        def load(session: Session):
+            record = repository.get(session, record_id)
+            if not record:
+                raise HTTPException(status_code=404, detail=not_found)
+            return record
+
+        if not cache_records:
+            return FastJSONResponse(content=load(db))
+
+        # Tabelas de dimensão: o JSON do registro fica na memória do processo
+        # (e no Redis) até expirar ou até uma escrita na tabela
+        entry = get_or_load(
+            f"{plural}_{record_id}",
+            lambda session: dumps(load(session)),
+            RECORD_CACHE_EXPIRATION,
+            tables=[table],
+            session=db,
+        )
+        return json_response(request, entry.body, entry.etag)
+
+    # Atualização em massa por IDs ou por filtro
+    def update_many(selection: bulk_update, db: Session = Depends(get_db)):
+        filters = bulk_filters(selection.filter) if selection.filter else None
+        updated = repository.update_many(
+            db, selection.values, ids=selection.ids, filters=filters
+        )
+        written()
+        return {"message": f"Bulk {plural} updated successfully", "updated": updated}
+
+    # Exclusão em massa por IDs ou por filtro
+    def delete_many(selection: bulk_request, db: Session = Depends(get_db)):
+        filters = bulk_filters(selection.filter) if selection.filter else None
+        deleted = repository.delete_many(db, ids=selection.ids, filters=filters)
+        written()
+        return {"message": f"Bulk {plural} deleted successfully", "deleted": deleted}
+
+    # Atualizar um registro existente (UPDATE ... RETURNING em uma única ida ao banco)
+    def replace(
+        data: model,
+        record_id: int = Depends(path_id),
+        db: Session = Depends(get_db),
+    ):
+        record = repository.update(db, record_id, data)
+        if not record:
+            raise HTTPException(status_code=404, detail=not_found)
+        written()
+        return FastJSONResponse(content=record)
+
+    # Atualizar parcialmente um registro (apenas as colunas enviadas)
+    def patch(
+        data: update_model,
+        record_id: int = Depends(path_id),
+        db: Session = Depends(get_db),
+    ):
+        record = repository.update(db, record_id, data)
+        if not record:
+            raise HTTPException(status_code=404, detail=not_found)
+        written()
+        return FastJSONResponse(content=record)
+
+    # Excluir um registro por ID (DELETE ... RETURNING, sem leitura prévia)
+    def delete(record_id: int = Depends(path_id), db: Session = Depends(get_db)):
+        if not repository.delete(db, record_id):
+            raise HTTPException(status_code=404, detail=not_found)
+        written()
+        return {"message": f"{name} deleted successfully"}
+
+    item = name.lower()
+    by_id = f"/{{{id_name}}}"
+    router.add_api_route(
+        "/bulk", create_many, methods=["POST"], name=f"create_{plural}"
+    )
+    router.add_api_route(
+        "/create",
+        create,
+        methods=["POST"],
+        response_model=model,
+        name=f"create_{item}",
+    )
+    router.add_api_route(
+        "",
+        list_records,
+        methods=["GET"],
+        response_model=List[model],
+        name=f"get_{plural}",
+    )
+    # "/bulk" antes de "/{id}" para não ser capturado como ID
+    router.add_api_route(
+        "/bulk", update_many, methods=["PATCH"], name=f"update_{plural}"
+    )
+    router.add_api_route(
+        "/bulk", delete_many, methods=["DELETE"], name=f"delete_{plural}"
+    )
+    router.add_api_route(
+        by_id, get, methods=["GET"], response_model=model, name=f"get_{item}"
+    )
+    router.add_api_route(
+        by_id, replace, methods=["PUT"], response_model=model, name=f"update_{item}"
+    )
+    router.add_api_route(
+        by_id, patch, methods=["PATCH"], response_model=model, name=f"patch_{item}"
+    )
+    router.add_api_route(by_id, delete, methods=["DELETE"], name=f"delete_{item}")
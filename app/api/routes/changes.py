@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+from typing import List, Optional
+from app.core.database import get_db
+from app.services.changes import TRACKED_MODELS, get_changes, parse_token
+from app.utils.serializer import FastJSONResponse
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+# Feed incremental: alterações desde a posição (token "xid:seq") informada
+@router.get("")
+def list_changes(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10_000),
+    tables: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    try:
+        cursor = parse_token(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid change token")
+
+    for table in tables or []:
+        if table not in TRACKED_MODELS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid table '{table}'. Allowed tables: {', '.join(TRACKED_MODELS)}",
+            )
+
+    return FastJSONResponse(content=get_changes(db, cursor, limit, tables))
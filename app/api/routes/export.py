@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import date
+from app.core.database import get_engine, get_replicas
+from app.services.export import (
+    EXPORT_MODELS,
+    FILE_EXTENSIONS,
+    MEDIA_TYPES,
+    ExportFormat,
+    ExportTable,
+    export_stream,
+)
+from app.services.warranties import warranty_filters
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+# Exportar uma tabela (ou um recorte de warranties) em Arrow IPC ou Parquet
+@router.get("/{table}")
+def export_table(
+    table: ExportTable,
+    format: ExportFormat = ExportFormat.PARQUET,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    vehicle_id: Optional[int] = None,
+    chunk_size: int = Query(50_000, ge=1_000, le=500_000),
+):
+    filters = warranty_filters(start_date, end_date, part_id, location_id, vehicle_id)
+    if filters and table != ExportTable.WARRANTIES:
+        raise HTTPException(
+            status_code=400, detail="Filters are only supported for warranties"
+        )
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
+
+    model = EXPORT_MODELS[table]
+
+    # A conexão é aberta dentro do gerador para viver durante todo o streaming
+    # (em uma réplica de leitura, quando houver)
+    source = get_replicas().next() or get_engine()
+
+    def generate():
+        with source.connect() as connection:
+            yield from export_stream(
+                connection, model, format, filters, chunk_size=chunk_size
+            )
+
+    filename = f"{table.value}.{FILE_EXTENSIONS[format]}"
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,166 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
 from typing import List
 from app.models.locations import DimLocations, MarketEnum
-from app.core.database import get_db
-from sqlalchemy.sql import func
-from fastapi.responses import JSONResponse
-from app.utils.serializer import default_serializer
-import json
-from app.cache import get_cache, set_cache
+from app.core.database import get_read_db
+from app.services import location as location_service
+from app.services.location_registry import location_registry
+from app.services.supplier_geography import mark_dirty
+from app.utils.serializer import FastJSONResponse
+from app.utils.pagination import InMemoryPagination, Pagination
+from app.cache import cached_query
+from app.api.crud import register_crud_routes
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 
 
 # Listar por tipo de mercado
 @router.get("/by-market/{market_type}", response_model=List[DimLocations])
-def get_locations_by_market(market_type: MarketEnum, db: Session = Depends(get_db)):
-    return db.exec(select(DimLocations).where(DimLocations.market == market_type)).all()
+@cached_query(DimLocations, expiration=60)
+def get_locations_by_market(
+    market_type: MarketEnum,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    stmt = select(DimLocations).where(DimLocations.market == market_type)
+    return db.exec(page.apply(stmt, db, DimLocations)).all()
+
+
+# As rotas abaixo alimentam filtros em cascata e são respondidas pelo
+# registro em memória (sem consulta ao banco nem ao Redis)
 
 
 # Listar todas as cidades cadastradas de um país
 @router.get("/cities/{country}", response_model=List[str])
-def get_cities_by_country(country: str, db: Session = Depends(get_db)):
-    stmt = select(DimLocations.city).where(DimLocations.country == country)
-    return db.exec(stmt).all()
+def get_cities_by_country(country: str, page: InMemoryPagination = Depends()):
+    cities = location_registry.index().cities_by_country.get(country, ())
+    return FastJSONResponse(content=page.slice(cities, DimLocations, ["city"]))
 
 
 # Listar todas as províncias de um país
 @router.get("/provinces/{country}", response_model=List[str])
-def get_provinces_by_country(country: str, db: Session = Depends(get_db)):
-    stmt = (
-        select(DimLocations.province).where(DimLocations.country == country).distinct()
-    )
-    return db.exec(stmt).all()
+def get_provinces_by_country(country: str, page: InMemoryPagination = Depends()):
+    provinces = location_registry.index().provinces_by_country.get(country, ())
+    return FastJSONResponse(content=page.slice(provinces, DimLocations, ["province"]))
 
 
 # Listar todas as cidades dentro de uma província
 @router.get("/cities/{country}/{province}", response_model=List[str])
-def get_cities_by_province(country: str, province: str, db: Session = Depends(get_db)):
-    stmt = (
-        select(DimLocations.city)
-        .where(DimLocations.country == country, DimLocations.province == province)
-        .distinct()
-    )
-    return db.exec(stmt).all()
+def get_cities_by_province(
+    country: str,
+    province: str,
+    page: InMemoryPagination = Depends(),
+):
+    cities = location_registry.index().cities_by_province.get((country, province), ())
+    return FastJSONResponse(content=page.slice(cities, DimLocations, ["city"]))
 
 
 # Listar quantidade por país
 @router.get("/count-by-country")
-def get_location_count_by_country(db: Session = Depends(get_db)):
-    stmt = select(DimLocations.country, func.count(DimLocations.location_id)).group_by(
-        DimLocations.country
-    )
-    results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+def get_location_count_by_country():
+    return FastJSONResponse(content=location_registry.index().count_by_country)
 
 
 # Listar quantas cidades únicas há por país
 @router.get("/unique-cities-by-country")
-def get_unique_cities_by_country(db: Session = Depends(get_db)):
-    stmt = select(
-        DimLocations.country, func.count(func.distinct(DimLocations.city))
-    ).group_by(DimLocations.country)
-    results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+def get_unique_cities_by_country():
+    return FastJSONResponse(content=location_registry.index().unique_cities_by_country)
 
 
 # Contar quantas províncias há por país
 @router.get("/count-provinces-by-country")
-def get_province_count_by_country(db: Session = Depends(get_db)):
-    stmt = select(
-        DimLocations.country, func.count(func.distinct(DimLocations.province))
-    ).group_by(DimLocations.country)
-    results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+def get_province_count_by_country():
+    return FastJSONResponse(
+        content=location_registry.index().count_provinces_by_country
+    )
 
 
 # Contar quantos locais há por tipo de mercado (Doméstico/Internacional)
 @router.get("/count-by-market")
-def get_location_count_by_market(db: Session = Depends(get_db)):
-    stmt = select(DimLocations.market, func.count()).group_by(DimLocations.market)
-    results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
-
-
-# Inserção em massa
-@router.post("/bulk")
-def create_locations(locations: List[DimLocations], db: Session = Depends(get_db)):
-    db.bulk_save_objects(locations)
-    db.commit()
-    return {"message": "Bulk locations created successfully"}
-
-
-# Criar um único registro
-@router.post("/create", response_model=DimLocations)
-def create_location(location: DimLocations, db: Session = Depends(get_db)):
-    db.add(location)
-    db.commit()
-    db.refresh(location)
-    return location
-
-
-# Recuperação em massa com paginação
-@router.get("", response_model=List[DimLocations])
-async def get_locations(
-    skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)
-):
-    # Gerar chave única para cache com base nos parâmetros de consulta
-    cache_key = f"locations_skip_{skip}_limit_{limit}"
-
-    # Verificar se os dados estão no cache
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        # Se estiver no cache, retorna os dados em cache
-        return json.loads(
-            cached_data
-        )  # Convertendo de volta para o formato esperado (list of DimLocations)
-
-    # Se não estiver no cache, consulta o banco de dados
-    locations = db.exec(select(DimLocations).offset(skip).limit(limit)).all()
-
-    # Armazenar os dados no cache por 60 segundos, agora com a serialização correta
-    serialized_locations = json.dumps(
-        [location.model_dump() for location in locations], default=default_serializer
-    )
-    set_cache(cache_key, serialized_locations, expiration=60)
-
-    return locations
-
-
-# Recuperar um único registro por ID
-@router.get("/{location_id}", response_model=DimLocations)
-def get_location(location_id: int, db: Session = Depends(get_db)):
-    location = db.get(DimLocations, location_id)
-    if not location:
-        raise HTTPException(status_code=404, detail="Location not found")
-    return location
-
-
-# Atualizar um registro existente
-@router.put("/{location_id}", response_model=DimLocations)
-def update_location(
-    location_id: int, location_data: DimLocations, db: Session = Depends(get_db)
-):
-    location = db.get(DimLocations, location_id)
-    if not location:
-        raise HTTPException(status_code=404, detail="Location not found")
-
-    for key, value in location_data.model_dump(exclude_unset=True).items():
-        setattr(location, key, value)
-
-    db.commit()
-    db.refresh(location)
-    return location
-
-
-# Excluir um registro por ID
-@router.delete("/{location_id}")
-def delete_location(location_id: int, db: Session = Depends(get_db)):
-    location = db.get(DimLocations, location_id)
-    if not location:
-        raise HTTPException(status_code=404, detail="Location not found")
-
-    db.delete(location)
-    db.commit()
-    return {"message": "Location deleted successfully"}
+def get_location_count_by_market():
+    return FastJSONResponse(content=location_registry.index().count_by_market)
+
+
+# Tabela de dimensão: registros individuais servidos da memória local; as
+# escritas marcam a projeção supplier_geography para atualização
+register_crud_routes(
+    router,
+    location_service.repository,
+    cache_records=True,
+    after_write=mark_dirty,
+)
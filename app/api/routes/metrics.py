@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from app.core.config import settings
+from app.core.sql_logging import compile_cache_report
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+# Uso do cache de SQL compilado neste processo (worker)
+@router.get("/sql-cache")
+def get_sql_cache_metrics():
+    return {
+        "compiled_cache_size": settings.SQL_COMPILED_CACHE_SIZE,
+        "statements": compile_cache_report(),
+    }
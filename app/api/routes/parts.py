@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 from app.models.parts import DimParts
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.services import parts as parts_service
 from sqlalchemy.sql import func
-from fastapi.responses import JSONResponse
-import json
-from app.cache import get_cache, set_cache
-from app.utils.serializer import default_serializer
+from app.utils.serializer import FastJSONResponse
+from app.utils.fields import (
+    fetch_fields,
+    fields_response,
+    lambda_select,
+    parse_fields,
+)
+from app.utils.pagination import Pagination
+from app.cache import cached_query
+from app.api.crud import register_crud_routes
 
 
 router = APIRouter(prefix="/parts", tags=["parts"])
@@ -15,146 +22,110 @@ router = APIRouter(prefix="/parts", tags=["parts"])
 
 # Listar peças associadas a uma última compra
 @router.get("/by-purchase/{last_id_purchase}", response_model=List[DimParts])
-def get_parts_by_purchase(last_id_purchase: int, db: Session = Depends(get_db)):
-    return db.exec(
-        select(DimParts).where(DimParts.last_id_purchase == last_id_purchase)
-    ).all()
+@cached_query(DimParts, expiration=60)
+def get_parts_by_purchase(
+    last_id_purchase: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(DimParts, fields)
+    stmt = lambda_select(DimParts, columns)
+    stmt += lambda s: s.where(DimParts.last_id_purchase == last_id_purchase)
+    stmt = page.apply(stmt, db, DimParts, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar todas as peças de um fornecedor que foram compradas pelo menos uma vez
 @router.get("/purchased-by-supplier/{supplier_id}", response_model=List[DimParts])
-def get_purchased_parts_by_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    return db.exec(
-        select(DimParts).where(
-            DimParts.supplier_id == supplier_id, DimParts.last_id_purchase.isnot(None)
-        )
-    ).all()
+@cached_query(DimParts, expiration=60)
+def get_purchased_parts_by_supplier(
+    supplier_id: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(DimParts, fields)
+    stmt = lambda_select(DimParts, columns)
+    stmt += lambda s: s.where(
+        DimParts.supplier_id == supplier_id, DimParts.last_id_purchase.isnot(None)
+    )
+    stmt = page.apply(stmt, db, DimParts, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar todas as peças de um fornecedor
 @router.get("/by-supplier/{supplier_id}", response_model=List[DimParts])
-def get_parts_by_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    return db.exec(select(DimParts).where(DimParts.supplier_id == supplier_id)).all()
+@cached_query(DimParts, expiration=60)
+def get_parts_by_supplier(
+    supplier_id: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(DimParts, fields)
+    stmt = lambda_select(DimParts, columns)
+    stmt += lambda s: s.where(DimParts.supplier_id == supplier_id)
+    stmt = page.apply(stmt, db, DimParts, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar todas as peças que foram compradas pelo menos uma vez
 @router.get("/purchased", response_model=List[DimParts])
-def get_purchased_parts(db: Session = Depends(get_db)):
-    return db.exec(select(DimParts).where(DimParts.last_id_purchase.isnot(None))).all()
+@cached_query(DimParts, expiration=60)
+def get_purchased_parts(
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(DimParts, fields)
+    stmt = lambda_select(DimParts, columns)
+    stmt += lambda s: s.where(DimParts.last_id_purchase.isnot(None))
+    stmt = page.apply(stmt, db, DimParts, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Contar quantas compras foram feitas por fornecedor
 @router.get("/count-purchases-by-supplier")
-def count_purchases_by_supplier(db: Session = Depends(get_db)):
+@cached_query(DimParts, expiration=300)
+def count_purchases_by_supplier(db: Session = Depends(get_read_db)):
     stmt = select(DimParts.supplier_id, func.count(DimParts.last_id_purchase)).group_by(
         DimParts.supplier_id
     )
     results = db.exec(stmt).all()
-    return JSONResponse(content={str(r[0]): r[1] for r in results})
+    return FastJSONResponse(content={str(r[0]): r[1] for r in results})
 
 
 # Listar peças por fornecedor
 @router.get("/count-by-supplier")
-def count_parts_by_supplier(db: Session = Depends(get_db)):
+@cached_query(DimParts, expiration=300)
+def count_parts_by_supplier(db: Session = Depends(get_read_db)):
     stmt = select(DimParts.supplier_id, func.count(DimParts.part_id)).group_by(
         DimParts.supplier_id
     )
     results = db.exec(stmt).all()
-    return JSONResponse(content={str(r[0]): r[1] for r in results})
+    return FastJSONResponse(content={str(r[0]): r[1] for r in results})
 
 
 # Contar quantas peças diferentes já foram compradas pelo menos uma vez
 @router.get("/count-purchased")
-def count_purchased_parts(db: Session = Depends(get_db)):
+@cached_query(DimParts, expiration=300)
+def count_purchased_parts(db: Session = Depends(get_read_db)):
     total_purchased = db.exec(
         select(func.count(func.distinct(DimParts.part_id))).where(
             DimParts.last_id_purchase.isnot(None)
         )
     ).one()
-    return JSONResponse(content={"total_purchased_parts": total_purchased})
+    return FastJSONResponse(content={"total_purchased_parts": total_purchased})
 
 
 # Listar o número total de peças
 @router.get("/count")
-def count_parts(db: Session = Depends(get_db)):
+@cached_query(DimParts, expiration=300)
+def count_parts(db: Session = Depends(get_read_db)):
     total_parts = db.exec(select(func.count(DimParts.part_id))).one()
-    return JSONResponse(content={"total_parts": total_parts})
-
-
-# Inserção em massa
-@router.post("/bulk")
-def create_parts(parts: List[DimParts], db: Session = Depends(get_db)):
-    db.bulk_save_objects(parts)
-    db.commit()
-    return {"message": "Bulk parts created successfully"}
-
-
-# Criar um único registro
-@router.post("/create", response_model=DimParts)
-def create_part(part: DimParts, db: Session = Depends(get_db)):
-    db.add(part)
-    db.commit()
-    db.refresh(part)
-    return part
-
-
-# Recuperação em massa com paginação
-@router.get("", response_model=List[DimParts])
-async def get_parts(skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
-    # Gerar chave única para cache com base nos parâmetros de consulta
-    cache_key = f"parts_skip_{skip}_limit_{limit}"
-
-    # Verificar se os dados estão no cache
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        # Se estiver no cache, retorna os dados em cache
-        return json.loads(
-            cached_data
-        )  # Convertendo de volta para o formato esperado (list of DimParts)
-
-    # Se não estiver no cache, consulta o banco de dados
-    parts = db.exec(select(DimParts).offset(skip).limit(limit)).all()
-
-    # Armazenar os dados no cache por 60 segundos, agora com a serialização correta
-    serialized_parts = json.dumps(
-        [part.model_dump() for part in parts], default=default_serializer
-    )
-    set_cache(cache_key, serialized_parts, expiration=60)
-
-    return parts
-
-
-# Recuperar um único registro por ID
-@router.get("/{part_id}", response_model=DimParts)
-def get_part(part_id: int, db: Session = Depends(get_db)):
-    part = db.get(DimParts, part_id)
-    if not part:
-        raise HTTPException(status_code=404, detail="Part not found")
-    return part
-
-
-# Atualizar um registro existente
-@router.put("/{part_id}", response_model=DimParts)
-def update_part(part_id: int, part_data: DimParts, db: Session = Depends(get_db)):
-    part = db.get(DimParts, part_id)
-    if not part:
-        raise HTTPException(status_code=404, detail="Part not found")
-
-    for key, value in part_data.model_dump(exclude_unset=True).items():
-        setattr(part, key, value)
-
-    db.commit()
-    db.refresh(part)
-    return part
-
+    return FastJSONResponse(content={"total_parts": total_parts})
 
-# Excluir um registro por ID
-@router.delete("/{part_id}")
-def delete_part(part_id: int, db: Session = Depends(get_db)):
-    part = db.get(DimParts, part_id)
-    if not part:
-        raise HTTPException(status_code=404, detail="Part not found")
 
-    db.delete(part)
-    db.commit()
-    return {"message": "Part deleted successfully"}
+# Tabela de dimensão: registros individuais servidos da memória local
+register_crud_routes(router, parts_service.repository, cache_records=True)
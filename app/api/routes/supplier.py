@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
 from sqlmodel import Session, select
-from typing import List, Optional
+from typing import List
 from app.models.supplier import DimSupplier
-from app.models.locations import DimLocations
-from app.core.database import get_db
-from fastapi.responses import JSONResponse
+from app.models.supplier_geography import SupplierGeography
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.services import supplier as supplier_service
+from app.services.supplier_geography import SUPPLIER_COLUMNS, mark_dirty
 from sqlalchemy.sql import func
-import json
-from app.cache import get_cache, set_cache
-from app.utils.serializer import default_serializer
+from app.utils.serializer import FastJSONResponse
+from app.utils.fields import fetch_fields, fields_response, lambda_select
+from app.utils.pagination import Pagination
+from app.cache import cached_query
+from app.api.crud import register_crud_routes
 
 
 router = APIRouter(prefix="/suppliers", tags=["suppliers"])
@@ -16,167 +20,106 @@ router = APIRouter(prefix="/suppliers", tags=["suppliers"])
 
 # Listar suppliers por localização
 @router.get("/by-location/{location_id}", response_model=List[DimSupplier])
-def get_suppliers_by_location(location_id: int, db: Session = Depends(get_db)):
-    return db.exec(
-        select(DimSupplier).where(DimSupplier.location_id == location_id)
-    ).all()
+@cached_query(DimSupplier, expiration=60)
+def get_suppliers_by_location(
+    location_id: int, page: Pagination = Depends(), db: Session = Depends(get_read_db)
+):
+    stmt = select(DimSupplier).where(DimSupplier.location_id == location_id)
+    return db.exec(page.apply(stmt, db, DimSupplier)).all()
 
 
-# Listar suppliers por país (usando DimLocations)
+# Listar suppliers por país (projeção supplier_geography)
 @router.get("/by-country/{country}", response_model=List[DimSupplier])
-def get_suppliers_by_country(country: str, db: Session = Depends(get_db)):
-    stmt = select(DimSupplier).join(DimLocations).where(DimLocations.country == country)
-    return db.exec(stmt).all()
+@cached_query(SupplierGeography, expiration=60)
+def get_suppliers_by_country(
+    country: str, page: Pagination = Depends(), db: Session = Depends(get_read_db)
+):
+    stmt = lambda_select(SupplierGeography, SUPPLIER_COLUMNS)
+    stmt += lambda s: s.where(SupplierGeography.country == country)
+    stmt = page.apply(stmt, db, SupplierGeography, SUPPLIER_COLUMNS)
+    return fields_response(fetch_fields(db, stmt, SUPPLIER_COLUMNS), SUPPLIER_COLUMNS)
 
 
-# Listar suppliers por província (usando DimLocations)
+# Listar suppliers por província (projeção supplier_geography)
 @router.get("/by-province/{province}", response_model=List[DimSupplier])
-def get_suppliers_by_province(province: str, db: Session = Depends(get_db)):
-    stmt = (
-        select(DimSupplier).join(DimLocations).where(DimLocations.province == province)
-    )
-    return db.exec(stmt).all()
+@cached_query(SupplierGeography, expiration=60)
+def get_suppliers_by_province(
+    province: str, page: Pagination = Depends(), db: Session = Depends(get_read_db)
+):
+    stmt = lambda_select(SupplierGeography, SUPPLIER_COLUMNS)
+    stmt += lambda s: s.where(SupplierGeography.province == province)
+    stmt = page.apply(stmt, db, SupplierGeography, SUPPLIER_COLUMNS)
+    return fields_response(fetch_fields(db, stmt, SUPPLIER_COLUMNS), SUPPLIER_COLUMNS)
 
 
-# Quantidade de suppliers únicos por país
+# Quantidade de suppliers únicos por país (um supplier por linha na projeção)
 @router.get("/unique-suppliers-by-country")
-def get_unique_suppliers_by_country(db: Session = Depends(get_db)):
-    stmt = (
-        select(DimLocations.country, func.count(func.distinct(DimSupplier.supplier_id)))
-        .join(DimSupplier, DimSupplier.location_id == DimLocations.location_id)
-        .group_by(DimLocations.country)
-    )
+@cached_query(SupplierGeography, expiration=300)
+def get_unique_suppliers_by_country(db: Session = Depends(get_read_db)):
+    stmt = select(
+        SupplierGeography.country, func.count(SupplierGeography.supplier_id)
+    ).group_by(SupplierGeography.country)
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
-# Localizações com mais suppliers
+# As "n" localizações com mais suppliers
 @router.get("/top-locations")
-def get_top_supplier_locations(db: Session = Depends(get_db)):
+@cached_query(DimSupplier, expiration=300)
+def get_top_supplier_locations(
+    n: int = Query(5, ge=1, le=settings.TOP_N_MAX),
+    db: Session = Depends(get_read_db),
+):
     stmt = (
         select(
             DimSupplier.location_id, func.count(DimSupplier.supplier_id).label("count")
         )
         .group_by(DimSupplier.location_id)
         .order_by(func.count(DimSupplier.supplier_id).desc())
-        .limit(5)
+        .limit(n)
     )
     results = db.exec(stmt).all()
-    return results
+    return [{"location_id": r[0], "count": r[1]} for r in results]
 
 
-# Número de suppliers por localização
+# Número de suppliers por localização (projeção supplier_geography)
 @router.get("/count-suppliers-per-location")
-def count_suppliers_per_location(db: Session = Depends(get_db)):
-    stmt = (
-        select(
-            DimLocations.location_id,
-            func.count(DimSupplier.supplier_id).label("supplier_count"),
-        )
-        .join(DimSupplier, DimSupplier.location_id == DimLocations.location_id)
-        .group_by(DimLocations.location_id)
-    )
+@cached_query(SupplierGeography, expiration=300)
+def count_suppliers_per_location(db: Session = Depends(get_read_db)):
+    stmt = select(
+        SupplierGeography.location_id,
+        func.count(SupplierGeography.supplier_id).label("supplier_count"),
+    ).group_by(SupplierGeography.location_id)
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Quantidade de suppliers por localização
 @router.get("/count-by-location")
-def get_supplier_count_by_location(db: Session = Depends(get_db)):
+@cached_query(DimSupplier, expiration=300)
+def get_supplier_count_by_location(db: Session = Depends(get_read_db)):
     stmt = select(
         DimSupplier.location_id, func.count(DimSupplier.supplier_id)
     ).group_by(DimSupplier.location_id)
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Listar suppliers por nome
 @router.get("/search", response_model=List[DimSupplier])
-def search_suppliers(name: str, db: Session = Depends(get_db)):
-    return db.exec(
-        select(DimSupplier).where(DimSupplier.supplier_name.contains(name))
-    ).all()
-
-
-# Inserção em massa
-@router.post("/bulk")
-def create_suppliers(suppliers: List[DimSupplier], db: Session = Depends(get_db)):
-    db.bulk_save_objects(suppliers)
-    db.commit()
-    return {"message": "Bulk suppliers created successfully"}
-
-
-# Criar um único registro
-@router.post("/create", response_model=DimSupplier)
-def create_supplier(supplier: DimSupplier, db: Session = Depends(get_db)):
-    db.add(supplier)
-    db.commit()
-    db.refresh(supplier)
-    return supplier
-
-
-# Recuperação em massa com paginação
-@router.get("", response_model=List[DimSupplier])
-async def get_suppliers(
-    skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)
-):
-    # Gerar chave única para cache com base nos parâmetros de consulta
-    cache_key = f"suppliers_skip_{skip}_limit_{limit}"
-
-    # Verificar se os dados estão no cache
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        # Se estiver no cache, retorna os dados em cache
-        return json.loads(
-            cached_data
-        )  # Convertendo de volta para o formato esperado (list of DimSupplier)
-
-    # Se não estiver no cache, consulta o banco de dados
-    suppliers = db.exec(select(DimSupplier).offset(skip).limit(limit)).all()
-
-    # Armazenar os dados no cache por 60 segundos, agora com a serialização correta
-    serialized_suppliers = json.dumps(
-        [supplier.model_dump() for supplier in suppliers], default=default_serializer
-    )
-    set_cache(cache_key, serialized_suppliers, expiration=60)
-
-    return suppliers
-
-
-# Recuperar um único registro por ID
-@router.get("/{supplier_id}", response_model=DimSupplier)
-def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    supplier = db.get(DimSupplier, supplier_id)
-    if not supplier:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-    return supplier
-
-
-# Atualizar um registro existente
-@router.put("/{supplier_id}", response_model=DimSupplier)
-def update_supplier(
-    supplier_id: int, supplier_data: DimSupplier, db: Session = Depends(get_db)
+@cached_query(DimSupplier, expiration=60)
+def search_suppliers(
+    name: str, page: Pagination = Depends(), db: Session = Depends(get_read_db)
 ):
-    supplier = db.get(DimSupplier, supplier_id)
-    if not supplier:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-
-    supplier_data = supplier_data.model_dump(exclude_unset=True)
-    for key, value in supplier_data.items():
-        setattr(supplier, key, value)
-
-    db.commit()
-    db.refresh(supplier)
-    return supplier
-
-
-# Excluir um registro por ID
-@router.delete("/{supplier_id}")
-def delete_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    supplier = db.get(DimSupplier, supplier_id)
-    if not supplier:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-
-    db.delete(supplier)
-    db.commit()
-    return {"message": "Supplier deleted successfully"}
+    stmt = select(DimSupplier).where(DimSupplier.supplier_name.contains(name))
+    return db.exec(page.apply(stmt, db, DimSupplier)).all()
+
+
+# Tabela de dimensão: registros individuais servidos da memória local; as
+# escritas marcam a projeção supplier_geography para atualização
+register_crud_routes(
+    router,
+    supplier_service.repository,
+    cache_records=True,
+    after_write=mark_dirty,
+)
@@ -1,172 +1,176 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.services import vehicle as vehicle_service
 from app.models.vehicle import DimVehicle, PropulsionType
+from sqlalchemy import lambda_stmt
 from sqlalchemy.sql import func
-from fastapi.responses import JSONResponse
 from datetime import date
-from app.cache import get_cache, set_cache
-import json
-from app.utils.serializer import default_serializer
+from app.utils.serializer import FastJSONResponse
+from app.utils.fields import (
+    fetch_fields,
+    fields_response,
+    lambda_select,
+    parse_fields,
+)
+from app.utils.pagination import Pagination
+from app.utils.timeseries import Granularity, bucket_count
+from app.cache import cached_query
+from app.api.crud import register_crud_routes
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
 
 # Listar vehicles pela data de produção
 @router.get("/by-prod-date-range", response_model=List[DimVehicle])
+@cached_query(DimVehicle, expiration=60)
 def get_vehicles_by_prod_date_range(
-    start_date: date, end_date: date, db: Session = Depends(get_db)
+    start_date: date,
+    end_date: date,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    stmt = select(DimVehicle).where(
+    columns = parse_fields(DimVehicle, fields)
+    stmt = lambda_select(DimVehicle, columns)
+    stmt += lambda s: s.where(
         (DimVehicle.prod_date >= start_date) & (DimVehicle.prod_date <= end_date)
     )
-    return db.exec(stmt).all()
+    stmt = page.apply(stmt, db, DimVehicle, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar vehicles por modelo
 @router.get("/by-model/{model}", response_model=List[DimVehicle])
-def get_vehicles_by_model(model: str, db: Session = Depends(get_db)):
-    return db.exec(select(DimVehicle).where(DimVehicle.model.contains(model))).all()
+@cached_query(DimVehicle, expiration=60)
+def get_vehicles_by_model(
+    model: str,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(DimVehicle, fields)
+    stmt = lambda_select(DimVehicle, columns)
+    stmt += lambda s: s.where(DimVehicle.model.contains(model))
+    stmt = page.apply(stmt, db, DimVehicle, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar vehicles por tipo de propulsão
 @router.get("/by-propulsion/{propulsion_type}", response_model=List[DimVehicle])
+@cached_query(DimVehicle, expiration=60)
 def get_vehicles_by_propulsion(
-    propulsion_type: PropulsionType, db: Session = Depends(get_db)
+    propulsion_type: PropulsionType,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    return db.exec(
-        select(DimVehicle).where(DimVehicle.propulsion == propulsion_type)
-    ).all()
+    columns = parse_fields(DimVehicle, fields)
+    stmt = lambda_select(DimVehicle, columns)
+    stmt += lambda s: s.where(DimVehicle.propulsion == propulsion_type)
+    stmt = page.apply(stmt, db, DimVehicle, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar vehicles por ano de fabricação
 @router.get("/by-year/{year}", response_model=List[DimVehicle])
-def get_vehicles_by_year(year: int, db: Session = Depends(get_db)):
-    return db.exec(select(DimVehicle).where(DimVehicle.year == year)).all()
+@cached_query(DimVehicle, expiration=60)
+def get_vehicles_by_year(
+    year: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(DimVehicle, fields)
+    stmt = lambda_select(DimVehicle, columns)
+    stmt += lambda s: s.where(DimVehicle.year == year)
+    stmt = page.apply(stmt, db, DimVehicle, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar quantidade de vehicles por faixa de ano
 @router.get("/count-by-year-range")
+@cached_query(DimVehicle, expiration=300)
 def count_vehicles_by_year_range(
-    start_year: int, end_year: int, db: Session = Depends(get_db)
+    start_year: int, end_year: int, db: Session = Depends(get_read_db)
 ):
-    stmt = (
-        select(DimVehicle.year, func.count(DimVehicle.vehicle_id))
+    stmt = lambda_stmt(
+        lambda: select(DimVehicle.year, func.count(DimVehicle.vehicle_id))
         .where(DimVehicle.year >= start_year, DimVehicle.year <= end_year)
         .group_by(DimVehicle.year)
     )
-    results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    results = db.execute(stmt).all()
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Listar quantidade de vehicles por tipo de propulsão
 @router.get("/count-by-propulsion")
-def count_vehicles_by_propulsion(db: Session = Depends(get_db)):
+@cached_query(DimVehicle, expiration=300)
+def count_vehicles_by_propulsion(db: Session = Depends(get_read_db)):
     stmt = select(DimVehicle.propulsion, func.count(DimVehicle.vehicle_id)).group_by(
         DimVehicle.propulsion
     )
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Listar quantidade de vehicles por ano de fabricação
 @router.get("/count-by-year")
-def count_vehicles_by_year(db: Session = Depends(get_db)):
+@cached_query(DimVehicle, expiration=300)
+def count_vehicles_by_year(db: Session = Depends(get_read_db)):
     stmt = select(DimVehicle.year, func.count(DimVehicle.vehicle_id)).group_by(
         DimVehicle.year
     )
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
+
+
+# Série temporal de vehicles produzidos (dia, semana, mês ou trimestre), com
+# os intervalos sem produção preenchidos com zero e, opcionalmente, a
+# contagem por tipo de propulsão em cada intervalo
+@router.get("/timeseries")
+@cached_query(DimVehicle, expiration=300)
+def get_vehicle_timeseries(
+    start_date: date,
+    end_date: date,
+    granularity: Granularity = Granularity.MONTH,
+    by_propulsion: bool = False,
+    db: Session = Depends(get_read_db),
+):
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="start_date must not be after end_date"
+        )
+    # Um ponto por intervalo, mesmo sem produção: o tamanho da resposta é
+    # limitado pela quantidade de intervalos
+    if (
+        bucket_count(start_date, end_date, granularity)
+        > settings.TIMESERIES_MAX_BUCKETS
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range exceeds {settings.TIMESERIES_MAX_BUCKETS} "
+            f"{granularity.value} buckets; use a shorter range or a coarser "
+            "granularity",
+        )
+    points = vehicle_service.vehicle_timeseries(
+        db, start_date, end_date, granularity, by_propulsion
+    )
+    return FastJSONResponse(content=points)
 
 
 # Listar a quantidade de vehicles por mês de produção
 @router.get("/count-by-prod-month")
-def count_vehicles_by_prod_month(db: Session = Depends(get_db)):
+@cached_query(DimVehicle, expiration=300)
+def count_vehicles_by_prod_month(db: Session = Depends(get_read_db)):
     stmt = select(
         func.extract("month", DimVehicle.prod_date), func.count(DimVehicle.vehicle_id)
     ).group_by(func.extract("month", DimVehicle.prod_date))
     results = db.exec(stmt).all()
-    return JSONResponse(content={f"Month {int(r[0])}": r[1] for r in results})
-
-
-# Inserção em massa
-@router.post("/bulk")
-def create_vehicles(vehicles: List[DimVehicle], db: Session = Depends(get_db)):
-    db.bulk_save_objects(vehicles)
-    db.commit()
-    return {"message": "Bulk vehicles created successfully"}
-
-
-# Criar um único registro
-@router.post("/create", response_model=DimVehicle)
-def create_vehicle(vehicle: DimVehicle, db: Session = Depends(get_db)):
-    db.add(vehicle)
-    db.commit()
-    db.refresh(vehicle)
-    return vehicle
-
-
-# Recuperação em massa com paginação
-@router.get("", response_model=List[DimVehicle])
-async def get_vehicles(skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
-    # Gerar chave única para cache com base nos parâmetros de consulta
-    cache_key = f"vehicles_skip_{skip}_limit_{limit}"
-
-    # Verificar se os dados estão no cache
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        # Se estiver no cache, retorna os dados em cache
-        return json.loads(
-            cached_data
-        )  # Convertendo de volta para o formato esperado (list of DimVehicle)
-
-    # Se não estiver no cache, consulta o banco de dados
-    vehicles = db.exec(select(DimVehicle).offset(skip).limit(limit)).all()
-
-    # Armazenar os dados no cache por 60 segundos, agora com a serialização correta
-    serialized_vehicles = json.dumps(
-        [vehicle.model_dump() for vehicle in vehicles], default=default_serializer
-    )
-    set_cache(cache_key, serialized_vehicles, expiration=60)
-
-    return vehicles
-
-
-# Recuperar um único registro por ID
-@router.get("/{vehicle_id}", response_model=DimVehicle)
-def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    vehicle = db.get(DimVehicle, vehicle_id)
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    return vehicle
-
-
-# Atualizar um registro existente
-@router.put("/{vehicle_id}", response_model=DimVehicle)
-def update_vehicle(
-    vehicle_id: int, vehicle_data: DimVehicle, db: Session = Depends(get_db)
-):
-    vehicle = db.get(DimVehicle, vehicle_id)
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-
-    vehicle_data = vehicle_data.model_dump(exclude_unset=True)
-    for key, value in vehicle_data.items():
-        setattr(vehicle, key, value)
-
-    db.commit()
-    db.refresh(vehicle)
-    return vehicle
-
+    return FastJSONResponse(content={f"Month {int(r[0])}": r[1] for r in results})
 
-# Excluir um registro por ID
-@router.delete("/{vehicle_id}")
-def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    vehicle = db.get(DimVehicle, vehicle_id)
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
 
-    db.delete(vehicle)
-    db.commit()
-    return {"message": "Vehicle deleted successfully"}
+# Tabela de dimensão: registros individuais servidos da memória local
+register_crud_routes(router, vehicle_service.repository, cache_records=True)
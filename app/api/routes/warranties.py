@@ -1,180 +1,231 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
+from app.models.locations import DimLocations, MarketEnum
+from app.models.vehicle import DimVehicle
 from app.models.warranties import FactWarranties
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.schemas.bulk import WarrantyBulkDeleteRequest
+from app.services import warranties as warranties_service
+from app.services.warranties import VehicleDimension, WarrantyDimension
 from sqlalchemy.sql import func
-from fastapi.responses import JSONResponse
 from datetime import date
-import json
-from app.cache import get_cache, set_cache
-from app.utils.serializer import default_serializer
-from fastapi.encoders import jsonable_encoder
+from app.utils.serializer import FastJSONResponse
+from app.utils.fields import (
+    fetch_fields,
+    fields_response,
+    lambda_select,
+    parse_fields,
+)
+from app.utils.pagination import Pagination
+from app.cache import cached_query
+from app.api.crud import register_crud_routes
 
 router = APIRouter(prefix="/warranties", tags=["warranties"])
 
 
 # Listar warranties por intervalo de datas
 @router.get("/by-date-range", response_model=List[FactWarranties])
+@cached_query(FactWarranties, expiration=60)
 def get_warranties_by_date_range(
-    start_date: date, end_date: date, db: Session = Depends(get_db)
+    start_date: date,
+    end_date: date,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    stmt = select(FactWarranties).where(
-        (FactWarranties.repair_date >= start_date)
-        & (FactWarranties.repair_date <= end_date)
+    columns = parse_fields(FactWarranties, fields)
+    stmt = lambda_select(FactWarranties, columns)
+    stmt += lambda s: s.where(
+        FactWarranties.repair_date >= start_date,
+        FactWarranties.repair_date <= end_date,
     )
-    return db.exec(stmt).all()
+    stmt = page.apply(stmt, db, FactWarranties, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar warranties por vehicle_id
 @router.get("/by-vehicle/{vehicle_id}", response_model=List[FactWarranties])
-def get_warranties_by_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    return db.exec(
-        select(FactWarranties).where(FactWarranties.vehicle_id == vehicle_id)
-    ).all()
+@cached_query(FactWarranties, expiration=60)
+def get_warranties_by_vehicle(
+    vehicle_id: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(FactWarranties, fields)
+    stmt = lambda_select(FactWarranties, columns)
+    stmt += lambda s: s.where(FactWarranties.vehicle_id == vehicle_id)
+    stmt = page.apply(stmt, db, FactWarranties, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar warranties por part_id
 @router.get("/by-part/{part_id}", response_model=List[FactWarranties])
-def get_warranties_by_part(part_id: int, db: Session = Depends(get_db)):
-    return db.exec(
-        select(FactWarranties).where(FactWarranties.part_id == part_id)
-    ).all()
+@cached_query(FactWarranties, expiration=60)
+def get_warranties_by_part(
+    part_id: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(FactWarranties, fields)
+    stmt = lambda_select(FactWarranties, columns)
+    stmt += lambda s: s.where(FactWarranties.part_id == part_id)
+    stmt = page.apply(stmt, db, FactWarranties, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar warranties por localização
 @router.get("/by-location/{location_id}", response_model=List[FactWarranties])
-def get_warranties_by_location(location_id: int, db: Session = Depends(get_db)):
-    return db.exec(
-        select(FactWarranties).where(FactWarranties.location_id == location_id)
-    ).all()
+@cached_query(FactWarranties, expiration=60)
+def get_warranties_by_location(
+    location_id: int,
+    fields: Optional[str] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    columns = parse_fields(FactWarranties, fields)
+    stmt = lambda_select(FactWarranties, columns)
+    stmt += lambda s: s.where(FactWarranties.location_id == location_id)
+    stmt = page.apply(stmt, db, FactWarranties, columns)
+    return fields_response(fetch_fields(db, stmt, columns), columns)
 
 
 # Listar a quantidade de warranties por vehicle_id
 @router.get("/count-by-vehicle")
-def count_warranties_by_vehicle(db: Session = Depends(get_db)):
+@cached_query(FactWarranties, expiration=300)
+def count_warranties_by_vehicle(db: Session = Depends(get_read_db)):
     stmt = select(
         FactWarranties.vehicle_id, func.count(FactWarranties.claim_key)
     ).group_by(FactWarranties.vehicle_id)
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Listar a quantidade de warranties por part_id
 @router.get("/count-by-part")
-def count_warranties_by_part(db: Session = Depends(get_db)):
+@cached_query(FactWarranties, expiration=300)
+def count_warranties_by_part(db: Session = Depends(get_read_db)):
     stmt = select(
         FactWarranties.part_id, func.count(FactWarranties.claim_key)
     ).group_by(FactWarranties.part_id)
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Listar a quantidade de warranties por localização
 @router.get("/count-by-location")
-def count_warranties_by_location(db: Session = Depends(get_db)):
+@cached_query(FactWarranties, expiration=300)
+def count_warranties_by_location(db: Session = Depends(get_read_db)):
     stmt = select(
         FactWarranties.location_id, func.count(FactWarranties.claim_key)
     ).group_by(FactWarranties.location_id)
     results = db.exec(stmt).all()
-    return JSONResponse(content={r[0]: r[1] for r in results})
+    return FastJSONResponse(content={r[0]: r[1] for r in results})
 
 
 # Listar a quantidade de warranties por ano
 @router.get("/count-by-year")
-def count_warranties_by_year(db: Session = Depends(get_db)):
-    stmt = select(
-        func.extract("year", FactWarranties.repair_date).label("year"),
-        func.count(FactWarranties.claim_key),
-    ).group_by(func.extract("year", FactWarranties.repair_date))
+@cached_query(FactWarranties, expiration=300)
+def count_warranties_by_year(
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+):
+    # Intervalo em repair_date (e não em EXTRACT) para o Postgres ler apenas
+    # as partições dos anos pedidos
+    filters = warranties_service.warranty_filters(
+        start_date=date(start_year, 1, 1) if start_year else None,
+        end_date=date(end_year, 12, 31) if end_year else None,
+    )
+    stmt = (
+        select(
+            func.extract("year", FactWarranties.repair_date).label("year"),
+            func.count(FactWarranties.claim_key),
+        )
+        .where(*filters)
+        .group_by(func.extract("year", FactWarranties.repair_date))
+    )
     results = db.exec(stmt).all()
-    return JSONResponse(content={f"Year {int(r[0])}": r[1] for r in results})
-
-
-# Inserção em massa
-@router.post("/bulk")
-def create_warranties(warranties: List[FactWarranties], db: Session = Depends(get_db)):
-    db.bulk_save_objects(warranties)
-    db.commit()
-    return {"message": "Bulk warranties created successfully"}
-
-
-# Criar um único registro
-@router.post("/create", response_model=FactWarranties)
-def create_warranty(warranty: FactWarranties, db: Session = Depends(get_db)):
-    db.add(warranty)
-    db.commit()
-    db.refresh(warranty)
-    return warranty
-
-
-# Recuperação em massa com paginação
-@router.get("", response_model=List[FactWarranties])
-async def get_warranties(
-    skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)
+    return FastJSONResponse(content={f"Year {int(r[0])}": r[1] for r in results})
+
+
+# Taxa de falhas (warranties por vehicle) agrupada por modelo, ano e/ou
+# propulsão, com filtros de período e mercado aplicados às warranties; o
+# denominador é sempre a frota inteira de cada grupo
+@router.get("/failure-rate")
+@cached_query(FactWarranties, DimVehicle, DimLocations, expiration=300)
+def get_failure_rate(
+    group_by: List[VehicleDimension] = Query(list(VehicleDimension)),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    market: Optional[MarketEnum] = None,
+    db: Session = Depends(get_read_db),
 ):
-    # Gerar chave única para cache com base nos parâmetros de consulta
-    cache_key = f"warranties_skip_{skip}_limit_{limit}"
-
-    # Verificar se os dados estão no cache
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        # Se estiver no cache, retorna os dados em cache
-        return json.loads(
-            cached_data
-        )  # Convertendo de volta para o formato esperado (list of FactWarranties)
-
-    # Se não estiver no cache, consulta o banco de dados
-    warranties = db.exec(select(FactWarranties).offset(skip).limit(limit)).all()
-
-    # Armazenar os dados no cache por 60 segundos, agora com a serialização correta
-    serialized_warranties = json.dumps(
-        [
-            jsonable_encoder(
-                warranty, custom_encoder={FactWarranties: default_serializer}
-            )
-            for warranty in warranties
-        ]
+    # Cada dimensão uma única vez, na ordem pedida
+    dimensions = list(dict.fromkeys(group_by))
+    rates = warranties_service.failure_rates(
+        db, dimensions, start_date, end_date, market
     )
-    set_cache(cache_key, serialized_warranties, expiration=60)
-
-    return warranties
-
-
-# Recuperar um único registro por claim_key
-@router.get("/{claim_key}", response_model=FactWarranties)
-def get_warranty(claim_key: int, db: Session = Depends(get_db)):
-    warranty = db.get(FactWarranties, claim_key)
-    if not warranty:
-        raise HTTPException(status_code=404, detail="Warranty not found")
-    return warranty
-
-
-# Atualizar um registro existente
-@router.put("/{claim_key}", response_model=FactWarranties)
-def update_warranty(
-    claim_key: int, warranty_data: FactWarranties, db: Session = Depends(get_db)
+    return FastJSONResponse(content=rates)
+
+
+# Percentual da amostra do modo aproximado; None na contagem exata, para que
+# "sample_percent" não entre na chave do cache quando é ignorado
+def top_sample_percent(
+    approximate: bool = False,
+    sample_percent: float = Query(settings.TOP_N_SAMPLE_PERCENT, gt=0, le=100),
+) -> Optional[float]:
+    return sample_percent if approximate else None
+
+
+# Os "n" parts, locations, vehicles ou classified_issue com mais warranties.
+# Não há tabelas de agregação: a contagem é feita na consulta, e "approximate"
+# conta uma amostra da tabela para períodos muito longos
+@router.get("/top/{dimension}")
+@cached_query(FactWarranties, expiration=300)
+def get_top_warranties(
+    dimension: WarrantyDimension,
+    n: int = Query(10, ge=1, le=settings.TOP_N_MAX),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sample_percent: Optional[float] = Depends(top_sample_percent),
+    db: Session = Depends(get_read_db),
 ):
-    warranty = db.get(FactWarranties, claim_key)
-    if not warranty:
-        raise HTTPException(status_code=404, detail="Warranty not found")
-
-    warranty_data = warranty_data.model_dump(exclude_unset=True)
-    for key, value in warranty_data.items():
-        setattr(warranty, key, value)
-
-    db.commit()
-    db.refresh(warranty)
-    return warranty
-
+    top = warranties_service.top_warranties(
+        db, dimension, n, start_date, end_date, sample_percent=sample_percent
+    )
+    return FastJSONResponse(content=top)
+
+
+# Busca textual nas reclamações e comentários técnicos (sintaxe de busca web:
+# "frase exata", OR, -termo), com os filtros de data, peça e localização.
+# Os trechos são HTML seguro: texto escapado e os termos entre <b> e </b>.
+# Declarada antes do CRUD para não ser capturada por "/{claim_key}"
+@router.get("/search")
+@cached_query(FactWarranties, expiration=60)
+def search_warranties(
+    q: str = Query(..., min_length=1),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    page: Pagination = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    results = warranties_service.search_warranties(
+        db, q, page, start_date, end_date, part_id, location_id
+    )
+    return FastJSONResponse(content=results)
 
-# Excluir um registro por claim_key
-@router.delete("/{claim_key}")
-def delete_warranty(claim_key: int, db: Session = Depends(get_db)):
-    warranty = db.get(FactWarranties, claim_key)
-    if not warranty:
-        raise HTTPException(status_code=404, detail="Warranty not found")
 
-    db.delete(warranty)
-    db.commit()
-    return {"message": "Warranty deleted successfully"}
+register_crud_routes(
+    router,
+    warranties_service.repository,
+    bulk_request=WarrantyBulkDeleteRequest,
+    bulk_filters=lambda criteria: warranties_service.warranty_filters(
+        **criteria.model_dump()
+    ),
+)
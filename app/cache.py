@@ -1,50 +1,475 @@
+import enum
+import functools
+import math
+import orjson
+import os
+import random
 import redis
-from fastapi import HTTPException
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterable, NamedTuple, Optional
+from urllib.parse import urlencode
+from fastapi import Request
+from fastapi.responses import Response
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.database import primary_session
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.etag import etag_matches, make_etag
+from app.utils.local_cache import LocalCache
+from app.utils.pagination import PageParams
+from app.utils.serializer import dumps
 
 # Variável global para o cliente Redis
 redis_client = None
 
+# Conjuntos com as chaves de cache que dependem de cada tabela
+TABLE_KEYS_PREFIX = "cache_tables"
+# Os conjuntos vivem mais que qualquer TTL de rota
+TABLE_KEYS_EXPIRATION = 86400
 
-# Função para inicializar a conexão com o Redis
+# Camada local (memória do processo) na frente do Redis. A coerência entre os
+# processos é mantida por mensagens de invalidação via pub/sub
+local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ITEMS, settings.LOCAL_CACHE_TTL)
+INVALIDATION_CHANNEL = "cache_invalidation"
+_invalidation_thread = None
+# Origem das mensagens de invalidação: cada processo ignora as próprias, já
+# aplicadas na hora. Renovado após o fork (com preload_app os workers
+# herdariam o ID do master)
+_process_id = uuid.uuid4().hex
+# tabela -> funções chamadas quando a tabela é alterada (em qualquer processo)
+_table_listeners: dict = {}
+
+# Renovações de valores vencidos, fora das requisições (threads criadas sob
+# demanda, já no processo do worker)
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+)
+
+# Intervalo entre as verificações de quem aguarda outra requisição gerar o valor
+LOCK_POLL_SECONDS = 0.05
+
+# Com o Redis fora do ar a API segue sem cache: após algumas falhas seguidas
+# as chamadas são puladas até a próxima tentativa de reconexão
+breaker = CircuitBreaker(settings.CACHE_FAILURE_THRESHOLD, settings.CACHE_RETRY_SECONDS)
+
+
+# Redis indisponível (fora do ar, lento demais ou circuito aberto)
+class CacheUnavailable(Exception):
+    pass
+
+
+# Executa as chamadas ao Redis registrando sucesso/falha no circuit breaker
+@contextmanager
+def _redis():
+    if redis_client is None or not breaker.allow():
+        raise CacheUnavailable()
+    try:
+        yield redis_client
+    except redis.exceptions.RedisError as e:
+        breaker.record_failure()
+        raise CacheUnavailable() from e
+    breaker.record_success()
+
+
+# Função para inicializar a conexão com o Redis (sem impedir a API de subir)
 def init_cache():
     global redis_client
     if redis_client is None:  # Verifica se o cliente já foi inicializado
-        redis_client = redis.StrictRedis(
-            host="localhost", port=6379, db=0, decode_responses=True
+        # Timeouts curtos: um Redis lento não pode segurar as requisições
+        redis_client = redis.StrictRedis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
         )
-        # Teste de conexão para garantir que o Redis está disponível
+    # Teste de conexão: sem Redis a API funciona direto no banco
+    try:
+        with _redis() as client:
+            client.ping()
+        print("Redis conectado com sucesso!")
+    except CacheUnavailable:
+        print("Redis indisponível: a API seguirá sem cache até a reconexão")
+    _start_invalidation_listener()
+
+
+# Escuta as invalidações publicadas pelos demais processos da API
+def _start_invalidation_listener():
+    global _invalidation_thread
+    if _invalidation_thread is not None:
+        return
+    _invalidation_thread = threading.Thread(
+        target=_listen_invalidations, name="cache-invalidation", daemon=True
+    )
+    _invalidation_thread.start()
+
+
+# Reassina o canal após quedas do Redis; mensagens podem ter sido perdidas
+# enquanto desconectado, então a camada local é descartada a cada nova assinatura
+def _listen_invalidations():
+    pubsub = None
+    while True:
         try:
-            redis_client.ping()
-            print("Redis conectado com sucesso!")
-        except redis.exceptions.ConnectionError as e:
-            raise HTTPException(status_code=500, detail="Erro ao conectar com o Redis")
+            if pubsub is None:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                local_cache.clear()
+                _notify_tables(list(_table_listeners))
+            message = pubsub.get_message(timeout=1.0)
+            if message is not None:
+                _handle_invalidation(message)
+        except redis.exceptions.RedisError:
+            pubsub = None
+            time.sleep(settings.CACHE_RETRY_SECONDS)
+
+
+def _renew_process_id():
+    global _process_id
+    _process_id = uuid.uuid4().hex
+
+
+os.register_at_fork(after_in_child=_renew_process_id)
+
+
+def _invalidation_message(keys) -> bytes:
+    return orjson.dumps({"origin": _process_id, "keys": list(keys)})
+
+
+def _handle_invalidation(message):
+    payload = orjson.loads(message["data"])
+    if payload["origin"] == _process_id:
+        return
+    keys = payload["keys"]
+    local_cache.delete(*keys)
+    prefix = f"{TABLE_KEYS_PREFIX}:"
+    _notify_tables(key[len(prefix) :] for key in keys if key.startswith(prefix))
+
+
+# Registra "callback" para ser chamado quando "table" for alterada, seja por
+# uma escrita neste processo ou por uma invalidação recebida via pub/sub
+def on_table_change(table: str, callback):
+    _table_listeners.setdefault(table, []).append(callback)
+
+
+def _notify_tables(tables: Iterable[str]):
+    for table in tables:
+        for callback in _table_listeners.get(table, ()):
+            callback()
+
+
+# Remove as chaves da camada local e avisa os demais processos
+def _publish_invalidation(client, keys):
+    local_cache.delete(*keys)
+    client.publish(INVALIDATION_CHANNEL, _invalidation_message(keys))
 
 
 # Função para armazenar um valor no cache com uma chave
 def set_cache(key: str, value: str, expiration: int = 3600):
-    if redis_client is None:
-        raise HTTPException(status_code=500, detail="Cache não inicializado.")
     try:
-        redis_client.setex(key, expiration, value)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cache Error: {str(e)}")
+        with _redis() as client:
+            client.setex(key, expiration, value)
+    except CacheUnavailable:
+        print(f"Redis indisponível: '{key}' não foi armazenado")
+        return
+    local_cache.set(key, value, expiration)
 
 
-# Função para obter o valor do cache
+# Lê o valor (memória local primeiro, depois o Redis); levanta CacheUnavailable
+# para quem precisa diferenciar "não encontrado" de "Redis fora do ar"
+def get_cache_or_raise(key: str):
+    value = local_cache.get(key)
+    if value is not None:
+        return value
+    with _redis() as client:
+        value = client.get(key)
+    if value is not None:
+        local_cache.set(key, value)
+    return value
+
+
+# Função para obter o valor do cache (None se ausente ou Redis indisponível)
 def get_cache(key: str):
-    if redis_client is None:
-        raise HTTPException(status_code=500, detail="Cache não inicializado.")
     try:
-        return redis_client.get(key)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cache Error: {str(e)}")
+        return get_cache_or_raise(key)
+    except CacheUnavailable:
+        return None
 
 
 # Função para remover o valor do cache
 def delete_cache(key: str):
-    if redis_client is None:
-        raise HTTPException(status_code=500, detail="Cache não inicializado.")
+    local_cache.delete(key)
+    try:
+        with _redis() as client:
+            client.delete(key)
+            _publish_invalidation(client, [key])
+    except CacheUnavailable:
+        print(f"Redis indisponível: '{key}' não foi removido")
+
+
+# Flags compartilhadas entre os processos (sem a camada local): "pop_flag"
+# remove a flag e informa se ela existia, então apenas um processo recebe True.
+# Levantam CacheUnavailable com o Redis fora do ar
+def set_flag(key: str):
+    with _redis() as client:
+        client.set(key, 1)
+
+
+def pop_flag(key: str) -> bool:
+    with _redis() as client:
+        return client.delete(key) == 1
+
+
+# Valor em cache: corpo JSON, ETag, validade (epoch) e tempo gasto para gerá-lo
+class CacheEntry(NamedTuple):
+    body: str
+    etag: str
+    fresh_until: float
+    delta: float
+
+
+# Lê a entrada da memória local ou do Redis (um único HMGET)
+def _read_entry(client, key: str) -> Optional[CacheEntry]:
+    entry = local_cache.get(key)
+    if entry is not None:
+        return entry
+    values = client.hmget(key, CacheEntry._fields)
+    if values[0] is None:
+        return None
+    entry = CacheEntry(values[0], values[1], float(values[2]), float(values[3]))
+    local_cache.set(key, entry)
+    return entry
+
+
+# Executa o loader com a sessão do banco e monta a entrada com o tempo gasto
+def _run_loader(loader, session, expiration: int) -> CacheEntry:
+    started = time.perf_counter()
+    body = loader(session)
+    delta = time.perf_counter() - started
+    return CacheEntry(body, make_etag(body), time.time() + expiration, delta)
+
+
+# Grava a entrada no Redis (com sobrevida para servir valores vencidos) e na
+# memória local. Uma falha do Redis aqui não descarta o resultado calculado
+def _store_entry(client, key: str, entry: CacheEntry, expiration: int, tables):
+    try:
+        pipe = client.pipeline()
+        pipe.hset(key, mapping=entry._asdict())
+        pipe.expire(key, expiration + settings.CACHE_STALE_SECONDS)
+        _register_tables(pipe, tables, key)
+        pipe.execute()
+    except redis.exceptions.RedisError:
+        breaker.record_failure()
+        return
+    local_cache.set(key, entry, expiration)
+
+
+# Expiração antecipada probabilística: quanto mais perto do vencimento e mais
+# cara a consulta, maior a chance de renovar antes que todos percam o cache
+def _should_refresh(entry: CacheEntry) -> bool:
+    gap = (
+        -entry.delta
+        * settings.CACHE_EARLY_EXPIRATION_BETA
+        * math.log(1.0 - random.random())
+    )
+    return time.time() + gap >= entry.fresh_until
+
+
+# Lock no Redis para que apenas uma requisição (de qualquer processo) recalcule
+def _try_lock(client, key: str):
+    lock = client.lock(
+        f"lock:{key}",
+        timeout=settings.CACHE_LOCK_TIMEOUT_MS / 1000,
+        blocking=False,
+    )
+    return lock if lock.acquire() else None
+
+
+# Libera o lock; se o Redis falhar ele expira sozinho pelo timeout
+def _release_lock(lock):
+    try:
+        lock.release()
+    except redis.exceptions.RedisError:
+        pass
+
+
+# Aguarda outro processo gravar a chave (até o tempo máximo do lock)
+def _wait_for_entry(client, key: str) -> Optional[CacheEntry]:
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT_MS / 1000
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_SECONDS)
+        entry = _read_entry(client, key)
+        if entry is not None:
+            return entry
+    return None
+
+
+# Renova a entrada fora da requisição, com uma sessão própria no primário (a
+# sessão da requisição é fechada quando ela termina), e avisa os demais processos
+def _refresh(key: str, loader, expiration: int, tables: Iterable[str], lock):
     try:
-        redis_client.delete(key)
+        with primary_session() as session:
+            entry = _run_loader(loader, session, expiration)
+        with _redis() as client:
+            _store_entry(client, key, entry, expiration, tables)
+            # Os outros processos descartam a cópia local vencida
+            client.publish(INVALIDATION_CHANNEL, _invalidation_message([key]))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cache Error: {str(e)}")
+        print(f"Falha ao renovar '{key}' em segundo plano: {e}")
+    finally:
+        _release_lock(lock)
+
+
+# Lê a chave do cache ou executa "loader(session)" em uma única requisição:
+# - valor válido: servido direto (com renovação antecipada probabilística);
+# - valor vencido: servido enquanto a renovação roda em segundo plano (apenas
+#   quem obtém o lock a agenda);
+# - sem valor: as demais requisições aguardam quem obteve o lock (single-flight);
+# - Redis indisponível: consulta o banco diretamente, sem cache, com a sessão
+#   da requisição ("session", que pode ser de uma réplica)
+def get_or_load(
+    key: str, loader, expiration: int, tables: Iterable[str] = (), session=None
+) -> CacheEntry:
+    loaded = None
+    try:
+        with _redis() as client:
+            entry = _read_entry(client, key)
+            if entry is not None:
+                if _should_refresh(entry):
+                    lock = _try_lock(client, key)
+                    if lock is not None:
+                        try:
+                            _refresh_executor.submit(
+                                _refresh, key, loader, expiration, tables, lock
+                            )
+                        except RuntimeError:
+                            _release_lock(lock)
+                return entry
+
+            # Dentro do processo basta uma thread disputar o lock do Redis
+            with local_cache.key_lock(key):
+                entry = _read_entry(client, key)
+                if entry is not None:
+                    return entry
+                lock = _try_lock(client, key)
+                if lock is None:
+                    entry = _wait_for_entry(client, key)
+                    if entry is not None:
+                        return entry
+                try:
+                    # O que vai para o cache é lido do primário (nunca de uma
+                    # réplica que ainda não recebeu a escrita invalidada)
+                    with primary_session() as primary:
+                        loaded = _run_loader(loader, primary, expiration)
+                    _store_entry(client, key, loaded, expiration, tables)
+                    return loaded
+                finally:
+                    if lock is not None:
+                        _release_lock(lock)
+    except CacheUnavailable:
+        # O Redis pode falhar depois da consulta: o resultado não é recalculado
+        if loaded is not None:
+            return loaded
+        return _run_loader(loader, session, expiration)
+
+
+# Monta a resposta JSON com ETag a partir dos bytes já serializados
+def json_response(request: Request, body: str, etag: str) -> Response:
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+# Associa as chaves às tabelas das quais o resultado depende
+def _register_tables(pipe, tables: Iterable[str], *keys: str):
+    for table in tables:
+        pipe.sadd(f"{TABLE_KEYS_PREFIX}:{table}", *keys)
+        pipe.expire(f"{TABLE_KEYS_PREFIX}:{table}", TABLE_KEYS_EXPIRATION)
+
+
+# Remove todas as respostas em cache que dependem das tabelas alteradas
+def invalidate_tables(*tables: str):
+    # A escrita já foi confirmada no banco: uma falha aqui não deve virar erro
+    # para o cliente, no pior caso o cache do Redis expira pelo TTL
+    try:
+        with _redis() as client:
+            for table in tables:
+                tag = f"{TABLE_KEYS_PREFIX}:{table}"
+                keys = client.smembers(tag)
+                client.delete(tag, *keys)
+                # A própria tag avisa os ouvintes da tabela nos demais processos
+                _publish_invalidation(client, [*keys, tag])
+    except CacheUnavailable:
+        # Sem a lista de chaves, descarta toda a camada local deste processo
+        local_cache.clear()
+        print(f"Redis indisponível: cache de {tables} não foi invalidado")
+    # Os ouvintes deste processo são avisados uma única vez, aqui: a mensagem
+    # publicada volta pelo pub/sub, mas é ignorada pela origem
+    _notify_tables(tables)
+
+
+# Normaliza o valor de um parâmetro para compor a chave do cache
+def _key_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# Chave do cache: nome da rota + parâmetros em ordem alfabética
+def query_cache_key(func, params: dict) -> str:
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, (Session, Request)):
+            continue
+        if isinstance(value, PageParams):
+            normalized["skip"] = value.skip
+            normalized["limit"] = value.limit
+            continue
+        if value is not None:
+            normalized[name] = _key_value(value)
+    module = func.__module__.rsplit(".", 1)[-1]
+    query = urlencode(sorted(normalized.items()), doseq=True)
+    return f"query:{module}.{func.__name__}:{query}"
+
+
+# Decorator de cache para rotas de consulta: guarda o JSON da resposta no Redis
+# por "expiration" segundos e o invalida quando uma das tabelas é alterada
+def cached_query(*models, expiration: int = 60):
+    tables = [model.__tablename__ for model in models]
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            # A sessão recebida pela rota; na renovação em segundo plano o
+            # loader recebe outra sessão no lugar dela
+            names = [
+                name for name, value in kwargs.items() if isinstance(value, Session)
+            ]
+            session = kwargs[names[0]] if names else None
+
+            def load(db):
+                result = func(**{**kwargs, **{name: db for name in names}})
+                # Rotas que já devolvem FastJSONResponse têm o corpo pronto
+                if isinstance(result, Response):
+                    return result.body
+                return dumps(result)
+
+            entry = get_or_load(
+                query_cache_key(func, kwargs), load, expiration, tables, session
+            )
+            # ETag guardado com o corpo: o ETagMiddleware só compara com o
+            # If-None-Match (304) sem recalcular o hash
+            return Response(
+                content=entry.body,
+                media_type="application/json",
+                headers={"ETag": entry.etag},
+            )
+
+        return wrapper
+
+    return decorator
@@ -1,18 +1,15 @@
-import os
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from dotenv import load_dotenv
+from app.core.config import settings
 from app.models.user import User
 from app.core.database import get_db
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-load_dotenv()
-
-JWT_SECRET = os.getenv("JWT_SECRET")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+# Lidos do .env uma única vez, pelo Settings
+JWT_SECRET = settings.JWT_SECRET
+ALGORITHM = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 
 # Gera um token JWT
@@ -38,8 +35,8 @@ def decode_access_token(token: str):
         return None  # Se ocorrer erro de JWT (token inválido ou expirado), retorna None
 
 
-# Função para obter o usuário a partir do token JWT
-def get_user_from_token(token: str, db: Session) -> User:
+# Valida o token JWT e retorna o nome de usuário das claims
+def get_username_from_token(token: str) -> str:
     payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(
@@ -52,6 +49,12 @@ def get_user_from_token(token: str, db: Session) -> User:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token doesn't contain username",
         )
+    return username
+
+
+# Função para obter o usuário a partir do token JWT
+def get_user_from_token(token: str, db: Session) -> User:
+    username = get_username_from_token(token)
 
     # Aqui você deve fazer uma consulta no banco de dados para buscar o usuário
     user = db.query(User).filter(User.username == username).first()
@@ -63,6 +66,12 @@ def get_user_from_token(token: str, db: Session) -> User:
     return user
 
 
+# Usuário montado apenas com as claims do JWT (assinatura e expiração
+# validadas), sem consultar o banco. Usado quando o Redis está fora do ar
+def get_user_from_claims(token: str) -> User:
+    return User(username=get_username_from_token(token))
+
+
 # Função para obter o usuário atual da requisição
 def get_current_user(db: Session, token: str) -> User:
     return get_user_from_token(token, db)
@@ -1,11 +1,91 @@
+from typing import List, Literal
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+
+    # Réplicas de leitura (JSON, ex: '["postgresql://...@replica1/db"]'),
+    # intervalo até testar novamente uma réplica com falha e por quanto tempo
+    # após uma escrita o cliente continua lendo do primário
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_HEALTH_CHECK_SECONDS: int = 10
+    READ_YOUR_WRITES_SECONDS: int = 5
     SECRET_KEY: str
-    ALGORITHM: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int
+    JWT_SECRET: str
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+
+    # Log de SQL: fração das consultas registradas (amostragem), consultas
+    # sempre registradas por completo a partir de N ms e o echo do SQLAlchemy
+    # (apenas para desenvolvimento: escreve todas as consultas)
+    SQL_LOG_SAMPLE_RATE: float = 0.01
+    SQL_SLOW_QUERY_MS: int = 500
+    SQL_ECHO: bool = False
+
+    # Cache de SQL compilado por engine (entradas)
+    SQL_COMPILED_CACHE_SIZE: int = 1500
+
+    # Atraso (segundos) para agrupar as escritas antes de atualizar a projeção
+    # supplier_geography
+    SUPPLIER_GEOGRAPHY_REFRESH_SECONDS: float = 2.0
+
+    # Intervalo máximo (segundos) entre recargas completas do registro de
+    # locations em memória (entre elas só as alterações são lidas)
+    LOCATION_REGISTRY_RELOAD_SECONDS: int = 300
+    # Atraso (segundos) para agrupar as alterações antes de atualizar o registro
+    # em segundo plano (até lá as rotas servem a versão anterior)
+    LOCATION_REGISTRY_REFRESH_SECONDS: float = 0.5
+
+    # Rotas de top-N: maior "n" aceito e percentual de blocos lidos no modo
+    # aproximado (TABLESAMPLE)
+    TOP_N_MAX: int = 1000
+    TOP_N_SAMPLE_PERCENT: float = 1.0
+
+    # Partições anuais de factwarranties mantidas à frente do ano atual
+    PARTITION_YEARS_AHEAD: int = 2
+
+    # Compressão das respostas (bytes mínimos para comprimir)
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    GZIP_COMPRESS_LEVEL: int = 6
+
+    # Operações em massa: linhas por transação e espera máxima por locks
+    BULK_CHUNK_SIZE: int = 5000
+    BULK_LOCK_TIMEOUT_MS: int = 5000
+
+    # Séries temporais: intervalos aceitos por consulta (ex: 10 anos por dia)
+    TIMESERIES_MAX_BUCKETS: int = 3700
+
+    # Paginação: limite máximo aceito, página padrão e tamanho alvo (bytes)
+    # usado para reduzir a página padrão quando as linhas são largas
+    MAX_PAGE_SIZE: int = 5000
+    DEFAULT_PAGE_SIZE: int = 1000
+    MIN_PAGE_SIZE: int = 50
+    PAGE_TARGET_BYTES: int = 256_000
+
+    # Cache local (memória de cada processo) na frente do Redis
+    LOCAL_CACHE_MAX_ITEMS: int = 10_000
+    LOCAL_CACHE_TTL: int = 30
+
+    # Proteção contra estouro de cache: sobrevida dos valores vencidos (servidos
+    # enquanto uma requisição os renova), fator da expiração antecipada e tempo
+    # máximo do lock de recálculo
+    CACHE_STALE_SECONDS: int = 60
+    CACHE_EARLY_EXPIRATION_BETA: float = 1.0
+    CACHE_LOCK_TIMEOUT_MS: int = 5000
+    # Threads que renovam valores vencidos fora das requisições
+    CACHE_REFRESH_WORKERS: int = 4
+
+    # Redis: timeouts curtos e circuit breaker (falhas seguidas até abrir o
+    # circuito e segundos até tentar reconectar)
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.25
+    CACHE_FAILURE_THRESHOLD: int = 3
+    CACHE_RETRY_SECONDS: int = 30
+
+    # Sessões com o Redis indisponível: "jwt" aceita tokens JWT válidos sem
+    # consultar a sessão; "deny" responde 503 até o Redis voltar
+    SESSION_FALLBACK: Literal["jwt", "deny"] = "jwt"
 
     class Config:
         env_file = ".env"
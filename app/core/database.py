@@ -1,16 +1,161 @@
-from sqlmodel import SQLModel, Session, create_engine
+from contextlib import contextmanager
+import itertools
+import threading
+import time
+from fastapi import Request
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, Session, create_engine, text
 from app.core.config import settings
+from app.core.sql_logging import instrument_engine
 
-# Criando a engine do banco de dados
-engine = create_engine(settings.DATABASE_URL, echo=True)
+
+# Opções comuns às engines: tamanho do cache de SQL compilado
+def engine_options() -> dict:
+    return {"query_cache_size": settings.SQL_COMPILED_CACHE_SIZE}
+
+
+# Cookie que marca a última escrita do cliente (leituras voltam para o primário)
+LAST_WRITE_COOKIE = "db_last_write"
+
+
+# Réplicas de leitura: round-robin entre as saudáveis; uma réplica com falha
+# fica fora da rotação até passar na verificação seguinte (SELECT 1)
+class ReplicaPool:
+    def __init__(self, urls, check_interval: float):
+        # pool_pre_ping descarta conexões que caíram junto com a réplica
+        self.engines = [
+            instrument_engine(
+                create_engine(url, pool_pre_ping=True, **engine_options())
+            )
+            for url in urls
+        ]
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.engines)
+        self._down = {}  # engine -> momento da falha
+        self._lock = threading.Lock()
+
+    def _is_healthy(self, replica) -> bool:
+        failed_at = self._down.get(replica)
+        if failed_at is None:
+            return True
+        if time.monotonic() - failed_at < self.check_interval:
+            return False
+        try:
+            with replica.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except OperationalError:
+            self.mark_down(replica)
+            return False
+        self._down.pop(replica, None)
+        return True
+
+    # Próxima réplica saudável, ou None para usar o primário
+    def next(self):
+        for _ in range(len(self.engines)):
+            with self._lock:
+                replica = next(self._cycle)
+            if self._is_healthy(replica):
+                return replica
+        return None
+
+    def mark_down(self, replica):
+        self._down[replica] = time.monotonic()
+
+
+_engine = None
+_replicas = None
+_engine_lock = threading.Lock()
+
+
+# Engine do banco de dados, criada na primeira requisição (e não na importação)
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = instrument_engine(
+                    create_engine(
+                        settings.DATABASE_URL,
+                        echo=settings.SQL_ECHO,
+                        **engine_options(),
+                    )
+                )
+    return _engine
+
+
+# Réplicas de leitura, criadas junto com a primeira leitura
+def get_replicas() -> ReplicaPool:
+    global _replicas
+    if _replicas is None:
+        with _engine_lock:
+            if _replicas is None:
+                _replicas = ReplicaPool(
+                    settings.DATABASE_REPLICA_URLS,
+                    settings.REPLICA_HEALTH_CHECK_SECONDS,
+                )
+    return _replicas
+
+
+# Compatibilidade com "from app.core.database import engine" (scripts e migrações)
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    if name == "replicas":
+        return get_replicas()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Após o fork (gunicorn com preload_app) descarta as conexões herdadas do
+# master; engines ainda não criadas não têm o que descartar
+def dispose_engines():
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _replicas is not None:
+        for replica in _replicas.engines:
+            replica.dispose(close=False)
+
+
+# Sessão no primário fora da dependência da rota: preenchimento e renovação
+# do cache. Uma réplica atrasada logo após a invalidação gravaria de novo as
+# linhas anteriores à escrita, servidas a todos os clientes até o TTL
+@contextmanager
+def primary_session():
+    with Session(get_engine(), expire_on_commit=False) as session:
+        yield session
 
 
 # Função para criar as tabelas automaticamente
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
 
 
 # Dependência para obter a sessão do banco de dados
+# (expire_on_commit=False: o objeto retornado pelo RETURNING continua válido
+# após o commit, sem um SELECT extra para recarregá-lo)
 def get_db():
-    with Session(engine) as session:
+    with Session(get_engine(), expire_on_commit=False) as session:
         yield session
+
+
+# O cliente escreveu há pouco: lê do primário para enxergar a própria escrita
+def _recently_wrote(request: Request) -> bool:
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < settings.READ_YOUR_WRITES_SECONDS
+
+
+# Dependência para as rotas somente leitura: sessão em uma réplica
+# (ou no primário sem réplicas, todas fora do ar ou logo após uma escrita)
+def get_read_db(request: Request):
+    replica = None if _recently_wrote(request) else get_replicas().next()
+    if replica is None:
+        yield from get_db()
+        return
+    with Session(replica, expire_on_commit=False) as session:
+        try:
+            yield session
+        except OperationalError:
+            get_replicas().mark_down(replica)
+            raise
@@ -0,0 +1,171 @@
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.database import LAST_WRITE_COOKIE
+from app.core.sql_logging import request_id_var, request_scope_var
+from app.utils.etag import etag_matches, make_etag
+
+
+# Middlewares ASGI puros: as respostas seguem com o corpo em uma única
+# mensagem (como saíram da rota), então a compressão continua respeitando
+# COMPRESSION_MINIMUM_SIZE; BaseHTTPMiddleware transformaria todas em streaming
+
+
+# Resposta 304 (sem corpo) com o ETag atual
+async def _send_not_modified(send, etag: str):
+    headers = MutableHeaders(raw=[])
+    headers["etag"] = etag
+    headers.add_vary_header("Accept-Encoding")
+    await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+    await send({"type": "http.response.body", "body": b""})
+
+
+# ETag fraco (W/) nas respostas JSON de GET e 304 quando o cliente já tem o
+# corpo. É fraco porque o mesmo valor vale para o corpo comprimido e para o
+# original. Rotas com cache enviam o ETag guardado junto com o corpo e o 304
+# sai sem consultar o banco. Nas demais a rota executa a consulta e o corpo é
+# lido para calcular o hash: o 304 economiza apenas a transferência
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        start = None
+        chunks = []
+        # "send": repassa sem alterações; "skip": 304 já enviado
+        mode = None
+
+        async def send_with_etag(message: Message):
+            nonlocal start, mode
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                etag = headers.get("etag")
+                is_json = headers.get("content-type", "").startswith("application/json")
+                if message["status"] != 200 or not (etag or is_json):
+                    mode = "send"
+                elif etag is not None:
+                    if etag_matches(request, etag):
+                        mode = "skip"
+                        await _send_not_modified(send, etag)
+                        return
+                    mode = "send"
+                elif scope["method"] == "HEAD":
+                    # Sem corpo não há o que comparar
+                    mode = "send"
+                if mode == "send":
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if mode == "send":
+                await send(message)
+                return
+            if mode == "skip":
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            etag = make_etag(body)
+            if etag_matches(request, etag):
+                await _send_not_modified(send, etag)
+                return
+            headers = MutableHeaders(scope=start)
+            headers["etag"] = etag
+            headers["content-length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_etag)
+
+
+# Identificador da requisição (X-Request-ID recebido ou gerado) e escopo ASGI
+# disponíveis para os logs de SQL da requisição; o ID volta no cabeçalho
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        request_id_token = request_id_var.set(request_id)
+        scope_token = request_scope_var.set(scope)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(request_id_token)
+            request_scope_var.reset(scope_token)
+
+
+# Marca o momento das escritas do cliente para as leituras seguintes irem ao
+# primário (read-your-writes) enquanto as réplicas alcançam o primário
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in ("GET", "HEAD", "OPTIONS")
+            or not settings.DATABASE_REPLICA_URLS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                # Reaproveita a formatação do Set-Cookie do Starlette
+                cookie = Response()
+                cookie.set_cookie(
+                    LAST_WRITE_COOKIE,
+                    str(time.time()),
+                    max_age=settings.READ_YOUR_WRITES_SECONDS,
+                    httponly=True,
+                )
+                MutableHeaders(scope=message).append(
+                    "set-cookie", cookie.headers["set-cookie"]
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+# Registra a compressão negociada (Brotli quando disponível, senão GZip)
+def add_compression_middleware(app: FastAPI):
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            compresslevel=settings.GZIP_COMPRESS_LEVEL,
+        )
+        return
+
+    # O BrotliMiddleware volta para GZip se o cliente não aceitar "br"
+    app.add_middleware(
+        BrotliMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_fallback=True,
+    )
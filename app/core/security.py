@@ -1,14 +1,20 @@
-from passlib.context import CryptContext
+from functools import lru_cache
 
-# Configuração do Passlib para criptografia de senha
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Configuração do Passlib para criptografia de senha. O CryptContext (passlib +
+# bcrypt) é criado no primeiro registro/login, e não na inicialização da API
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 # Hash da senha
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 # Verifica se a senha informada corresponde ao hash armazenado
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
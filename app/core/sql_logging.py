@@ -0,0 +1,123 @@
+import atexit
+import collections
+import contextvars
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from sqlalchemy import event
+from app.core.config import settings
+
+# Requisição em andamento (preenchidas pelo RequestIdMiddleware)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "request_id", default=None
+)
+request_scope_var: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "request_scope", default=None
+)
+
+logger = logging.getLogger("app.sql")
+
+# Tamanho máximo do SQL nas linhas amostradas (as lentas saem completas)
+SAMPLE_STATEMENT_LENGTH = 200
+
+# Uso do cache de SQL compilado (context.cache_hit) neste processo; contagem
+# sem lock, aproximada sob concorrência
+compile_cache_stats: collections.Counter = collections.Counter()
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+# A escrita (stdout) fica em uma thread própria: a requisição apenas coloca o
+# registro na fila. Após um fork (gunicorn) a thread é recriada no worker
+def _ensure_listener():
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    # A fila herdada do master não tem mais quem a consuma
+    for inherited in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+        logger.removeHandler(inherited)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _listener = QueueListener(log_queue, handler)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(_listener.stop)
+
+
+# Rota da requisição (o template, ex: /api/vehicles/{vehicle_id}) para agrupar
+def current_route() -> Optional[str]:
+    scope = request_scope_var.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    if context is not None:
+        compile_cache_stats[context.cache_hit.name.lower()] += 1
+    slow = duration_ms >= settings.SQL_SLOW_QUERY_MS
+    if not slow and random.random() >= settings.SQL_LOG_SAMPLE_RATE:
+        return
+
+    _ensure_listener()
+    if slow:
+        logger.warning(
+            "slow_query duration_ms=%.1f rows=%s route=%s request_id=%s "
+            "statement=%r parameters=%r",
+            duration_ms,
+            cursor.rowcount,
+            current_route(),
+            request_id_var.get(),
+            statement,
+            parameters,
+        )
+    else:
+        logger.info(
+            "query duration_ms=%.1f rows=%s route=%s request_id=%s statement=%r",
+            duration_ms,
+            cursor.rowcount,
+            current_route(),
+            request_id_var.get(),
+            statement[:SAMPLE_STATEMENT_LENGTH],
+        )
+
+
+# Consulta com erro não chega ao after_cursor_execute: descarta o início
+def _handle_error(context):
+    started = (
+        context.connection.info.get("query_started") if context.connection else None
+    )
+    if started:
+        started.pop()
+
+
+# Acertos e erros do cache de compilação e a taxa de acerto
+def compile_cache_report() -> dict:
+    stats = dict(compile_cache_stats)
+    cacheable = stats.get("cache_hit", 0) + stats.get("cache_miss", 0)
+    stats["hit_rate"] = stats.get("cache_hit", 0) / cacheable if cacheable else None
+    return stats
+
+
+# Registra a medição de tempo nas consultas de uma engine
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    return engine
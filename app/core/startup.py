@@ -0,0 +1,64 @@
+import argparse
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+# Relatório do tempo de importação da API (python -X importtime), usado para
+# acompanhar o cold start:
+#   python -m app.core.startup [--top 25] [--module app.main]
+
+
+# Importa o módulo em um processo novo e devolve o tempo total (segundos) e as
+# linhas do -X importtime: (self_us, cumulative_us, módulo)
+def measure_imports(module: str) -> Tuple[float, List[Tuple[int, int, str]]]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return elapsed, imports
+
+
+# Pacotes de primeiro nível ordenados pelo tempo acumulado
+def top_level_packages(imports, top: int) -> List[Tuple[str, int]]:
+    totals = {}
+    for self_us, _, name in imports:
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação da API")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    elapsed, imports = measure_imports(args.module)
+    print(f"import {args.module}: {elapsed * 1000:.0f} ms (processo completo)")
+    print(f"{len(imports)} módulos importados\n")
+
+    print(f"{'pacote':<30} {'ms':>8}")
+    for package, total_us in top_level_packages(imports, args.top):
+        print(f"{package:<30} {total_us / 1000:>8.1f}")
+
+    print(f"\n{'módulo (acumulado)':<50} {'ms':>8}")
+    slowest = sorted(imports, key=lambda item: item[1], reverse=True)[: args.top]
+    for _, cumulative_us, name in slowest:
+        print(f"{name.strip():<50} {cumulative_us / 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+from uvicorn.workers import UvicornWorker
+
+
+# Worker do gunicorn com o loop uvloop e o parser HTTP httptools
+class UvloopWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
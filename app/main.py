@@ -9,13 +9,21 @@ from app.api.routes import (
     warranties,
     vehicle,
     auth,
+    changes,
+    export,
+    metrics,
 )
-from app.cache import get_cache, init_cache
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.models.user import User
-from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session
+from app.api.routes.auth import oauth2_scheme
+from app.cache import CacheUnavailable, get_cache_or_raise, init_cache
+from app.core.auth import get_user_from_claims
+from app.core.config import settings
+from app.core.middleware import (
+    ETagMiddleware,
+    ReadYourWritesMiddleware,
+    RequestIdMiddleware,
+    add_compression_middleware,
+)
+from app.utils.serializer import FastJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -29,7 +37,11 @@ async def lifespan(app: FastAPI):
     print("Encerrando a API...")
 
 
-app = FastAPI(title="Teste Ford API - Davi Rios", lifespan=lifespan)
+app = FastAPI(
+    title="Teste Ford API - Davi Rios",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 # CORS
 app.add_middleware(
@@ -40,21 +52,41 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir todos os headers
 )
 
-# Definindo OAuth2PasswordBearer para autenticação
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# ID da requisição nos logs de SQL e no cabeçalho X-Request-ID
+app.add_middleware(RequestIdMiddleware)
 
+# Leituras do cliente no primário logo após as suas escritas (réplicas)
+app.add_middleware(ReadYourWritesMiddleware)
 
-# Função para verificar o token e garantir que o usuário está autenticado
-def verify_token(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verifica se a sessão existe no Redis
-    session_key = f"session_{token}"
-    session = get_cache(session_key)
+# ETag/304 para GETs (calculado sobre o corpo sem compressão)
+app.add_middleware(ETagMiddleware)
+
+# Compressão negociada; registrada por último para envolver o ETag
+add_compression_middleware(app)
 
-    if not session:
-        raise HTTPException(status_code=401, detail="Session not found or expired")
 
-    current_user: User = get_current_user(db=db, token=token)
-    if not current_user:
+# Função para verificar o token e garantir que o usuário está autenticado.
+# Não consulta o banco: o usuário vem das claims do JWT (assinatura e
+# expiração validadas) e a sessão, do Redis. Assim uma rota com cache que
+# responde 304 (If-None-Match) não abre nenhuma conexão com o banco
+def verify_token(token: str = Depends(oauth2_scheme)):
+    # Verifica se a sessão existe no Redis
+    session_key = f"session_{token}"
+    try:
+        session = get_cache_or_raise(session_key)
+    except CacheUnavailable:
+        # Redis fora do ar: conforme a política, valida apenas o JWT
+        # (assinatura e expiração) ou recusa até o Redis voltar
+        if settings.SESSION_FALLBACK != "jwt":
+            raise HTTPException(status_code=503, detail="Session store unavailable")
+        session = None
+    else:
+        if not session:
+            raise HTTPException(status_code=401, detail="Session not found or expired")
+
+    current_user = get_user_from_claims(token)
+    # A sessão guarda o nome do usuário que fez o login
+    if session is not None and session != current_user.username:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     return current_user
@@ -94,6 +126,24 @@ app.include_router(
     tags=["warranties"],
     dependencies=[Depends(verify_token)],
 )
+app.include_router(
+    changes.router,
+    prefix="/api",
+    tags=["changes"],
+    dependencies=[Depends(verify_token)],
+)
+app.include_router(
+    export.router,
+    prefix="/api",
+    tags=["export"],
+    dependencies=[Depends(verify_token)],
+)
+app.include_router(
+    metrics.router,
+    prefix="/api",
+    tags=["metrics"],
+    dependencies=[Depends(verify_token)],
+)
 
 
 # Rota personalizada para lidar com erro 404
@@ -1,7 +1,9 @@
+from app.models.changes import ChangeTombstones
 from app.models.locations import DimLocations
 from app.models.parts import DimParts
 from app.models.purchases import DimPurchases
 from app.models.supplier import DimSupplier
+from app.models.supplier_geography import SupplierGeography
 from app.models.vehicle import DimVehicle
 from app.models.warranties import FactWarranties
 from app.models.warranties import FactWarranties
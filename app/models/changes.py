@@ -0,0 +1,28 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, DateTime
+from sqlalchemy.types import UserDefinedType
+from typing import Optional
+from datetime import datetime
+
+
+# Tipo xid8 do Postgres (ID da transação de 64 bits, pg_current_xact_id())
+class XID8(UserDefinedType):
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "xid8"
+
+
+# Registro de exclusão (tombstone) usado pelo feed de alterações
+class ChangeTombstones(SQLModel, table=True):
+    # change_xid (xid8) existe apenas no banco: usado só pelo feed de alterações
+    __table_args__ = {"info": {"unmapped_columns": ["change_xid"]}}
+
+    change_seq: Optional[int] = Field(
+        default=None, sa_type=BigInteger, primary_key=True
+    )
+    table_name: str = Field(max_length=50)
+    row_id: int
+    deleted_at: Optional[datetime] = Field(
+        default=None, sa_type=DateTime(timezone=True)
+    )
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
 from typing import Optional
 import enum
 
@@ -9,8 +10,21 @@ class MarketEnum(str, enum.Enum):
 
 
 class DimLocations(SQLModel, table=True):
+    # change_xid (xid8) existe apenas no banco: usado só pelo feed de alterações
+    __table_args__ = {"info": {"unmapped_columns": ["change_xid"]}}
+
     location_id: Optional[int] = Field(default=None, primary_key=True)
     market: MarketEnum
     country: str = Field(max_length=50)
     province: str = Field(max_length=50)
     city: str = Field(max_length=50)
+    # Preenchido por trigger a cada inserção/atualização (feed de alterações)
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True)
+
+
+# Atualização parcial (PATCH): todos os campos opcionais
+class DimLocationsUpdate(SQLModel):
+    market: Optional[MarketEnum] = None
+    country: Optional[str] = Field(default=None, max_length=50)
+    province: Optional[str] = Field(default=None, max_length=50)
+    city: Optional[str] = Field(default=None, max_length=50)
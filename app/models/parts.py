@@ -1,9 +1,22 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
 from typing import Optional
 
 
 class DimParts(SQLModel, table=True):
+    # change_xid (xid8) existe apenas no banco: usado só pelo feed de alterações
+    __table_args__ = {"info": {"unmapped_columns": ["change_xid"]}}
+
     part_id: Optional[int] = Field(default=None, primary_key=True)
     part_name: str = Field(index=True, max_length=255)
     last_id_purchase: int
     supplier_id: int
+    # Preenchido por trigger a cada inserção/atualização (feed de alterações)
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True)
+
+
+# Atualização parcial (PATCH): todos os campos opcionais
+class DimPartsUpdate(SQLModel):
+    part_name: Optional[str] = Field(default=None, max_length=255)
+    last_id_purchase: Optional[int] = None
+    supplier_id: Optional[int] = None
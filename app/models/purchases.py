@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
 from typing import Optional
 from datetime import date
 import enum
@@ -11,7 +12,19 @@ class PurchaseTypeEnum(str, enum.Enum):
 
 
 class DimPurchases(SQLModel, table=True):
+    # change_xid (xid8) existe apenas no banco: usado só pelo feed de alterações
+    __table_args__ = {"info": {"unmapped_columns": ["change_xid"]}}
+
     purchase_id: Optional[int] = Field(default=None, primary_key=True)
     purchase_type: PurchaseTypeEnum
     purchase_date: date
     part_id: int = Field(foreign_key="dimparts.part_id")
+    # Preenchido por trigger a cada inserção/atualização (feed de alterações)
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True)
+
+
+# Atualização parcial (PATCH): todos os campos opcionais
+class DimPurchasesUpdate(SQLModel):
+    purchase_type: Optional[PurchaseTypeEnum] = None
+    purchase_date: Optional[date] = None
+    part_id: Optional[int] = None
@@ -1,8 +1,20 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
 from typing import Optional
 
 
 class DimSupplier(SQLModel, table=True):
+    # change_xid (xid8) existe apenas no banco: usado só pelo feed de alterações
+    __table_args__ = {"info": {"unmapped_columns": ["change_xid"]}}
+
     supplier_id: Optional[int] = Field(default=None, primary_key=True)
     supplier_name: str = Field(max_length=50)
     location_id: int = Field(foreign_key="dimlocations.location_id")
+    # Preenchido por trigger a cada inserção/atualização (feed de alterações)
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True)
+
+
+# Atualização parcial (PATCH): todos os campos opcionais
+class DimSupplierUpdate(SQLModel):
+    supplier_name: Optional[str] = Field(default=None, max_length=50)
+    location_id: Optional[int] = None
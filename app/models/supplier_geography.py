@@ -0,0 +1,27 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import registry
+from typing import Optional
+from app.models.locations import MarketEnum
+
+
+# Base das projeções (materialized views): metadata própria, fora do
+# SQLModel.metadata usado pelo create_all e pelo autogenerate do Alembic
+class ViewModel(SQLModel, registry=registry()):
+    pass
+
+
+# Projeção somente leitura de suppliers com a geografia da localização
+# (materialized view mantida pela migração 9c41e5b2d7a8 e atualizada após
+# escritas em suppliers/locations)
+class SupplierGeography(ViewModel, table=True):
+    __tablename__ = "suppliergeography"
+
+    supplier_id: int = Field(primary_key=True)
+    supplier_name: str = Field(max_length=50)
+    location_id: int
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger)
+    market: MarketEnum
+    country: str = Field(max_length=50)
+    province: str = Field(max_length=50)
+    city: str = Field(max_length=50)
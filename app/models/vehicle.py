@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
 from typing import Optional
 from datetime import date
 from enum import Enum
@@ -14,8 +15,21 @@ class PropulsionType(str, Enum):
 
 # Modelo DimVehicle com ENUM
 class DimVehicle(SQLModel, table=True):
+    # change_xid (xid8) existe apenas no banco: usado só pelo feed de alterações
+    __table_args__ = {"info": {"unmapped_columns": ["change_xid"]}}
+
     vehicle_id: Optional[int] = Field(default=None, primary_key=True)
     model: str = Field(index=True, max_length=255)
-    prod_date: date
+    prod_date: date = Field(index=True)
     year: int
     propulsion: PropulsionType
+    # Preenchido por trigger a cada inserção/atualização (feed de alterações)
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True)
+
+
+# Atualização parcial (PATCH): todos os campos opcionais
+class DimVehicleUpdate(SQLModel):
+    model: Optional[str] = Field(default=None, max_length=255)
+    prod_date: Optional[date] = None
+    year: Optional[int] = None
+    propulsion: Optional[PropulsionType] = None
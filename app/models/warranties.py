@@ -1,9 +1,18 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger
 from typing import Optional
 from datetime import date
 
 
+# No banco a tabela é particionada por ano de repair_date e a chave primária é
+# (claim_key, repair_date); claim_key continua sendo a chave usada pela API e a
+# unicidade entre as partições é garantida por triggers (tabela
+# factwarranties_claim_keys). As colunas search_vector (tsvector gerado a partir de
+# client_complaint e tech_comment, com índice GIN) e change_xid (feed de
+# alterações) existem apenas no banco
 class FactWarranties(SQLModel, table=True):
+    __table_args__ = {"info": {"unmapped_columns": ["search_vector", "change_xid"]}}
+
     claim_key: Optional[int] = Field(default=None, primary_key=True)
     vehicle_id: int = Field(foreign_key="dimvehicle.vehicle_id")
     repair_date: date
@@ -13,3 +22,17 @@ class FactWarranties(SQLModel, table=True):
     classified_issue: Optional[str] = Field(default=None, max_length=50)
     location_id: int = Field(foreign_key="dimlocations.location_id")
     purchase_id: int = Field(foreign_key="dimpurchases.purchase_id")
+    # Preenchido por trigger a cada inserção/atualização (feed de alterações)
+    change_seq: Optional[int] = Field(default=None, sa_type=BigInteger, index=True)
+
+
+# Atualização parcial (PATCH): todos os campos opcionais
+class FactWarrantiesUpdate(SQLModel):
+    vehicle_id: Optional[int] = None
+    repair_date: Optional[date] = None
+    client_complaint: Optional[str] = Field(default=None, max_length=65535)
+    tech_comment: Optional[str] = Field(default=None, max_length=65535)
+    part_id: Optional[int] = None
+    classified_issue: Optional[str] = Field(default=None, max_length=50)
+    location_id: Optional[int] = None
+    purchase_id: Optional[int] = None
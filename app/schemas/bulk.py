@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field, create_model, model_validator
+from sqlmodel import SQLModel
+from typing import Any, Dict, List, Optional, Type
+from datetime import date
+
+
+# Mesmos critérios das rotas by-date-range, by-part, by-location e by-vehicle
+class WarrantyFilter(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    part_id: Optional[int] = None
+    location_id: Optional[int] = None
+    vehicle_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # Evita atualizar/excluir a tabela inteira por engano
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("filter must have at least one criterion")
+        return self
+
+
+# Seleção por lista de IDs ou por filtro (exatamente um dos dois)
+class BulkSelection(BaseModel):
+    ids: Optional[List[int]] = Field(default=None, min_length=1)
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either 'ids' or 'filter'")
+        return self
+
+
+class BulkDeleteRequest(BulkSelection):
+    # Igualdade por coluna, ex: {"supplier_id": 3}
+    filter: Optional[Dict[str, Any]] = Field(default=None, min_length=1)
+
+
+class WarrantyBulkDeleteRequest(BulkSelection):
+    filter: Optional[WarrantyFilter] = None
+
+
+# Exige ao menos uma coluna em "values"
+@model_validator(mode="after")
+def _check_values(self):
+    if not self.values.model_dump(exclude_unset=True):
+        raise ValueError("values must have at least one field")
+    return self
+
+
+# Corpo do PATCH /bulk: a mesma seleção do DELETE /bulk mais os valores novos
+def bulk_update_request(
+    selection: Type[BulkSelection], update_model: Type[SQLModel]
+) -> Type[BulkSelection]:
+    return create_model(
+        f"{update_model.__name__}BulkRequest",
+        __base__=selection,
+        __validators__={"check_values": _check_values},
+        values=(update_model, ...),
+    )
@@ -0,0 +1,140 @@
+from sqlalchemy import BigInteger, Text, cast, literal, literal_column, tuple_
+from sqlalchemy.sql import func
+from sqlmodel import Session, select
+from typing import List, Optional, Tuple
+from app.models.changes import ChangeTombstones, XID8
+from app.models.locations import DimLocations
+from app.models.parts import DimParts
+from app.models.purchases import DimPurchases
+from app.models.supplier import DimSupplier
+from app.models.vehicle import DimVehicle
+from app.models.warranties import FactWarranties
+
+# Tabelas com change_seq, indexadas pelo nome da tabela no banco
+TRACKED_MODELS = {
+    model.__tablename__: model
+    for model in (
+        DimLocations,
+        DimSupplier,
+        DimParts,
+        DimPurchases,
+        DimVehicle,
+        FactWarranties,
+    )
+}
+
+
+# Posição no feed: (ID da transação, change_seq) da última alteração lida
+Cursor = Tuple[int, int]
+
+
+# Converte o token opaco do cliente ("xid:seq") na posição do feed. Tokens
+# antigos (apenas o change_seq) não têm a transação e recomeçam do início
+def parse_token(since: Optional[str]) -> Cursor:
+    if not since:
+        return (0, 0)
+    if ":" not in since:
+        int(since)
+        return (0, 0)
+    xid, seq = since.split(":")
+    return (int(xid), int(seq))
+
+
+def format_token(cursor: Cursor) -> str:
+    return f"{cursor[0]}:{cursor[1]}"
+
+
+# Coluna change_xid (fora dos modelos) da tabela do modelo
+def change_xid(model):
+    return literal_column(f"{model.__tablename__}.change_xid", XID8)
+
+
+# Transações abaixo deste ID já terminaram: nenhuma linha nova pode surgir
+# antes dele. Linhas de transações a partir dele (mesmo já confirmadas)
+# ficam para as próximas leituras
+def _horizon():
+    return func.pg_snapshot_xmin(func.pg_current_snapshot())
+
+
+# Filtros e colunas comuns às tabelas e aos tombstones
+def _window(model, since: Cursor):
+    xid = change_xid(model)
+    xid_value = cast(cast(xid, Text), BigInteger).label("change_xid")
+    filters = [
+        xid < _horizon(),
+        tuple_(xid, model.change_seq)
+        > tuple_(cast(literal(str(since[0])), XID8), since[1]),
+    ]
+    return xid_value, filters, (xid, model.change_seq)
+
+
+# Token que aponta para o estado atual: quem carregou a tabela inteira depois
+# de obtê-lo continua o feed a partir dele sem perder alterações (as linhas
+# já lidas podem ser entregues de novo, o que é inofensivo)
+def current_token(db: Session) -> str:
+    horizon = db.exec(select(cast(cast(_horizon(), Text), BigInteger))).one()
+    return format_token((horizon, 0))
+
+
+# Lista as alterações (upserts e exclusões) depois da posição informada, na
+# ordem (transação, change_seq). Uma transação longa em andamento segura o
+# feed até terminar, mas nenhuma alteração é pulada
+def get_changes(
+    db: Session, since: Cursor, limit: int, tables: Optional[List[str]] = None
+) -> dict:
+    tables = tables or list(TRACKED_MODELS)
+    changes = []
+
+    # Cada tabela contribui com no máximo "limit" linhas; após a junção
+    # ordenada, os "limit" primeiros são exatamente os menores cursores
+    for table in tables:
+        model = TRACKED_MODELS[table]
+        primary_key = model.__table__.primary_key.columns.keys()[0]
+        xid, filters, order = _window(model, since)
+        rows = db.exec(
+            select(model, xid).where(*filters).order_by(*order).limit(limit)
+        ).all()
+        changes.extend(
+            (
+                (row_xid, row.change_seq),
+                {
+                    "seq": row.change_seq,
+                    "table": table,
+                    "op": "upsert",
+                    "id": getattr(row, primary_key),
+                    "data": row,
+                },
+            )
+            for row, row_xid in rows
+        )
+
+    xid, filters, order = _window(ChangeTombstones, since)
+    tombstones = db.exec(
+        select(ChangeTombstones, xid)
+        .where(*filters, ChangeTombstones.table_name.in_(tables))
+        .order_by(*order)
+        .limit(limit)
+    ).all()
+    changes.extend(
+        (
+            (tombstone_xid, tombstone.change_seq),
+            {
+                "seq": tombstone.change_seq,
+                "table": tombstone.table_name,
+                "op": "delete",
+                "id": tombstone.row_id,
+                "data": None,
+            },
+        )
+        for tombstone, tombstone_xid in tombstones
+    )
+
+    changes.sort(key=lambda change: change[0])
+    changes = changes[:limit]
+    next_cursor = changes[-1][0] if changes else since
+
+    return {
+        "changes": [change for _, change in changes],
+        "next_token": format_token(next_cursor),
+        "has_more": len(changes) == limit,
+    }
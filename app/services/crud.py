@@ -0,0 +1,204 @@
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, delete, select, update
+from typing import Generic, Iterator, List, Optional, Type, TypeVar
+from app.core.config import settings
+from app.utils.fields import fetch_fields, lambda_select
+
+ModelType = TypeVar("ModelType", bound=SQLModel)
+
+# Colunas que nunca são alteradas pelo cliente
+PROTECTED_COLUMNS = {"change_seq"}
+
+
+# Repositório genérico: todas as operações de CRUD implementadas uma única vez
+# e parametrizadas pelo modelo SQLModel
+class CRUDRepository(Generic[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        update_model: Type[SQLModel],
+        name: str,
+        plural: str,
+    ):
+        self.model = model
+        self.update_model = update_model
+        # Nome usado nas mensagens ("Vehicle not found") e nas chaves de cache
+        self.name = name
+        self.plural = plural
+        self.primary_key = list(model.__table__.primary_key.columns)[0]
+
+    # Inserção em massa
+    def create_many(self, session: Session, records: List[ModelType]) -> None:
+        session.bulk_save_objects(records)
+        session.commit()
+
+    # Criar um único registro
+    def create(self, session: Session, record: ModelType) -> ModelType:
+        session.add(record)
+        session.commit()
+        session.refresh(record)
+        return record
+
+    # Recuperar um único registro por ID
+    def get(self, session: Session, record_id: int) -> Optional[ModelType]:
+        return session.get(self.model, record_id)
+
+    # Recuperação paginada (offset ou keyset com "after"), com projeção opcional
+    def list(
+        self,
+        session: Session,
+        skip: int = 0,
+        limit: int = settings.DEFAULT_PAGE_SIZE,
+        columns: Optional[List[str]] = None,
+        after: Optional[int] = None,
+    ) -> list:
+        primary_key = self.primary_key
+        stmt = lambda_select(self.model, columns)
+        if after is not None:
+            # Keyset: usa o índice da chave primária em vez de pular linhas
+            stmt += lambda s: s.where(primary_key > after)
+        else:
+            stmt += lambda s: s.offset(skip)
+        stmt += lambda s: s.order_by(primary_key).limit(limit)
+        return fetch_fields(session, stmt, columns)
+
+    # Valida e filtra as colunas enviadas para um UPDATE
+    def update_values(self, data: SQLModel) -> dict:
+        # Modelos com table=True não validam o corpo da requisição; o modelo de
+        # atualização converte os valores (datas, enums) antes do UPDATE
+        try:
+            changes = self.update_model.model_validate(
+                data.model_dump(exclude_unset=True, warnings=False)
+            )
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        return {
+            key: value
+            for key, value in changes.model_dump(exclude_unset=True).items()
+            if key != self.primary_key.name and key not in PROTECTED_COLUMNS
+        }
+
+    # Atualiza um registro com um único UPDATE ... RETURNING (sem get + refresh)
+    def update(
+        self, session: Session, record_id: int, data: SQLModel
+    ) -> Optional[ModelType]:
+        values = self.update_values(data)
+        if not values:
+            # Nada a alterar: apenas confirma a existência do registro
+            return session.get(self.model, record_id)
+
+        stmt = (
+            update(self.model)
+            .where(self.primary_key == record_id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        record = session.scalars(stmt).first()
+        if record is None:
+            session.rollback()
+            return None
+
+        session.commit()
+        return record
+
+    # Exclui um registro com um único DELETE ... RETURNING (sem get prévio)
+    def delete(self, session: Session, record_id: int) -> bool:
+        stmt = (
+            delete(self.model)
+            .where(self.primary_key == record_id)
+            .returning(self.primary_key)
+        )
+        deleted_id = session.scalars(stmt).first()
+        if deleted_id is None:
+            session.rollback()
+            return False
+
+        session.commit()
+        return True
+
+    # Percorre os IDs afetados em blocos (lista explícita ou keyset sobre o filtro)
+    def _id_chunks(
+        self,
+        session: Session,
+        ids: Optional[List[int]],
+        filters: list,
+        chunk_size: int,
+    ) -> Iterator[List[int]]:
+        if ids is not None:
+            ids = sorted(set(ids))
+            for start in range(0, len(ids), chunk_size):
+                yield ids[start : start + chunk_size]
+            return
+
+        last_id = None
+        while True:
+            stmt = select(self.primary_key).where(*filters)
+            if last_id is not None:
+                stmt = stmt.where(self.primary_key > last_id)
+            chunk = session.exec(
+                stmt.order_by(self.primary_key).limit(chunk_size)
+            ).all()
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1]
+
+    # Atualiza vários registros em blocos, com um commit por bloco
+    def update_many(
+        self,
+        session: Session,
+        data: SQLModel,
+        ids: Optional[List[int]] = None,
+        filters: Optional[list] = None,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        values = self.update_values(data)
+        filters = filters or []
+        updated = 0
+        for chunk in self._id_chunks(
+            session, ids, filters, chunk_size or settings.BULK_CHUNK_SIZE
+        ):
+            _set_lock_timeout(session)
+            result = session.exec(
+                update(self.model)
+                .where(self.primary_key.in_(chunk), *filters)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+            session.commit()
+        return updated
+
+    # Exclui vários registros em blocos, com um commit por bloco
+    def delete_many(
+        self,
+        session: Session,
+        ids: Optional[List[int]] = None,
+        filters: Optional[list] = None,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        filters = filters or []
+        deleted = 0
+        for chunk in self._id_chunks(
+            session, ids, filters, chunk_size or settings.BULK_CHUNK_SIZE
+        ):
+            _set_lock_timeout(session)
+            result = session.exec(
+                delete(self.model)
+                .where(self.primary_key.in_(chunk), *filters)
+                .execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount
+            session.commit()
+        return deleted
+
+
+# Limita o tempo de espera por locks de cada bloco (apenas PostgreSQL)
+def _set_lock_timeout(session: Session):
+    if session.get_bind().dialect.name == "postgresql":
+        session.exec(
+            text(f"SET LOCAL lock_timeout = {int(settings.BULK_LOCK_TIMEOUT_MS)}")
+        )
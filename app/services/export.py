@@ -0,0 +1,181 @@
+import enum
+import io
+from typing import BinaryIO, Iterator, Optional, Type
+from sqlalchemy import Date, Enum, Integer, select
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+from app.models.locations import DimLocations
+from app.models.parts import DimParts
+from app.models.purchases import DimPurchases
+from app.models.supplier import DimSupplier
+from app.models.vehicle import DimVehicle
+from app.models.warranties import FactWarranties
+
+
+# Tabelas do esquema estrela disponíveis para exportação
+class ExportTable(str, enum.Enum):
+    WARRANTIES = "warranties"
+    VEHICLES = "vehicles"
+    PARTS = "parts"
+    PURCHASES = "purchases"
+    LOCATIONS = "locations"
+    SUPPLIERS = "suppliers"
+
+
+class ExportFormat(str, enum.Enum):
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+EXPORT_MODELS = {
+    ExportTable.WARRANTIES: FactWarranties,
+    ExportTable.VEHICLES: DimVehicle,
+    ExportTable.PARTS: DimParts,
+    ExportTable.PURCHASES: DimPurchases,
+    ExportTable.LOCATIONS: DimLocations,
+    ExportTable.SUPPLIERS: DimSupplier,
+}
+
+MEDIA_TYPES = {
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+FILE_EXTENSIONS = {
+    ExportFormat.ARROW: "arrows",
+    ExportFormat.PARQUET: "parquet",
+}
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+# Converte o tipo da coluna SQL para o tipo Arrow equivalente
+def _arrow_type(column):
+    import pyarrow as pa
+
+    if isinstance(column.type, Enum):
+        return pa.dictionary(pa.int8(), pa.string())
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+# Monta o schema Arrow a partir da tabela do modelo
+def arrow_schema(model: Type[SQLModel]):
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            pa.field(column.name, _arrow_type(column), nullable=column.nullable)
+            for column in model.__table__.columns
+        ]
+    )
+
+
+# Lê a tabela em blocos via cursor no servidor e gera RecordBatches
+def iter_record_batches(
+    connection: Connection,
+    model: Type[SQLModel],
+    filters: Optional[list] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    import pyarrow as pa
+
+    schema = arrow_schema(model)
+    table = model.__table__
+    primary_key = list(table.primary_key.columns)
+    stmt = select(*table.columns).where(*(filters or [])).order_by(*primary_key)
+
+    result = connection.execution_options(
+        stream_results=True, yield_per=chunk_size
+    ).execute(stmt)
+
+    enum_columns = {
+        index
+        for index, column in enumerate(table.columns)
+        if isinstance(column.type, Enum)
+    }
+
+    for rows in result.partitions():
+        columns = list(zip(*rows))
+        arrays = []
+        for index, field in enumerate(schema):
+            values = columns[index]
+            if index in enum_columns:
+                # O SQLAlchemy devolve membros do Enum; exporta o valor
+                values = [
+                    value.value if value is not None else None for value in values
+                ]
+                arrays.append(
+                    pa.array(values, type=pa.string())
+                    .dictionary_encode()
+                    .cast(field.type)
+                )
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+# Cria o writer Arrow IPC (stream) ou Parquet sobre o arquivo de saída
+def _open_writer(sink, schema, export_format: ExportFormat):
+    import pyarrow as pa
+
+    if export_format == ExportFormat.PARQUET:
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+# Escreve a exportação completa em um arquivo (usado pela CLI)
+def export_to_file(
+    connection: Connection,
+    model: Type[SQLModel],
+    output: BinaryIO,
+    export_format: ExportFormat,
+    filters: Optional[list] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    import pyarrow as pa
+
+    total_rows = 0
+    with _open_writer(
+        pa.PythonFile(output, mode="w"), arrow_schema(model), export_format
+    ) as writer:
+        for batch in iter_record_batches(connection, model, filters, chunk_size):
+            writer.write_batch(batch)
+            total_rows += batch.num_rows
+    return total_rows
+
+
+# Gera os bytes da exportação bloco a bloco (usado pelo StreamingResponse)
+def export_stream(
+    connection: Connection,
+    model: Type[SQLModel],
+    export_format: ExportFormat,
+    filters: Optional[list] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    buffer = io.BytesIO()
+    writer = _open_writer(
+        pa.PythonFile(buffer, mode="w"), arrow_schema(model), export_format
+    )
+    try:
+        for batch in iter_record_batches(connection, model, filters, chunk_size):
+            writer.write_batch(batch)
+            yield _drain(buffer)
+    finally:
+        writer.close()
+    yield _drain(buffer)
+
+
+# Retorna o que já foi escrito no buffer e o esvazia
+def _drain(buffer: io.BytesIO) -> bytes:
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
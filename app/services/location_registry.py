@@ -0,0 +1,225 @@
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlmodel import Session, select
+from app.cache import on_table_change
+from app.core.config import settings
+from app.core.database import get_engine
+from app.models.locations import DimLocations, MarketEnum
+from app.services.changes import current_token, get_changes, parse_token
+from app.utils.debounce import DebouncedTask
+
+# Linhas lidas do feed de alterações por consulta na atualização incremental
+CHANGES_BATCH_SIZE = 1000
+
+# Mercados guardados como código de 1 byte
+MARKETS = list(MarketEnum)
+MARKET_CODES = {market: code for code, market in enumerate(MARKETS)}
+
+
+# Respostas pré-calculadas das rotas de locations. É imutável: cada
+# atualização monta um novo índice e troca a referência de uma só vez
+class LocationIndex(NamedTuple):
+    # país -> cidades em ordem de location_id (com repetições)
+    cities_by_country: Dict[str, Tuple[str, ...]]
+    # país -> províncias distintas em ordem alfabética
+    provinces_by_country: Dict[str, Tuple[str, ...]]
+    # (país, província) -> cidades distintas em ordem alfabética
+    cities_by_province: Dict[Tuple[str, str], Tuple[str, ...]]
+    count_by_country: Dict[str, int]
+    count_by_market: Dict[str, int]
+    unique_cities_by_country: Dict[str, int]
+    count_provinces_by_country: Dict[str, int]
+
+
+# DimLocations inteira na memória do processo: uma coluna por array (IDs e
+# mercados em arrays numéricos, textos internados e compartilhados entre as
+# linhas repetidas) e os índices por país, província e mercado já montados.
+# A carga completa acontece uma vez; depois só as linhas alteradas (feed de
+# alterações: change_xid/change_seq e tombstones) são lidas quando a tabela
+# muda neste ou em outro processo
+class LocationRegistry:
+    def __init__(self, reload_seconds: float, refresh_delay: float):
+        self.reload_seconds = reload_seconds
+        self._ids = array("q")
+        self._markets = array("B")
+        self._countries: List[str] = []
+        self._provinces: List[str] = []
+        self._cities: List[str] = []
+        # location_id -> posição nos arrays
+        self._positions: Dict[int, int] = {}
+        self._watermark = (0, 0)
+        self._loaded_at: Optional[float] = None
+        self._index: Optional[LocationIndex] = None
+        self._stale = True
+        self._lock = threading.Lock()
+        # Uma única atualização em segundo plano por vez, agrupando as
+        # alterações próximas
+        self.refresh_task = DebouncedTask(refresh_delay, self.refresh)
+
+    # Chamado a cada alteração em dimlocations
+    def mark_stale(self):
+        self._stale = True
+        self.refresh_task.trigger()
+
+    # Recarga completa periódica como rede de segurança (ex: mensagens de
+    # pub/sub perdidas)
+    def _expired(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.reload_seconds
+        )
+
+    def _needs_refresh(self) -> bool:
+        return self._index is None or self._stale or self._expired()
+
+    # Índice atual. Só a primeira carga acontece na requisição; depois, se a
+    # tabela mudou, a versão anterior é servida enquanto a atualização roda em
+    # segundo plano
+    def index(self) -> LocationIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._refresh()
+        elif self._needs_refresh():
+            self.refresh_task.trigger()
+        return self._index
+
+    # Atualiza o índice se a tabela mudou. Se o banco falhar, continua servindo
+    # a última versão carregada
+    def refresh(self):
+        with self._lock:
+            if not self._needs_refresh():
+                return
+            try:
+                self._refresh()
+            except Exception as e:
+                self._stale = True  # tentado de novo na próxima leitura
+                print(f"Falha ao atualizar o registro de locations: {e}")
+
+    def _refresh(self):
+        # Limpa antes de ler: uma alteração durante a leitura marca de novo
+        self._stale = False
+        with Session(get_engine()) as session:
+            if self._expired():
+                self._load(session)
+            else:
+                self._apply_changes(session)
+        self._index = self._build_index()
+
+    def _load(self, session: Session):
+        # Posição do feed obtida antes da leitura: o que mudar durante a carga
+        # é entregue de novo na próxima atualização
+        self._watermark = parse_token(current_token(session))
+        self._ids = array("q")
+        self._markets = array("B")
+        self._countries, self._provinces, self._cities = [], [], []
+        self._positions = {}
+        for row in session.exec(select(DimLocations)).all():
+            self._upsert(row)
+        self._loaded_at = time.monotonic()
+
+    def _apply_changes(self, session: Session):
+        while True:
+            page = get_changes(
+                session,
+                self._watermark,
+                CHANGES_BATCH_SIZE,
+                [DimLocations.__tablename__],
+            )
+            for change in page["changes"]:
+                if change["op"] == "upsert":
+                    self._upsert(change["data"])
+                else:
+                    self._delete(change["id"])
+            self._watermark = parse_token(page["next_token"])
+            if not page["has_more"]:
+                return
+
+    def _upsert(self, row: DimLocations):
+        values = (
+            MARKET_CODES[MarketEnum(row.market)],
+            sys.intern(row.country),
+            sys.intern(row.province),
+            sys.intern(row.city),
+        )
+        position = self._positions.get(row.location_id)
+        if position is None:
+            self._positions[row.location_id] = len(self._ids)
+            self._ids.append(row.location_id)
+            self._markets.append(values[0])
+            self._countries.append(values[1])
+            self._provinces.append(values[2])
+            self._cities.append(values[3])
+            return
+        self._markets[position] = values[0]
+        self._countries[position] = values[1]
+        self._provinces[position] = values[2]
+        self._cities[position] = values[3]
+
+    # Move a última linha para a posição removida (arrays sem buracos)
+    def _delete(self, location_id: int):
+        position = self._positions.pop(location_id, None)
+        if position is None:
+            return
+        last = len(self._ids) - 1
+        if position != last:
+            self._positions[self._ids[last]] = position
+        for column in self._columns():
+            column[position] = column[last]
+            column.pop()
+
+    def _columns(self):
+        return (
+            self._ids,
+            self._markets,
+            self._countries,
+            self._provinces,
+            self._cities,
+        )
+
+    def _build_index(self) -> LocationIndex:
+        by_country = defaultdict(list)
+        provinces = defaultdict(set)
+        cities = defaultdict(set)
+        markets = Counter()
+        for position in sorted(range(len(self._ids)), key=self._ids.__getitem__):
+            country = self._countries[position]
+            province = self._provinces[position]
+            city = self._cities[position]
+            by_country[country].append(city)
+            provinces[country].add(province)
+            cities[(country, province)].add(city)
+            markets[MARKETS[self._markets[position]].value] += 1
+
+        return LocationIndex(
+            cities_by_country={
+                country: tuple(values) for country, values in by_country.items()
+            },
+            provinces_by_country={
+                country: tuple(sorted(values)) for country, values in provinces.items()
+            },
+            cities_by_province={
+                key: tuple(sorted(values)) for key, values in cities.items()
+            },
+            count_by_country={
+                country: len(values) for country, values in by_country.items()
+            },
+            count_by_market=dict(markets),
+            unique_cities_by_country={
+                country: len(set(values)) for country, values in by_country.items()
+            },
+            count_provinces_by_country={
+                country: len(values) for country, values in provinces.items()
+            },
+        )
+
+
+location_registry = LocationRegistry(
+    settings.LOCATION_REGISTRY_RELOAD_SECONDS,
+    settings.LOCATION_REGISTRY_REFRESH_SECONDS,
+)
+on_table_change(DimLocations.__tablename__, location_registry.mark_stale)
@@ -0,0 +1,138 @@
+from datetime import date
+from typing import List
+from sqlalchemy import Connection, text
+from app.models.warranties import FactWarranties
+from app.services.export import ExportFormat, export_to_file
+from app.services.warranties import warranty_filters
+
+# Tabela particionada por ano de repair_date (ver a migração 173469617db3)
+PARTITIONED_TABLE = FactWarranties.__tablename__
+ARCHIVE_SCHEMA = "archive"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+# claim_keys em uso (unicidade entre as partições, ver a migração d3f7a2b9c5e1)
+CLAIM_KEYS_TABLE = f"{PARTITIONED_TABLE}_claim_keys"
+
+
+def partition_name(year: int) -> str:
+    return f"{PARTITIONED_TABLE}_y{year}"
+
+
+# Anos com partição anexada à tabela
+def partition_years(connection: Connection) -> List[int]:
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": PARTITIONED_TABLE},
+    ).scalars()
+    prefix = f"{PARTITIONED_TABLE}_y"
+    return sorted(
+        int(name[len(prefix) :])
+        for name in names
+        if name.startswith(prefix) and name[len(prefix) :].isdigit()
+    )
+
+
+# Colunas da tabela que aceitam valores no INSERT (exceto as geradas)
+def _stored_columns(connection: Connection) -> List[str]:
+    return (
+        connection.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :table "
+                "AND is_generated = 'NEVER' ORDER BY ordinal_position"
+            ),
+            {"table": PARTITIONED_TABLE},
+        )
+        .scalars()
+        .all()
+    )
+
+
+# Cria a partição do ano. Linhas do ano que caíram na partição default (datas
+# além das partições existentes) impediriam o CREATE: a default é desanexada,
+# a partição criada, as linhas movidas para ela e a default anexada de novo
+def _create_partition(connection: Connection, year: int):
+    bounds = {"start": date(year, 1, 1), "end": date(year + 1, 1, 1)}
+    in_year = "repair_date >= :start AND repair_date < :end"
+    has_default_rows = connection.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_year})"),
+        bounds,
+    ).scalar()
+    if has_default_rows:
+        connection.execute(
+            text(
+                f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"
+            )
+        )
+
+    connection.execute(
+        text(
+            f"CREATE TABLE {partition_name(year)} PARTITION OF {PARTITIONED_TABLE} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    )
+
+    if has_default_rows:
+        # Com a default desanexada o DELETE não dispara os triggers: os
+        # claim_keys são liberados aqui e reservados de novo pelo INSERT na
+        # tabela principal, que também entrega as linhas no feed de alterações.
+        # Colunas geradas (search_vector) são recalculadas pelo Postgres
+        columns = ", ".join(_stored_columns(connection))
+        connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_year} "
+                f"RETURNING {columns}), "
+                f"released AS (DELETE FROM {CLAIM_KEYS_TABLE} "
+                "WHERE claim_key IN (SELECT claim_key FROM moved)) "
+                f"INSERT INTO {PARTITIONED_TABLE} ({columns}) "
+                f"SELECT {columns} FROM moved"
+            ),
+            bounds,
+        )
+        connection.execute(
+            text(
+                f"ALTER TABLE {PARTITIONED_TABLE} "
+                f"ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"
+            )
+        )
+
+
+# Cria as partições dos anos seguintes ao último existente até "through_year".
+# Anos anteriores ausentes foram arquivados e não são recriados
+def create_partitions(connection: Connection, through_year: int) -> List[str]:
+    years = partition_years(connection)
+    first_year = years[-1] + 1 if years else date.today().year
+    created = []
+    for year in range(first_year, through_year + 1):
+        _create_partition(connection, year)
+        created.append(partition_name(year))
+    return created
+
+
+# Exporta o ano em Parquet e desanexa a partição. Sem "drop" a tabela é movida
+# para o esquema "archive"; com "drop" é removida. As linhas saem sem tombstones
+# (o feed de alterações não as trata como exclusões)
+def archive_year(
+    connection: Connection, year: int, output_dir: str, drop: bool = False
+) -> int:
+    name = partition_name(year)
+    if year not in partition_years(connection):
+        raise ValueError(f"Partition {name} not found")
+
+    filters = warranty_filters(date(year, 1, 1), date(year, 12, 31))
+    with open(f"{output_dir}/{name}.parquet", "wb") as output:
+        total_rows = export_to_file(
+            connection, FactWarranties, output, ExportFormat.PARQUET, filters
+        )
+
+    connection.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+    if drop:
+        connection.execute(text(f"DROP TABLE {name}"))
+    else:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+    return total_rows
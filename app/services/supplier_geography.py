@@ -0,0 +1,68 @@
+from sqlalchemy import text
+from app.cache import (
+    CacheUnavailable,
+    invalidate_tables,
+    on_table_change,
+    pop_flag,
+    set_flag,
+)
+from app.core.config import settings
+from app.core.database import get_engine
+from app.models.locations import DimLocations
+from app.models.supplier import DimSupplier
+from app.models.supplier_geography import SupplierGeography
+from app.utils.debounce import DebouncedTask
+
+# Colunas de DimSupplier servidas a partir da projeção
+SUPPLIER_COLUMNS = ["supplier_id", "supplier_name", "location_id", "change_seq"]
+
+# Flag no Redis: a projeção está desatualizada
+DIRTY_FLAG = f"dirty:{SupplierGeography.__tablename__}"
+
+
+# Recalcula a projeção sem bloquear as leituras (CONCURRENTLY) e só então
+# descarta as respostas em cache que dependem dela
+def refresh_supplier_geography(concurrently: bool = True) -> bool:
+    mode = "CONCURRENTLY " if concurrently else ""
+    try:
+        with get_engine().begin() as connection:
+            connection.execute(
+                text(
+                    f"REFRESH MATERIALIZED VIEW {mode}{SupplierGeography.__tablename__}"
+                )
+            )
+    except Exception as e:
+        print(f"Falha ao atualizar {SupplierGeography.__tablename__}: {e}")
+        return False
+    invalidate_tables(SupplierGeography.__tablename__)
+    return True
+
+
+# Gancho das escritas em suppliers/locations: marca a projeção como
+# desatualizada antes do aviso de alteração da tabela
+def mark_dirty():
+    try:
+        set_flag(DIRTY_FLAG)
+    except CacheUnavailable:
+        pass
+
+
+# Todos os processos recebem o aviso e agendam o refresh; apenas o que remove
+# a flag o executa, então ele acontece mesmo se o processo que escreveu parar.
+# Sem o Redis não há como combinar entre os processos e o refresh é feito
+def refresh_if_dirty():
+    try:
+        if not pop_flag(DIRTY_FLAG):
+            return
+    except CacheUnavailable:
+        pass
+    if not refresh_supplier_geography():
+        mark_dirty()  # tentado de novo na próxima alteração
+
+
+# Alterações próximas geram um único refresh após alguns segundos
+refresh_task = DebouncedTask(
+    settings.SUPPLIER_GEOGRAPHY_REFRESH_SECONDS, refresh_if_dirty
+)
+for table in (DimSupplier.__tablename__, DimLocations.__tablename__):
+    on_table_change(table, refresh_task.trigger)
@@ -1,54 +1,64 @@
+from datetime import date
+from typing import Dict, List
+from sqlalchemy import Date, cast
+from sqlalchemy.sql import func
 from sqlmodel import Session, select
-from app.models.vehicle import DimVehicle
-from typing import List, Optional
+from app.models.vehicle import DimVehicle, DimVehicleUpdate, PropulsionType
+from app.services.crud import CRUDRepository
+from app.utils.timeseries import Granularity, bucket_series, date_bucket
 
+# CRUD, paginação, RETURNING e operações em massa de vehicles
+repository = CRUDRepository(
+    DimVehicle, DimVehicleUpdate, name="Vehicle", plural="vehicles"
+)
 
-# Inserção em massa
-def create_vehicles(session: Session, vehicles: List[DimVehicle]) -> None:
-    session.bulk_save_objects(vehicles)
-    session.commit()
 
+# Série temporal de vehicles por data de produção em uma única consulta: os
+# intervalos vêm do generate_series (sem lacunas) e as contagens de um GROUP BY
+# sobre o intervalo de prod_date (filtro que usa o índice da coluna)
+def vehicle_timeseries(
+    session: Session,
+    start_date: date,
+    end_date: date,
+    granularity: Granularity,
+    by_propulsion: bool = False,
+) -> List[dict]:
+    bucket = date_bucket(DimVehicle.prod_date, granularity).label("bucket")
+    groups = [bucket, DimVehicle.propulsion] if by_propulsion else [bucket]
+    counts = (
+        select(*groups, func.count().label("total"))
+        .where(DimVehicle.prod_date >= start_date, DimVehicle.prod_date <= end_date)
+        .group_by(*groups)
+        .subquery("counts")
+    )
+    series = bucket_series(start_date, end_date, granularity)
+    series_bucket = cast(series.c.bucket, Date)
+    columns = [series_bucket, func.coalesce(counts.c.total, 0)]
+    if by_propulsion:
+        columns.append(counts.c.propulsion)
+    stmt = (
+        select(*columns)
+        .select_from(series.outerjoin(counts, counts.c.bucket == series_bucket))
+        .order_by(series_bucket)
+    )
+    rows = session.exec(stmt).all()
 
-# Recuperação em massa com paginação
-def get_vehicles(session: Session, chunk_size: int = 1000) -> List[DimVehicle]:
-    return session.exec(select(DimVehicle).limit(chunk_size)).all()
+    if not by_propulsion:
+        return [{"bucket": row[0], "count": row[1]} for row in rows]
 
-
-# Criar um único registro
-def create_vehicle(session: Session, vehicle: DimVehicle) -> DimVehicle:
-    session.add(vehicle)
-    session.commit()
-    session.refresh(vehicle)
-    return vehicle
-
-
-# Recuperar um único registro por ID
-def get_vehicle(session: Session, vehicle_id: int) -> Optional[DimVehicle]:
-    return session.get(DimVehicle, vehicle_id)
-
-
-# Atualizar um registro existente
-def update_vehicle(
-    session: Session, vehicle_id: int, vehicle_data: DimVehicle
-) -> Optional[DimVehicle]:
-    vehicle = session.get(DimVehicle, vehicle_id)
-    if not vehicle:
-        return None
-
-    vehicle_data = vehicle_data.model_dump(exclude_unset=True)
-    for key, value in vehicle_data.items():
-        setattr(vehicle, key, value)
-
-    session.commit()
-    session.refresh(vehicle)
-    return vehicle
-
-
-# Excluir um registro por ID
-def delete_vehicle(session: Session, vehicle_id: int) -> bool:
-    vehicle = session.get(DimVehicle, vehicle_id)
-    if not vehicle:
-        return False
-    session.delete(vehicle)
-    session.commit()
-    return True
+    # Uma linha por (intervalo, propulsão): agrupa por intervalo e completa
+    # as propulsões ausentes com zero
+    points: Dict[date, dict] = {}
+    for bucket_date, total, propulsion in rows:
+        point = points.setdefault(
+            bucket_date,
+            {
+                "bucket": bucket_date,
+                "count": 0,
+                "by_propulsion": {p.value: 0 for p in PropulsionType},
+            },
+        )
+        if propulsion is not None:
+            point["count"] += total
+            point["by_propulsion"][PropulsionType(propulsion).value] = total
+    return list(points.values())
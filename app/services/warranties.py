@@ -1,54 +1,229 @@
+from app.models.locations import DimLocations, MarketEnum
+from app.models.vehicle import DimVehicle
+from app.models.warranties import FactWarranties, FactWarrantiesUpdate
+from app.services.crud import CRUDRepository
+from sqlalchemy import BigInteger, Float, and_, cast, literal_column, tablesample
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.sql import func
 from sqlmodel import Session, select
-from app.models.warranties import FactWarranties
 from typing import List, Optional
+from datetime import date
+from enum import Enum
 
+# CRUD, paginação, RETURNING e operações em massa de warranties
+repository = CRUDRepository(
+    FactWarranties, FactWarrantiesUpdate, name="Warranty", plural="warranties"
+)
 
-# Inserção em massa
-def create_warranties(session: Session, warranties: List[FactWarranties]) -> None:
-    session.bulk_save_objects(warranties)
-    session.commit()
 
+# Monta os filtros de warranties (data, peça, localização e veículo)
+def warranty_filters(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    vehicle_id: Optional[int] = None,
+) -> list:
+    filters = []
+    if start_date is not None:
+        filters.append(FactWarranties.repair_date >= start_date)
+    if end_date is not None:
+        filters.append(FactWarranties.repair_date <= end_date)
+    if part_id is not None:
+        filters.append(FactWarranties.part_id == part_id)
+    if location_id is not None:
+        filters.append(FactWarranties.location_id == location_id)
+    if vehicle_id is not None:
+        filters.append(FactWarranties.vehicle_id == vehicle_id)
+    return filters
 
-# Recuperação em massa com paginação
-def get_warranties(session: Session, chunk_size: int = 1000) -> List[FactWarranties]:
-    return session.exec(select(FactWarranties).limit(chunk_size)).all()
 
+# Atributos de DimVehicle usados para agrupar a taxa de falhas
+class VehicleDimension(str, Enum):
+    MODEL = "model"
+    YEAR = "year"
+    PROPULSION = "propulsion"
 
-# Criar um único registro
-def create_warranty(session: Session, warranty: FactWarranties) -> FactWarranties:
-    session.add(warranty)
-    session.commit()
-    session.refresh(warranty)
-    return warranty
 
+# Taxa de falhas (warranties por vehicle) em uma única consulta: a CTE conta
+# as warranties filtradas por vehicle e o SELECT externo junta com a frota
+# inteira de cada grupo. Contar antes da junção evita multiplicar as linhas
+# de vehicle pelas suas warranties
+def failure_rates(
+    session: Session,
+    dimensions: List[VehicleDimension],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    market: Optional[MarketEnum] = None,
+) -> List[dict]:
+    claims = select(FactWarranties.vehicle_id, func.count().label("claims")).where(
+        *warranty_filters(start_date=start_date, end_date=end_date)
+    )
+    if market is not None:
+        claims = claims.join(
+            DimLocations, DimLocations.location_id == FactWarranties.location_id
+        ).where(DimLocations.market == market)
+    claims = claims.group_by(FactWarranties.vehicle_id).cte("claims")
 
-# Recuperar um único registro por claim_key
-def get_warranty(session: Session, claim_key: int) -> Optional[FactWarranties]:
-    return session.get(FactWarranties, claim_key)
+    groups = [getattr(DimVehicle, dimension.value) for dimension in dimensions]
+    vehicles = func.count(DimVehicle.vehicle_id)
+    total_claims = func.coalesce(func.sum(claims.c.claims), 0)
+    stmt = (
+        select(
+            *groups,
+            vehicles.label("vehicles"),
+            total_claims.label("claims"),
+            func.count(claims.c.vehicle_id).label("vehicles_with_claims"),
+            (cast(total_claims, Float) / vehicles).label("claims_per_vehicle"),
+        )
+        .select_from(DimVehicle)
+        .outerjoin(claims, claims.c.vehicle_id == DimVehicle.vehicle_id)
+        .group_by(*groups)
+        .order_by(*groups)
+    )
+    return [row._asdict() for row in session.exec(stmt).all()]
 
 
-# Atualizar um registro existente
-def update_warranty(
-    session: Session, claim_key: int, warranty_data: FactWarranties
-) -> Optional[FactWarranties]:
-    warranty = session.get(FactWarranties, claim_key)
-    if not warranty:
-        return None
+# Colunas de FactWarranties disponíveis nas rotas de top-N
+class WarrantyDimension(str, Enum):
+    PART = "part"
+    LOCATION = "location"
+    VEHICLE = "vehicle"
+    CLASSIFIED_ISSUE = "classified_issue"
 
-    warranty_data = warranty_data.model_dump(exclude_unset=True)
-    for key, value in warranty_data.items():
-        setattr(warranty, key, value)
 
-    session.commit()
-    session.refresh(warranty)
-    return warranty
+TOP_COLUMNS = {
+    WarrantyDimension.PART: "part_id",
+    WarrantyDimension.LOCATION: "location_id",
+    WarrantyDimension.VEHICLE: "vehicle_id",
+    WarrantyDimension.CLASSIFIED_ISSUE: "classified_issue",
+}
 
 
-# Excluir um registro por claim_key
-def delete_warranty(session: Session, claim_key: int) -> bool:
-    warranty = session.get(FactWarranties, claim_key)
-    if not warranty:
-        return False
-    session.delete(warranty)
-    session.commit()
-    return True
+# Os "n" valores com mais warranties, ordenados e limitados no banco. No modo
+# aproximado a contagem é feita sobre uma amostra de blocos (TABLESAMPLE
+# SYSTEM) e extrapolada; serve para períodos longos, onde a ordem dos mais
+# frequentes se mantém na amostra
+def top_warranties(
+    session: Session,
+    dimension: WarrantyDimension,
+    n: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sample_percent: Optional[float] = None,
+) -> List[dict]:
+    name = TOP_COLUMNS[dimension]
+    source = FactWarranties.__table__
+    if sample_percent is not None:
+        source = tablesample(source, func.system(sample_percent), name="sample")
+    column = source.c[name]
+    total = func.count()
+    if sample_percent is not None:
+        total = func.round(total * 100.0 / sample_percent)
+    filters = [column.is_not(None)]
+    if start_date is not None:
+        filters.append(source.c.repair_date >= start_date)
+    if end_date is not None:
+        filters.append(source.c.repair_date <= end_date)
+    stmt = (
+        select(column, cast(total, BigInteger).label("count"))
+        .select_from(source)
+        .where(*filters)
+        .group_by(column)
+        .order_by(func.count().desc(), column)
+        .limit(n)
+    )
+    return [{name: row[0], "count": row[1]} for row in session.exec(stmt).all()]
+
+
+# Configuração da busca textual; a mesma da coluna gerada search_vector
+TEXT_SEARCH_CONFIG = "english"
+# Trechos com os termos encontrados em vez do texto inteiro dos comentários
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<b>, StopSel=</b>"
+# Os trechos são HTML (<b> nos termos): o texto é escapado antes do ts_headline
+# para o conteúdo dos comentários não ser interpretado como marcação. O "&"
+# vem primeiro; as entidades são tokens à parte e não alteram a busca
+HTML_ENTITIES = [
+    ("&", "&amp;"),
+    ("<", "&lt;"),
+    (">", "&gt;"),
+    ('"', "&quot;"),
+    ("'", "&#x27;"),
+]
+SEARCH_COLUMNS = [
+    "claim_key",
+    "repair_date",
+    "vehicle_id",
+    "part_id",
+    "location_id",
+    "classified_issue",
+]
+
+# Coluna existente apenas no banco (fora do modelo FactWarranties)
+search_vector = literal_column("factwarranties.search_vector", TSVECTOR)
+
+
+def _escape_html(column):
+    for char, entity in HTML_ENTITIES:
+        column = func.replace(column, char, entity)
+    return column
+
+
+# Busca textual em client_complaint e tech_comment, ordenada por relevância
+# (ts_rank_cd). A subconsulta ordena e pagina usando apenas o índice GIN e o
+# tsvector; os textos são lidos e os trechos (ts_headline, a parte cara)
+# gerados só para as linhas da página
+def search_warranties(
+    session: Session,
+    text: str,
+    page,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    part_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+) -> List[dict]:
+    config = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+    query = func.websearch_to_tsquery(config, text)
+    rank = func.ts_rank_cd(search_vector, query).label("rank")
+    filters = warranty_filters(
+        start_date=start_date,
+        end_date=end_date,
+        part_id=part_id,
+        location_id=location_id,
+    )
+    matches = select(FactWarranties.claim_key, FactWarranties.repair_date, rank).where(
+        search_vector.op("@@")(query), *filters
+    )
+    matches = page.apply(
+        matches, session, FactWarranties, SEARCH_COLUMNS, order_by=rank.desc()
+    )
+    matches = matches.order_by(FactWarranties.claim_key).subquery("matches")
+
+    # Junção pela chave primária completa: cada linha vem direto da partição
+    stmt = (
+        select(
+            *[getattr(FactWarranties, name) for name in SEARCH_COLUMNS],
+            matches.c.rank,
+            func.ts_headline(
+                config,
+                _escape_html(FactWarranties.client_complaint),
+                query,
+                HEADLINE_OPTIONS,
+            ).label("complaint_snippet"),
+            func.ts_headline(
+                config,
+                _escape_html(FactWarranties.tech_comment),
+                query,
+                HEADLINE_OPTIONS,
+            ).label("comment_snippet"),
+        )
+        .join(
+            matches,
+            and_(
+                matches.c.claim_key == FactWarranties.claim_key,
+                matches.c.repair_date == FactWarranties.repair_date,
+            ),
+        )
+        .order_by(matches.c.rank.desc(), FactWarranties.claim_key)
+    )
+    return [row._asdict() for row in session.exec(stmt).all()]
@@ -0,0 +1,38 @@
+import threading
+
+
+# Agrupa chamadas próximas em uma única execução: "trigger" agenda "fn" para
+# daqui a "delay" segundos; os triggers até lá não agendam outra execução
+class DebouncedTask:
+    def __init__(self, delay: float, fn):
+        self.delay = delay
+        self.fn = fn
+        self._timer = None
+        self._lock = threading.Lock()
+        # Execuções nunca se sobrepõem dentro do processo
+        self._run_lock = threading.Lock()
+
+    def trigger(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.delay, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    # Antecipa a execução pendente, se houver (ex: testes)
+    def flush(self):
+        with self._lock:
+            if self._timer is None:
+                return
+            self._timer.cancel()
+            self._timer = None
+        with self._run_lock:
+            self.fn()
+
+    def _run(self):
+        # Escritas a partir daqui agendam uma nova execução
+        with self._lock:
+            self._timer = None
+        with self._run_lock:
+            self.fn()
@@ -0,0 +1,26 @@
+import hashlib
+from typing import Optional, Union
+from fastapi import Request
+
+
+# Gera um ETag fraco a partir dos bytes da resposta: o mesmo valor é enviado
+# com o corpo original e com o comprimido (gzip/br), que não são idênticos
+# byte a byte, então um ETag forte violaria a RFC 7232
+def make_etag(body: Union[str, bytes]) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+# Verifica se o ETag informado no If-None-Match corresponde ao atual
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    if not etag:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 7232): ignora o prefixo W/ dos dois lados
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
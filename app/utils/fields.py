@@ -0,0 +1,95 @@
+from typing import Any, List, Optional, Sequence, Type
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import lambda_stmt
+from sqlmodel import Session, SQLModel, select
+from app.utils.serializer import FastJSONResponse
+
+
+# Converte o parâmetro "fields" (ex: "claim_key,repair_date") na lista de colunas
+def parse_fields(model: Type[SQLModel], fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+
+    columns = model.__table__.columns.keys()
+    requested = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name or name in requested:
+            continue
+        if name not in columns:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid field '{name}'. Allowed fields: {', '.join(columns)}",
+            )
+        requested.append(name)
+
+    return requested or None
+
+
+# Monta o SELECT apenas com as colunas pedidas (ou o modelo inteiro)
+def select_fields(model: Type[SQLModel], columns: Optional[List[str]]):
+    if columns is None:
+        return select(model)
+    return select(*[getattr(model, name) for name in columns])
+
+
+# O mesmo SELECT como lambda_stmt: montado e compilado uma vez por modelo e
+# conjunto de colunas; os critérios devem ser acrescentados com
+# "stmt += lambda s: s.where(...)" para virarem parâmetros
+def lambda_select(model: Type[SQLModel], columns: Optional[List[str]]):
+    entities = tuple(getattr(model, name) for name in columns) if columns else (model,)
+    return lambda_stmt(
+        lambda: select(*entities),
+        track_closure_variables=False,
+        track_on=[model, ",".join(columns or ())],
+    )
+
+
+# Executa um SELECT montado por lambda_select (objetos, escalares ou tuplas,
+# como o session.exec faria com o select_fields)
+def fetch_fields(session: Session, stmt, columns: Optional[List[str]]) -> list:
+    if columns is None or len(columns) == 1:
+        return session.scalars(stmt).all()
+    return session.execute(stmt).all()
+
+
+# Converte as linhas projetadas em dicionários com os nomes das colunas
+def rows_to_dicts(rows: Sequence[Any], columns: List[str]) -> List[dict]:
+    # Com uma única coluna o SQLModel retorna escalares em vez de tuplas
+    if len(columns) == 1:
+        return [{columns[0]: row} for row in rows]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+# Serializa os objetos completos ou apenas os campos pedidos direto com orjson
+def fields_response(rows: Sequence[Any], columns: Optional[List[str]]):
+    if columns is None:
+        return FastJSONResponse(content=rows)
+    return FastJSONResponse(content=rows_to_dicts(rows, columns))
+
+
+# Converte um filtro {"coluna": valor} em condições de igualdade validadas
+def equality_filters(model: Type[SQLModel], criteria: Optional[dict]) -> list:
+    if not criteria:
+        return []
+
+    columns = model.__table__.columns
+    filters = []
+    for name, value in criteria.items():
+        if name not in columns:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid filter '{name}'. Allowed fields: {', '.join(columns.keys())}",
+            )
+        # Converte o valor JSON para o tipo do campo (datas, enums)
+        try:
+            value = TypeAdapter(model.model_fields[name].annotation).validate_python(
+                value
+            )
+        except ValidationError:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid value for filter '{name}'"
+            )
+        filters.append(columns[name] == value)
+    return filters
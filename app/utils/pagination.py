@@ -0,0 +1,132 @@
+import time
+from typing import Dict, List, Optional, Tuple, Type
+from fastapi import Query
+from sqlalchemy import Date, Enum, Integer, String, text
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlmodel import Session, SQLModel
+from app.core.config import settings
+
+# Por quanto tempo (segundos) a largura média das colunas é reaproveitada
+WIDTH_CACHE_SECONDS = 3600
+
+# Largura usada para textos sem estatística do banco (colunas TEXT/65535)
+DEFAULT_TEXT_WIDTH = 256
+
+# tabela -> (momento da leitura, largura estimada de cada coluna)
+_column_widths: Dict[str, Tuple[float, Dict[str, int]]] = {}
+
+
+# Estimativa da largura de uma coluna no JSON a partir do tipo SQL
+def _static_width(column) -> int:
+    if isinstance(column.type, Enum):
+        return max(len(value) for value in column.type.enums) + 2
+    if isinstance(column.type, Integer):
+        return 10
+    if isinstance(column.type, Date):
+        return 12
+    if isinstance(column.type, String) and column.type.length:
+        return min(column.type.length, DEFAULT_TEXT_WIDTH) + 2
+    return DEFAULT_TEXT_WIDTH
+
+
+# Largura estimada de cada coluna apenas pelo tipo, sem acesso ao banco
+def static_column_widths(model: Type[SQLModel]) -> Dict[str, int]:
+    return {column.name: _static_width(column) for column in model.__table__.columns}
+
+
+# Largura média de cada coluna: pg_stats (após ANALYZE) ou estimativa pelo tipo
+def column_widths(session: Session, model: Type[SQLModel]) -> Dict[str, int]:
+    table = model.__tablename__
+    cached = _column_widths.get(table)
+    if cached and time.monotonic() - cached[0] < WIDTH_CACHE_SECONDS:
+        return cached[1]
+
+    widths = static_column_widths(model)
+    if session.get_bind().dialect.name == "postgresql":
+        stats = session.exec(
+            text(
+                "SELECT attname, avg_width FROM pg_stats "
+                "WHERE schemaname = current_schema() AND tablename = :table"
+            ).bindparams(table=table)
+        ).all()
+        widths.update({name: width for name, width in stats if name in widths})
+
+    _column_widths[table] = (time.monotonic(), widths)
+    return widths
+
+
+# Página padrão: cabe em PAGE_TARGET_BYTES, entre MIN_PAGE_SIZE e DEFAULT_PAGE_SIZE
+def _fitting_page_size(widths: Dict[str, int], columns: Optional[List[str]]) -> int:
+    # Cada campo também carrega o nome, aspas, dois-pontos e vírgula
+    row_width = sum(widths[name] + len(name) + 4 for name in (columns or widths.keys()))
+    size = settings.PAGE_TARGET_BYTES // max(row_width, 1)
+    return max(settings.MIN_PAGE_SIZE, min(size, settings.DEFAULT_PAGE_SIZE))
+
+
+# Página padrão pelas estatísticas das colunas no banco
+def adaptive_page_size(
+    session: Session, model: Type[SQLModel], columns: Optional[List[str]] = None
+) -> int:
+    return _fitting_page_size(column_widths(session, model), columns)
+
+
+# Parâmetros de paginação obrigatórios em todas as rotas de listagem
+class PageParams:
+    def __init__(
+        self,
+        skip: int = Query(0, ge=0),
+        limit: Optional[int] = Query(
+            None,
+            ge=1,
+            le=settings.MAX_PAGE_SIZE,
+            description="Page size; defaults to a size based on the row width",
+        ),
+    ):
+        self.skip = skip
+        self.limit = limit
+
+
+# Paginação das consultas ao banco: o tamanho padrão usa as estatísticas das
+# colunas (pg_stats)
+class Pagination(PageParams):
+    # Tamanho da página: o pedido pelo cliente ou o padrão adaptativo
+    def size(
+        self,
+        session: Session,
+        model: Type[SQLModel],
+        columns: Optional[List[str]] = None,
+    ) -> int:
+        if self.limit is not None:
+            return self.limit
+        return adaptive_page_size(session, model, columns)
+
+    # Aplica ORDER BY (chave primária por padrão), OFFSET e LIMIT ao SELECT
+    def apply(
+        self,
+        stmt,
+        session: Session,
+        model: Type[SQLModel],
+        columns: Optional[List[str]] = None,
+        order_by=None,
+    ):
+        if order_by is None:
+            order_by = list(model.__table__.primary_key.columns)[0]
+        skip = self.skip
+        size = self.size(session, model, columns)
+        if isinstance(stmt, StatementLambdaElement):
+            # OFFSET e LIMIT como parâmetros do SQL já compilado
+            return stmt + (lambda s: s.order_by(order_by).offset(skip).limit(size))
+        return stmt.order_by(order_by).offset(skip).limit(size)
+
+
+# Paginação das listas já carregadas na memória (ex: registro de locations):
+# o tamanho padrão usa apenas a largura estimada pelo tipo das colunas, então
+# a rota não precisa de uma sessão do banco
+class InMemoryPagination(PageParams):
+    def slice(
+        self, items, model: Type[SQLModel], columns: Optional[List[str]] = None
+    ) -> list:
+        size = self.limit
+        if size is None:
+            size = _fitting_page_size(static_column_widths(model), columns)
+        return list(items[self.skip : self.skip + size])
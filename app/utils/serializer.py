@@ -1,9 +1,34 @@
 import datetime
+import functools
 from enum import Enum
-from typing import Any
+from typing import Any, Optional, Tuple
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+# date/datetime e Enum(str) são serializados nativamente pelo orjson
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+# Colunas mapeadas de um modelo com tabela (None para os modelos sem tabela)
+@functools.lru_cache(maxsize=None)
+def _column_keys(model: type) -> Optional[Tuple[str, ...]]:
+    mapper = inspect(model, raiseerr=False)
+    if mapper is None:
+        return None
+    return tuple(attribute.key for attribute in mapper.column_attrs)
 
 
 def default_serializer(obj: Any) -> Any:
+    # Modelos com tabela: lidos pelos atributos do ORM, que carregam as colunas
+    # expiradas (ex: após um commit) em vez de omiti-las
+    if isinstance(obj, SQLModel):
+        keys = _column_keys(type(obj))
+        if keys is None:
+            return obj.model_dump()
+        return {key: getattr(obj, key) for key in keys}
+
     # Serializa objetos datetime
     if isinstance(obj, datetime.date):
         return obj.isoformat()
@@ -14,3 +39,14 @@ def default_serializer(obj: Any) -> Any:
 
     # Se não for um tipo especial, levanta erro
     raise TypeError(f"Type {type(obj)} not serializable")
+
+
+# Serializa qualquer conteúdo da API para bytes JSON usando orjson
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=default_serializer, option=ORJSON_OPTIONS)
+
+
+# Resposta JSON padrão da API, renderizada com orjson
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
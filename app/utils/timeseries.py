@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+from enum import Enum
+from sqlalchemy import Date, DateTime, Interval, cast, literal
+from sqlalchemy.sql import func
+
+
+# Tamanho dos intervalos das séries temporais (unidades do date_trunc)
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+
+
+# Início do intervalo que contém a data. A coluna é convertida para timestamp
+# (sem fuso) para o resultado não depender do TimeZone da sessão
+def date_bucket(column, granularity: Granularity):
+    return cast(func.date_trunc(granularity.value, cast(column, DateTime)), Date)
+
+
+# Passo entre os intervalos: "quarter" vale no date_trunc, mas não é uma
+# unidade aceita na entrada de um interval
+BUCKET_STEPS = {
+    Granularity.DAY: "1 day",
+    Granularity.WEEK: "1 week",
+    Granularity.MONTH: "1 month",
+    Granularity.QUARTER: "3 months",
+}
+MONTHS_PER_BUCKET = {Granularity.MONTH: 1, Granularity.QUARTER: 3}
+
+
+# Todos os intervalos entre as datas, inclusive os sem nenhuma linha
+def bucket_series(start_date: date, end_date: date, granularity: Granularity):
+    return (
+        func.generate_series(
+            func.date_trunc(granularity.value, cast(start_date, DateTime)),
+            func.date_trunc(granularity.value, cast(end_date, DateTime)),
+            cast(literal(BUCKET_STEPS[granularity]), Interval),
+        )
+        .table_valued("bucket")
+        .render_derived("buckets")
+    )
+
+
+# Quantidade de intervalos entre as datas (inclusive), como no bucket_series
+def bucket_count(start_date: date, end_date: date, granularity: Granularity) -> int:
+    if granularity == Granularity.DAY:
+        return (end_date - start_date).days + 1
+    if granularity == Granularity.WEEK:
+        # Semanas do date_trunc começam na segunda-feira
+        start = start_date - timedelta(days=start_date.weekday())
+        end = end_date - timedelta(days=end_date.weekday())
+        return (end - start).days // 7 + 1
+    months_per_bucket = MONTHS_PER_BUCKET[granularity]
+    start = (start_date.year * 12 + start_date.month - 1) // months_per_bucket
+    end = (end_date.year * 12 + end_date.month - 1) // months_per_bucket
+    return end - start + 1
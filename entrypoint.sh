@@ -1,5 +1,11 @@
 #!/bin/bash
 
+# Uso: entrypoint.sh [serve|dev|migrate|seed]
+#   serve   - API em produção (gunicorn + workers uvicorn), padrão
+#   dev     - API com uvicorn --reload (um processo, recarrega ao editar)
+#   migrate - cria o banco se necessário, roda as migrações e as partições
+#   seed    - popula o banco com dados fictícios (apenas se estiver vazio)
+
 # Função para esperar o banco de dados PostgreSQL
 wait_for_postgres() {
   echo "Aguardando o banco de dados PostgreSQL iniciar..."
@@ -18,25 +24,55 @@ wait_for_redis() {
   echo "Redis está pronto!"
 }
 
-redis-server &
+migrate() {
+  wait_for_postgres
+
+  # Verifica se o banco de dados existe, cria se necessário
+  echo "Verificando se o banco de dados existe..."
+  psql postgresql://admin:admin@db:5432/postgres -c "SELECT 1 FROM pg_database WHERE datname = 'teste-ford';" | grep -q 1 || \
+    psql postgresql://admin:admin@db:5432/postgres -c "CREATE DATABASE teste-ford;"
 
-# Espera os serviços db e redis estarem prontos
-wait_for_postgres
-wait_for_redis
+  # Rodar as migrações
+  echo "Rodando migrações..."
+  alembic upgrade head
 
-# Verifica se o banco de dados existe, cria se necessário
-echo "Verificando se o banco de dados existe..."
-psql postgresql://admin:admin@db:5432/postgres -c "SELECT 1 FROM pg_database WHERE datname = 'teste-ford';" | grep -q 1 || \
-  psql postgresql://admin:admin@db:5432/postgres -c "CREATE DATABASE teste-ford;"
+  # Partições de factwarranties para os próximos anos
+  python manage_partitions.py create
+}
 
-# Rodar as migrações
-echo "Rodando migrações..."
-alembic upgrade head
+seed() {
+  wait_for_postgres
 
-# Popular o banco de dados
-echo "Popular banco de dados..."
-python populate_db.py
+  # Popular o banco de dados (uma única vez)
+  if psql postgresql://admin:admin@db:5432/teste-ford -tAc "SELECT 1 FROM dimlocations LIMIT 1" | grep -q 1; then
+    echo "Banco de dados já populado"
+  else
+    echo "Popular banco de dados..."
+    python populate_db.py
+  fi
+}
 
-# Iniciar a aplicação diretamente
-echo "Iniciando a aplicação..."
-uvicorn app.main:app --host 0.0.0.0 --port 8001 --reload
\ No newline at end of file
+case "${1:-serve}" in
+  migrate)
+    migrate
+    ;;
+  seed)
+    seed
+    ;;
+  dev)
+    wait_for_postgres
+    wait_for_redis
+    echo "Iniciando a aplicação (desenvolvimento)..."
+    exec uvicorn app.main:app --host 0.0.0.0 --port 8001 --reload
+    ;;
+  serve)
+    wait_for_postgres
+    wait_for_redis
+    echo "Iniciando a aplicação..."
+    exec gunicorn app.main:app -c gunicorn.conf.py
+    ;;
+  *)
+    echo "Comando desconhecido: $1 (use serve, dev, migrate ou seed)"
+    exit 1
+    ;;
+esac
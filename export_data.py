@@ -0,0 +1,79 @@
+import argparse
+from datetime import date
+from app.core.database import engine
+from app.services.export import (
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_MODELS,
+    FILE_EXTENSIONS,
+    ExportFormat,
+    ExportTable,
+    export_to_file,
+)
+from app.services.warranties import warranty_filters
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Exporta tabelas do esquema estrela em Arrow IPC ou Parquet"
+    )
+    table_names = [table.value for table in ExportTable]
+    # Validado à mão: "choices" com nargs="*" rejeita a lista vazia (padrão) antes
+    # do Python 3.12.8
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        metavar="TABLE",
+        help=f"Tabelas a exportar: {', '.join(table_names)} (padrão: todas)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=[export_format.value for export_format in ExportFormat],
+        default=ExportFormat.PARQUET.value,
+    )
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    # Filtros aplicados apenas à tabela de warranties
+    parser.add_argument("--start-date", type=date.fromisoformat)
+    parser.add_argument("--end-date", type=date.fromisoformat)
+    parser.add_argument("--part-id", type=int)
+    parser.add_argument("--location-id", type=int)
+    parser.add_argument("--vehicle-id", type=int)
+    args = parser.parse_args()
+    invalid = [table for table in args.tables if table not in table_names]
+    if invalid:
+        parser.error(f"tabelas inválidas: {', '.join(invalid)}")
+    return args
+
+
+def export_tables():
+    args = parse_args()
+    export_format = ExportFormat(args.format)
+    tables = [ExportTable(table) for table in args.tables] or list(ExportTable)
+
+    with engine.connect() as connection:
+        for table in tables:
+            filters = None
+            if table == ExportTable.WARRANTIES:
+                filters = warranty_filters(
+                    args.start_date,
+                    args.end_date,
+                    args.part_id,
+                    args.location_id,
+                    args.vehicle_id,
+                )
+
+            path = f"{args.output_dir}/{table.value}.{FILE_EXTENSIONS[export_format]}"
+            with open(path, "wb") as output:
+                total_rows = export_to_file(
+                    connection,
+                    EXPORT_MODELS[table],
+                    output,
+                    export_format,
+                    filters,
+                    chunk_size=args.chunk_size,
+                )
+            print(f"{table.value}: {total_rows} linhas exportadas para {path}")
+
+
+if __name__ == "__main__":
+    export_tables()
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+# Configuração do gunicorn para produção (entrypoint.sh serve)
+
+bind = os.getenv("BIND", "0.0.0.0:8001")
+
+# Um worker por núcleo (WEB_CONCURRENCY sobrescreve)
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "app.core.workers.UvloopWorker"
+
+# Importa a aplicação uma vez no master; os workers herdam o código já
+# carregado pelo fork (início mais rápido e memória compartilhada)
+preload_app = True
+
+# Reciclagem dos workers após N requisições (o jitter evita que todos
+# reiniciem ao mesmo tempo); o worker termina as requisições em andamento
+max_requests = int(os.getenv("MAX_REQUESTS", 10_000))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 1_000))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+# Conexões abertas no master não podem ser compartilhadas entre processos:
+# cada worker começa com pools vazios (o Redis é conectado no lifespan)
+def post_fork(server, worker):
+    from app.core.database import dispose_engines
+
+    dispose_engines()
@@ -0,0 +1,64 @@
+import argparse
+from datetime import date
+from app.core.config import settings
+from app.core.database import engine
+from app.services.partitions import (
+    archive_year,
+    create_partitions,
+    partition_name,
+    partition_years,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Mantém as partições anuais de factwarranties"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Lista as partições anexadas")
+
+    create = commands.add_parser("create", help="Cria as partições dos próximos anos")
+    create.add_argument(
+        "--years-ahead", type=int, default=settings.PARTITION_YEARS_AHEAD
+    )
+
+    archive = commands.add_parser(
+        "archive", help="Exporta (Parquet) e desanexa os anos informados"
+    )
+    archive.add_argument("years", nargs="+", type=int)
+    archive.add_argument("--output-dir", default=".")
+    archive.add_argument(
+        "--drop",
+        action="store_true",
+        help="Remove a partição após exportar (padrão: move para o esquema archive)",
+    )
+    return parser.parse_args()
+
+
+def manage_partitions():
+    args = parse_args()
+
+    if args.command == "list":
+        with engine.connect() as connection:
+            for year in partition_years(connection):
+                print(partition_name(year))
+
+    elif args.command == "create":
+        through_year = date.today().year + args.years_ahead
+        with engine.begin() as connection:
+            created = create_partitions(connection, through_year)
+        print(f"{len(created)} partições criadas até {through_year}")
+
+    elif args.command == "archive":
+        # Um ano por transação: o DETACH bloqueia a tabela até o commit
+        for year in args.years:
+            with engine.begin() as connection:
+                total_rows = archive_year(
+                    connection, year, args.output_dir, drop=args.drop
+                )
+            print(f"{partition_name(year)}: {total_rows} linhas arquivadas")
+
+
+if __name__ == "__main__":
+    manage_partitions()
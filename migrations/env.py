@@ -22,6 +22,29 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 target_metadata = SQLModel.metadata
 
+
+# Colunas que existem apenas no banco (ex: tsvector gerado), declaradas no
+# info da tabela do modelo
+def _unmapped_columns(table_name: str):
+    table = target_metadata.tables.get(table_name)
+    return table.info.get("unmapped_columns", ()) if table is not None else ()
+
+
+# Tabelas só do banco (partições de factwarranties e a tabela de claim_keys) e
+# colunas só do banco (e os seus índices) são criadas por SQL nas migrações e
+# ficam fora do autogenerate. As materialized views (ex: suppliergeography)
+# usam outra metadata (ViewModel) e nem chegam aqui
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None:
+        return not name.startswith("factwarranties_")
+    if reflected and type_ == "column":
+        return name not in _unmapped_columns(object.table.name)
+    if reflected and type_ == "index":
+        unmapped = _unmapped_columns(object.table.name)
+        return not any(column.name in unmapped for column in object.columns)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +67,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -66,7 +90,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
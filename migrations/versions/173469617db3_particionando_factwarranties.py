@@ -0,0 +1,184 @@
+"""Particionando factwarranties por ano (repair_date)
+
+Revision ID: 173469617db3
+Revises: 3a09635842ba
+Create Date: 2026-10-19 14:03:27.194305
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "173469617db3"
+down_revision: Union[str, None] = "3a09635842ba"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições criadas além do ano atual (depois mantidas por manage_partitions.py)
+YEARS_AHEAD = 2
+
+FOREIGN_KEYS = {
+    "vehicle_id": "dimvehicle",
+    "part_id": "dimparts",
+    "location_id": "dimlocations",
+    "purchase_id": "dimpurchases",
+}
+
+
+# Tombstones de tabelas particionadas: o trigger roda em cada partição, então o
+# nome da tabela vem do 2º argumento. Um UPDATE que muda repair_date de ano é
+# executado como DELETE + INSERT entre partições; se a linha ainda existe, não
+# é uma exclusão e o tombstone não é gravado
+RECORD_TOMBSTONE_PARTITIONED = """
+    CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+    DECLARE
+        deleted_id integer;
+        source_table text := COALESCE(TG_ARGV[1], TG_TABLE_NAME);
+        moved boolean := false;
+    BEGIN
+        EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING OLD INTO deleted_id;
+        IF TG_ARGV[1] IS NOT NULL THEN
+            EXECUTE format(
+                'SELECT EXISTS (SELECT 1 FROM %I WHERE %I = $1)',
+                TG_ARGV[1], TG_ARGV[0]
+            ) USING deleted_id INTO moved;
+        END IF;
+        IF NOT moved THEN
+            INSERT INTO changetombstones (table_name, row_id)
+            VALUES (source_table, deleted_id);
+        END IF;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+RECORD_TOMBSTONE = """
+    CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+    DECLARE
+        deleted_id integer;
+    BEGIN
+        EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING OLD INTO deleted_id;
+        INSERT INTO changetombstones (table_name, row_id)
+        VALUES (TG_TABLE_NAME, deleted_id);
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+# Renomeia a tabela atual (e os nomes que conflitariam) para copiar os dados
+def _rename_current(suffix: str):
+    op.execute("DROP TRIGGER factwarranties_tombstone ON factwarranties")
+    op.execute("DROP TRIGGER factwarranties_change_seq ON factwarranties")
+    # A sequência do claim_key sobrevive à remoção da tabela antiga
+    op.execute("ALTER SEQUENCE factwarranties_claim_key_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE factwarranties RENAME TO factwarranties_{suffix}")
+    op.execute(
+        f"ALTER TABLE factwarranties_{suffix} "
+        f"RENAME CONSTRAINT factwarranties_pkey TO factwarranties_{suffix}_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_factwarranties_change_seq "
+        f"RENAME TO ix_factwarranties_{suffix}_change_seq"
+    )
+
+
+# Copia os dados (change_seq preservado: os triggers são criados depois),
+# remove a tabela antiga e recria chaves estrangeiras, índice e triggers
+def _copy_and_finish(suffix: str, tombstone_args: str):
+    op.execute(f"INSERT INTO factwarranties SELECT * FROM factwarranties_{suffix}")
+    op.execute(
+        "ALTER SEQUENCE factwarranties_claim_key_seq OWNED BY factwarranties.claim_key"
+    )
+    op.execute(f"DROP TABLE factwarranties_{suffix}")
+
+    for column, referred_table in FOREIGN_KEYS.items():
+        op.create_foreign_key(
+            f"factwarranties_{column}_fkey",
+            "factwarranties",
+            referred_table,
+            [column],
+            [column],
+        )
+    op.create_index(
+        op.f("ix_factwarranties_change_seq"), "factwarranties", ["change_seq"]
+    )
+    op.execute(
+        """
+        CREATE TRIGGER factwarranties_change_seq
+        BEFORE INSERT OR UPDATE ON factwarranties
+        FOR EACH ROW EXECUTE FUNCTION set_change_seq()
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER factwarranties_tombstone
+        AFTER DELETE ON factwarranties
+        FOR EACH ROW EXECUTE FUNCTION record_tombstone({tombstone_args})
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(RECORD_TOMBSTONE_PARTITIONED)
+    _rename_current("heap")
+
+    # A chave de partição precisa fazer parte da chave primária
+    op.execute(
+        """
+        CREATE TABLE factwarranties (
+            LIKE factwarranties_heap INCLUDING DEFAULTS,
+            PRIMARY KEY (claim_key, repair_date)
+        ) PARTITION BY RANGE (repair_date)
+        """
+    )
+
+    # Uma partição por ano, do primeiro reparo até YEARS_AHEAD anos à frente
+    first_year, last_year = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT EXTRACT(YEAR FROM min(repair_date))::int, "
+                "EXTRACT(YEAR FROM max(repair_date))::int FROM factwarranties_heap"
+            )
+        )
+        .one()
+    )
+    current_year = date.today().year
+    first_year = min(first_year or current_year, current_year)
+    last_year = max(last_year or current_year, current_year) + YEARS_AHEAD
+    for year in range(first_year, last_year + 1):
+        op.execute(
+            f"""
+            CREATE TABLE factwarranties_y{year} PARTITION OF factwarranties
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+            """
+        )
+    # Rede de segurança para datas fora das partições criadas
+    op.execute(
+        "CREATE TABLE factwarranties_default PARTITION OF factwarranties DEFAULT"
+    )
+
+    _copy_and_finish("heap", "'claim_key', 'factwarranties'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partições já desanexadas/arquivadas não voltam para a tabela
+    _rename_current("partitioned")
+    op.execute(
+        """
+        CREATE TABLE factwarranties (
+            LIKE factwarranties_partitioned INCLUDING DEFAULTS,
+            PRIMARY KEY (claim_key)
+        )
+        """
+    )
+    _copy_and_finish("partitioned", "'claim_key'")
+    op.execute(RECORD_TOMBSTONE)
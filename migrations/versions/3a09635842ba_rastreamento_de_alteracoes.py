@@ -0,0 +1,133 @@
+"""Rastreamento de alterações (change_seq e tombstones)
+
+Revision ID: 3a09635842ba
+Revises: 7d080e47c2a4
+Create Date: 2026-10-19 09:12:41.503118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3a09635842ba"
+down_revision: Union[str, None] = "7d080e47c2a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tabelas rastreadas e suas chaves primárias
+TRACKED_TABLES = {
+    "dimlocations": "location_id",
+    "dimsupplier": "supplier_id",
+    "dimparts": "part_id",
+    "dimpurchases": "purchase_id",
+    "dimvehicle": "vehicle_id",
+    "factwarranties": "claim_key",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SEQUENCE change_seq AS BIGINT")
+
+    op.create_table(
+        "changetombstones",
+        sa.Column(
+            "change_seq",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('change_seq')"),
+            nullable=False,
+        ),
+        sa.Column(
+            "table_name", sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False
+        ),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("change_seq"),
+    )
+
+    # Toda inserção/atualização recebe um novo número da sequência global
+    op.execute(
+        """
+        CREATE FUNCTION set_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval('change_seq');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    # Toda exclusão deixa um tombstone com a chave primária removida
+    op.execute(
+        """
+        CREATE FUNCTION record_tombstone() RETURNS trigger AS $$
+        DECLARE
+            deleted_id integer;
+        BEGIN
+            EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING OLD INTO deleted_id;
+            INSERT INTO changetombstones (table_name, row_id)
+            VALUES (TG_TABLE_NAME, deleted_id);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    for table, primary_key in TRACKED_TABLES.items():
+        op.add_column(table, sa.Column("change_seq", sa.BigInteger(), nullable=True))
+        # Numera as linhas existentes na ordem da chave primária
+        op.execute(
+            f"""
+            UPDATE {table} SET change_seq = numbered.seq
+            FROM (
+                SELECT {primary_key}, nextval('change_seq') AS seq
+                FROM {table} ORDER BY {primary_key}
+            ) AS numbered
+            WHERE {table}.{primary_key} = numbered.{primary_key}
+            """
+        )
+        op.alter_column(
+            table,
+            "change_seq",
+            nullable=False,
+            server_default=sa.text("nextval('change_seq')"),
+        )
+        op.create_index(op.f(f"ix_{table}_change_seq"), table, ["change_seq"])
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_change_seq
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION set_change_seq()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_tombstone
+            AFTER DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION record_tombstone('{primary_key}')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_tombstone ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_seq ON {table}")
+        op.drop_index(op.f(f"ix_{table}_change_seq"), table_name=table)
+        op.drop_column(table, "change_seq")
+
+    op.execute("DROP FUNCTION IF EXISTS record_tombstone()")
+    op.execute("DROP FUNCTION IF EXISTS set_change_seq()")
+    op.drop_table("changetombstones")
+    op.execute("DROP SEQUENCE IF EXISTS change_seq")
@@ -0,0 +1,81 @@
+"""Transação (change_xid) no feed de alterações
+
+Revision ID: 4c8a1f6e2d93
+Revises: b7d2e8f4a1c6
+Create Date: 2026-10-20 09:37:15.284610
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8a1f6e2d93"
+down_revision: Union[str, None] = "b7d2e8f4a1c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = [
+    "dimlocations",
+    "dimsupplier",
+    "dimparts",
+    "dimpurchases",
+    "dimvehicle",
+    "factwarranties",
+    "changetombstones",
+]
+
+# O change_seq é obtido na escrita, não no commit: transações confirmadas fora
+# de ordem publicariam um change_seq menor do que o já lido pelos clientes.
+# Com o ID da transação o feed só entrega linhas de transações anteriores à
+# mais antiga ainda em andamento (pg_snapshot_xmin)
+SET_CHANGE_SEQ = """
+    CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('change_seq');
+        NEW.change_xid := pg_current_xact_id();
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+SET_CHANGE_SEQ_ONLY = """
+    CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('change_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TRACKED_TABLES:
+        # Default constante (sem reescrever a tabela): as linhas existentes
+        # são de transações já encerradas, anteriores a qualquer outra
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN change_xid xid8 NOT NULL DEFAULT '0'"
+        )
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN change_xid "
+            "SET DEFAULT pg_current_xact_id()"
+        )
+        # Ordem de leitura do feed: (transação, sequência)
+        op.create_index(
+            op.f(f"ix_{table}_change_xid_change_seq"),
+            table,
+            ["change_xid", "change_seq"],
+        )
+    op.execute(SET_CHANGE_SEQ)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(SET_CHANGE_SEQ_ONLY)
+    for table in TRACKED_TABLES:
+        op.drop_index(op.f(f"ix_{table}_change_xid_change_seq"), table_name=table)
+        op.drop_column(table, "change_xid")
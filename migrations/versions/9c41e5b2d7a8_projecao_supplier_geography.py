@@ -0,0 +1,55 @@
+"""Projeção supplier_geography (materialized view)
+
+Revision ID: 9c41e5b2d7a8
+Revises: 173469617db3
+Create Date: 2026-10-19 16:41:08.562907
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c41e5b2d7a8"
+down_revision: Union[str, None] = "173469617db3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW suppliergeography AS
+        SELECT
+            dimsupplier.supplier_id,
+            dimsupplier.supplier_name,
+            dimsupplier.location_id,
+            dimsupplier.change_seq,
+            dimlocations.market,
+            dimlocations.country,
+            dimlocations.province,
+            dimlocations.city
+        FROM dimsupplier
+        JOIN dimlocations ON dimlocations.location_id = dimsupplier.location_id
+        """
+    )
+    # O índice único é exigido pelo REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.create_index(
+        "ux_suppliergeography_supplier_id",
+        "suppliergeography",
+        ["supplier_id"],
+        unique=True,
+    )
+    for column in ("country", "province", "city", "location_id"):
+        op.create_index(
+            op.f(f"ix_suppliergeography_{column}"), "suppliergeography", [column]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS suppliergeography")
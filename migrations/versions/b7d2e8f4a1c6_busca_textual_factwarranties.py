@@ -0,0 +1,57 @@
+"""Busca textual em factwarranties (client_complaint e tech_comment)
+
+Revision ID: b7d2e8f4a1c6
+Revises: e5f0a3c19b42
+Create Date: 2026-10-19 18:22:47.913560
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e8f4a1c6"
+down_revision: Union[str, None] = "e5f0a3c19b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Precisa ser a mesma configuração usada nas consultas (TEXT_SEARCH_CONFIG)
+# para o índice ser utilizado
+TEXT_SEARCH_CONFIG = "english"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Coluna gerada (STORED): mantida pelo Postgres a cada INSERT/UPDATE e
+    # propagada para todas as partições. A reclamação do cliente pesa mais
+    # (A) que o comentário técnico (B) no ranking
+    op.execute(
+        f"""
+        ALTER TABLE factwarranties ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(
+                to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(client_complaint, '')),
+                'A'
+            )
+            || setweight(
+                to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(tech_comment, '')),
+                'B'
+            )
+        ) STORED
+        """
+    )
+    op.create_index(
+        "ix_factwarranties_search_vector",
+        "factwarranties",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_factwarranties_search_vector", table_name="factwarranties")
+    op.drop_column("factwarranties", "search_vector")
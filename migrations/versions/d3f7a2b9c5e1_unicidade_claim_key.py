@@ -0,0 +1,76 @@
+"""Unicidade do claim_key em factwarranties particionada
+
+Revision ID: d3f7a2b9c5e1
+Revises: 4c8a1f6e2d93
+Create Date: 2026-10-20 15:12:46.903127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3f7a2b9c5e1"
+down_revision: Union[str, None] = "4c8a1f6e2d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A chave primária particionada é (claim_key, repair_date); o Postgres não tem
+# índice único global, então os claim_keys em uso ficam em uma tabela própria.
+# Os triggers são AFTER: um UPDATE que troca a linha de partição dispara o
+# DELETE antes do INSERT. Partições arquivadas mantêm os seus claim_keys
+# reservados
+GUARD_CLAIM_KEY = """
+    CREATE OR REPLACE FUNCTION guard_claim_key() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            DELETE FROM factwarranties_claim_keys WHERE claim_key = OLD.claim_key;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO factwarranties_claim_keys (claim_key) VALUES (NEW.claim_key);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "factwarranties_claim_keys",
+        sa.Column("claim_key", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("claim_key"),
+    )
+    # Falha se já houver claim_keys repetidos entre as partições
+    op.execute(
+        "INSERT INTO factwarranties_claim_keys (claim_key) "
+        "SELECT claim_key FROM factwarranties"
+    )
+    op.execute(GUARD_CLAIM_KEY)
+    op.execute(
+        """
+        CREATE TRIGGER factwarranties_claim_key
+        AFTER INSERT OR DELETE ON factwarranties
+        FOR EACH ROW EXECUTE FUNCTION guard_claim_key()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER factwarranties_claim_key_update
+        AFTER UPDATE OF claim_key ON factwarranties
+        FOR EACH ROW WHEN (OLD.claim_key IS DISTINCT FROM NEW.claim_key)
+        EXECUTE FUNCTION guard_claim_key()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER factwarranties_claim_key_update ON factwarranties")
+    op.execute("DROP TRIGGER factwarranties_claim_key ON factwarranties")
+    op.execute("DROP FUNCTION guard_claim_key()")
+    op.drop_table("factwarranties_claim_keys")
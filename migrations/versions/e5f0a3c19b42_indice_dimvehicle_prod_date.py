@@ -0,0 +1,42 @@
+"""Índice em dimvehicle.prod_date (séries temporais)
+
+Revision ID: e5f0a3c19b42
+Revises: 9c41e5b2d7a8
+Create Date: 2026-10-19 17:48:21.305114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5f0a3c19b42"
+down_revision: Union[str, None] = "9c41e5b2d7a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não bloqueia as escritas, mas não roda dentro de transação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_dimvehicle_prod_date"),
+            "dimvehicle",
+            ["prod_date"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_dimvehicle_prod_date"),
+            table_name="dimvehicle",
+            postgresql_concurrently=True,
+        )
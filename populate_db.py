@@ -9,6 +9,7 @@ from app.models.supplier import DimSupplier
 from app.models.user import User
 from app.models.vehicle import DimVehicle, PropulsionType
 from app.models.warranties import FactWarranties
+from app.services.supplier_geography import refresh_supplier_geography
 from sqlalchemy import text
 
 fake = Faker()
@@ -146,6 +147,8 @@ def populate_database():
         create_users(session)
         create_vehicles(session)
         create_warranties(session)
+    # Projeções materializadas passam a refletir os dados inseridos
+    refresh_supplier_geography(concurrently=False)
     print("Banco de dados populado com sucesso!")
 
 
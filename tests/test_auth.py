@@ -1,5 +1,9 @@
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+import app.main as main
+from app.cache import CacheUnavailable
+from app.core.auth import create_access_token
 from app.main import app
 from app.schemas.auth import UserCreate, LoginRequest
 from app.core.database import get_db
@@ -84,3 +88,45 @@ def test_logout(client: TestClient):
 
     assert response.status_code == 200
     assert response.json() == {"message": "Logout successful"}
+
+
+# Teste do fallback com o Redis fora do ar: o usuário vem das claims do JWT
+def test_verify_token_jwt_fallback(monkeypatch):
+    def unavailable(key):
+        raise CacheUnavailable()
+
+    monkeypatch.setattr(main, "get_cache_or_raise", unavailable)
+    monkeypatch.setattr(main.settings, "SESSION_FALLBACK", "jwt")
+    token = create_access_token({"sub": "davirios123"})
+
+    user = main.verify_token(token=token)
+    assert user.username == "davirios123"
+
+    with pytest.raises(HTTPException) as error:
+        main.verify_token(token="invalid")
+    assert error.value.status_code == 401
+
+    monkeypatch.setattr(main.settings, "SESSION_FALLBACK", "deny")
+    with pytest.raises(HTTPException) as error:
+        main.verify_token(token=token)
+    assert error.value.status_code == 503
+
+
+# Teste da verificação com a sessão no Redis: sem consulta ao banco (a
+# dependência nem recebe uma sessão) e a sessão precisa ser do mesmo usuário
+def test_verify_token_without_database(monkeypatch):
+    sessions = {}
+    monkeypatch.setattr(main, "get_cache_or_raise", sessions.get)
+    token = create_access_token({"sub": "davirios123"})
+
+    with pytest.raises(HTTPException) as error:
+        main.verify_token(token=token)
+    assert error.value.status_code == 401
+
+    sessions[f"session_{token}"] = "davirios123"
+    assert main.verify_token(token=token).username == "davirios123"
+
+    sessions[f"session_{token}"] = "outro"
+    with pytest.raises(HTTPException) as error:
+        main.verify_token(token=token)
+    assert error.value.status_code == 401
@@ -0,0 +1,212 @@
+import pytest
+from fastapi.testclient import TestClient
+from datetime import date
+from app.main import app
+import threading
+import time
+import orjson
+import redis
+import app.cache as cache
+from app.core.database import get_engine
+from app.cache import CacheEntry, _should_refresh, get_or_load, query_cache_key
+from app.models.vehicle import PropulsionType
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.local_cache import LocalCache
+from app.utils.pagination import Pagination
+
+
+# A função de configuração do cliente de testes
+@pytest.fixture()
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+# Função auxiliar para realizar o login e obter o token de acesso
+def login(client: TestClient):
+    login_data = {"username": "davirios123", "password": "1234567"}
+    response = client.post("/api/auth/login", json=login_data)
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+# Rota fictícia usada apenas para montar a chave
+def sample_route():
+    pass
+
+
+# Teste da chave do cache: parâmetros normalizados e em ordem alfabética
+def test_query_cache_key_normalizes_params():
+    key = query_cache_key(
+        sample_route,
+        {
+            "start_date": date(2024, 1, 1),
+            "propulsion": PropulsionType.DIESEL,
+            "page": Pagination(skip=0, limit=10),
+            "fields": None,
+        },
+    )
+    assert key == (
+        "query:test_cache.sample_route:"
+        "limit=10&propulsion=Diesel&skip=0&start_date=2024-01-01"
+    )
+
+
+# Teste de invalidação: uma escrita na tabela descarta as contagens em cache
+def test_count_cache_invalidated_on_write(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    before = client.get("/api/vehicles/count-by-year", headers=headers).json()
+
+    response = client.post(
+        "/api/vehicles/create",
+        json={
+            "model": "Ranger",
+            "prod_date": "2024-01-01",
+            "year": 2024,
+            "propulsion": "Diesel",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    vehicle_id = response.json()["vehicle_id"]
+
+    after = client.get("/api/vehicles/count-by-year", headers=headers).json()
+    assert after.get("2024", 0) == before.get("2024", 0) + 1
+
+    client.delete(f"/api/vehicles/{vehicle_id}", headers=headers)
+
+
+# Teste da camada local: descarta o item menos usado e respeita o TTL
+def test_local_cache_lru_and_ttl():
+    cache = LocalCache(max_items=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "a" passa a ser o mais recente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, expiration=0)
+    assert cache.get("d") is None
+
+
+# Teste da expiração antecipada: longe do vencimento não renova, vencido sempre
+def test_should_refresh_entry():
+    fresh = CacheEntry("[]", '"etag"', time.time() + 3600, 0.01)
+    assert not _should_refresh(fresh)
+
+    expired = CacheEntry("[]", '"etag"', time.time() - 1, 0.01)
+    assert _should_refresh(expired)
+
+
+# Teste do circuit breaker: abre após as falhas seguidas e testa após o intervalo
+def test_circuit_breaker_opens_and_retries():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()  # uma única tentativa por intervalo
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+
+
+# Teste do valor vencido: servido na hora, com a renovação em segundo plano
+def test_stale_entry_refreshed_in_background():
+    cache.init_cache()
+    key = "test:stale-refresh"
+    cache.local_cache.delete(key)
+    cache.redis_client.delete(key, f"lock:{key}")
+    get_or_load(key, lambda session: "[1]", expiration=0)
+
+    refreshed = threading.Event()
+
+    def slow_loader(session):
+        time.sleep(0.2)
+        refreshed.set()
+        return "[2]"
+
+    started = time.perf_counter()
+    entry = get_or_load(key, slow_loader, expiration=60)
+    assert entry.body == "[1]"
+    assert time.perf_counter() - started < 0.2
+
+    assert refreshed.wait(timeout=5)
+    for _ in range(50):
+        if cache.redis_client.hget(key, "body") == "[2]":
+            break
+        time.sleep(0.05)
+    assert cache.redis_client.hget(key, "body") == "[2]"
+    cache.redis_client.delete(key)
+
+
+# Teste de falha do Redis depois da consulta: o loader não roda de novo
+def test_loader_runs_once_when_redis_fails(monkeypatch):
+    cache.init_cache()
+    key = "test:loader-once"
+    cache.local_cache.delete(key)
+    cache.redis_client.delete(key, f"lock:{key}")
+    calls = []
+
+    def loader(session):
+        calls.append(session)
+        return "[]"
+
+    def failing_store(*args):
+        raise redis.exceptions.ConnectionError()
+
+    monkeypatch.setattr(cache, "_store_entry", failing_store)
+    entry = get_or_load(key, loader, expiration=60)
+    assert entry.body == "[]"
+    assert len(calls) == 1
+
+
+# Teste dos ouvintes de tabela: uma escrita no próprio processo os chama uma
+# única vez (a mensagem publicada por ele é ignorada); a de outro processo não
+def test_table_listeners_skip_own_messages():
+    cache.init_cache()
+    table = "test_listeners"
+    tag = f"{cache.TABLE_KEYS_PREFIX}:{table}"
+    calls = []
+    cache.on_table_change(table, lambda: calls.append(1))
+    try:
+        cache.invalidate_tables(table)
+        assert calls == [1]
+
+        own = {"data": cache._invalidation_message([tag])}
+        cache._handle_invalidation(own)
+        assert calls == [1]
+
+        other = {"data": orjson.dumps({"origin": "other", "keys": [tag]})}
+        cache._handle_invalidation(other)
+        assert calls == [1, 1]
+    finally:
+        cache._table_listeners.pop(table)
+
+
+# Teste do preenchimento após a invalidação: o valor que vai para o cache é
+# lido do primário, não da sessão da requisição (que pode ser de uma réplica)
+def test_cache_fill_reads_from_primary():
+    cache.init_cache()
+    key = "test:fill-primary"
+    cache.local_cache.delete(key)
+    cache.redis_client.delete(key, f"lock:{key}")
+    replica_session = object()
+    sessions = []
+
+    def loader(session):
+        sessions.append(session)
+        return "[]"
+
+    cache.invalidate_tables("test_fill_primary")
+    get_or_load(key, loader, expiration=60, session=replica_session)
+    assert len(sessions) == 1
+    assert sessions[0] is not replica_session
+    assert sessions[0].get_bind() is get_engine()
+    cache.redis_client.delete(key)
@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+from sqlmodel import Session
+from app.main import app
+from app.core.database import get_engine
+from app.models.locations import DimLocations, MarketEnum
+from app.services.changes import current_token, get_changes, parse_token
+
+
+# A função de configuração do cliente de testes
+@pytest.fixture()
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+# Função auxiliar para realizar o login e obter o token de acesso
+def login(client: TestClient):
+    login_data = {"username": "davirios123", "password": "1234567"}
+    response = client.post("/api/auth/login", json=login_data)
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+# Teste do feed de alterações a partir do início
+def test_list_changes(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/changes?limit=50", headers=headers)
+
+    assert response.status_code == 200
+    response_json = response.json()
+
+    # O token aponta para a última alteração da página (transação:sequência)
+    seqs = [change["seq"] for change in response_json["changes"]]
+    if seqs:
+        assert response_json["next_token"].endswith(f":{seqs[-1]}")
+
+    # Repetir com o token devolvido não retorna as mesmas alterações
+    response = client.get(
+        f"/api/changes?since={response_json['next_token']}&limit=50", headers=headers
+    )
+    assert response.status_code == 200
+    for change in response.json()["changes"]:
+        assert (change["table"], change["seq"]) not in {
+            (c["table"], c["seq"]) for c in response_json["changes"]
+        }
+
+    response = client.get("/api/changes?since=abc", headers=headers)
+    assert response.status_code == 400
+
+
+def _insert_location(connection, city: str) -> int:
+    return connection.execute(
+        insert(DimLocations)
+        .values(market=MarketEnum.DOMESTIC, country="Feed", province="Ordem", city=city)
+        .returning(DimLocations.location_id)
+    ).scalar_one()
+
+
+def _changed_ids(db: Session, token: str):
+    page = get_changes(db, parse_token(token), 100, ["dimlocations"])
+    return [change["id"] for change in page["changes"]], page["next_token"]
+
+
+# Transações confirmadas fora de ordem: a mais antiga pega o change_seq maior
+# e confirma primeiro; a alteração da outra (change_seq menor) não pode ser
+# pulada quando for confirmada depois
+def test_changes_with_out_of_order_commits():
+    engine = get_engine()
+    with Session(engine) as db:
+        token = current_token(db)
+
+    first = pending = last = None
+    older = engine.connect()
+    newer = engine.connect()
+    try:
+        older.begin()
+        first = _insert_location(older, "Primeira")
+        newer.begin()
+        pending = _insert_location(newer, "Pendente")
+        # change_seq maior que o da transação ainda em andamento
+        last = _insert_location(older, "Última")
+        older.commit()
+
+        with Session(engine) as db:
+            ids, token = _changed_ids(db, token)
+        assert first in ids and last in ids
+        assert pending not in ids
+
+        newer.commit()
+        with Session(engine) as db:
+            ids, token = _changed_ids(db, token)
+        assert ids == [pending]
+    finally:
+        older.close()
+        newer.close()
+        with engine.begin() as connection:
+            connection.execute(
+                delete(DimLocations).where(
+                    DimLocations.location_id.in_([first, pending, last])
+                )
+            )
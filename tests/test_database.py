@@ -0,0 +1,71 @@
+import runpy
+import subprocess
+import sys
+from pathlib import Path
+from sqlalchemy import create_engine, text
+from app.core import database
+from app.core.database import ReplicaPool
+from app.core.startup import measure_imports, top_level_packages
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# Teste do round-robin entre réplicas e da retirada de uma réplica com falha
+def test_replica_pool_round_robin_and_health():
+    pool = ReplicaPool(["sqlite://", "sqlite://"], check_interval=3600)
+    first, second = pool.engines
+    assert [pool.next(), pool.next(), pool.next()] == [first, second, first]
+
+    pool.mark_down(second)
+    assert [pool.next(), pool.next()] == [first, first]
+
+    # Passado o intervalo, a réplica volta após o SELECT 1
+    pool.check_interval = 0
+    assert {pool.next(), pool.next()} == {first, second}
+
+    pool.mark_down(first)
+    pool.mark_down(second)
+    pool.check_interval = 3600
+    assert pool.next() is None
+
+
+# Configuração do gunicorn: workers por WEB_CONCURRENCY, preload e pools
+# descartados em cada worker após o fork
+def test_gunicorn_config_and_post_fork(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    config = runpy.run_path(str(ROOT / "gunicorn.conf.py"))
+    assert config["workers"] == 3
+    assert config["preload_app"] is True
+    assert config["worker_class"] == "app.core.workers.UvloopWorker"
+
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    pool = engine.pool
+    monkeypatch.setattr(database, "_engine", engine)
+    config["post_fork"](None, None)
+    # Pool novo: nenhuma conexão herdada do master é reaproveitada
+    assert engine.pool is not pool
+
+
+# Importar a API não cria engines nem carrega o passlib (inicialização adiada)
+def test_app_import_is_lazy():
+    code = (
+        "import sys, app.main, app.core.database as d; "
+        "assert d._engine is None and d._replicas is None; "
+        "assert 'passlib' not in sys.modules"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+# Relatório de importação: agrega o tempo próprio por pacote de primeiro nível
+def test_startup_import_report():
+    elapsed, imports = measure_imports("json")
+    assert elapsed > 0
+    assert any(name.strip() == "json" for _, _, name in imports)
+
+    imports = [(10, 10, "a.b"), (5, 15, "  a"), (7, 7, "c")]
+    assert top_level_packages(imports, 2) == [("a", 15), ("c", 7)]
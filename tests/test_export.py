@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+# A função de configuração do cliente de testes
+@pytest.fixture()
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+# Função auxiliar para realizar o login e obter o token de acesso
+def login(client: TestClient):
+    login_data = {"username": "davirios123", "password": "1234567"}
+    response = client.post("/api/auth/login", json=login_data)
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+# Teste de exportação de warranties em Arrow IPC
+def test_export_warranties_arrow(client: TestClient):
+    pa = pytest.importorskip("pyarrow")
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get(
+        "/api/export/warranties?format=arrow&start_date=2020-01-01", headers=headers
+    )
+
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert "claim_key" in table.schema.names
+    assert "repair_date" in table.schema.names
+
+
+# Teste de filtros em tabelas que não são warranties
+def test_export_filters_only_for_warranties(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/export/locations?part_id=1", headers=headers)
+
+    assert response.status_code == 400
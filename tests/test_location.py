@@ -1,8 +1,10 @@
+import time
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models import DimLocations
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.services.location_registry import LocationRegistry, location_registry
 from sqlmodel import Session
 
 
@@ -91,3 +93,77 @@ def test_get_location_count_by_market(client: TestClient):
     for market, count in response_json.items():
         assert isinstance(market, str)
         assert isinstance(count, int)
+
+
+# Teste do registro em memória: escritas aparecem nas rotas de filtro em cascata
+def test_location_registry_follows_writes(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post(
+        "/api/locations/create",
+        json={
+            "market": "International",
+            "country": "Registro",
+            "province": "Memória",
+            "city": "Índice",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    location_id = response.json()["location_id"]
+
+    # A atualização agendada pela escrita, executada sem esperar o atraso
+    location_registry.refresh()
+    response = client.get("/api/locations/cities/Registro/Memória", headers=headers)
+    assert response.json() == ["Índice"]
+    response = client.get("/api/locations/count-by-country", headers=headers)
+    assert response.json()["Registro"] == 1
+
+    client.delete(f"/api/locations/{location_id}", headers=headers)
+    location_registry.refresh()
+    response = client.get("/api/locations/provinces/Registro", headers=headers)
+    assert response.json() == []
+
+
+# Teste da atualização em segundo plano: após uma alteração a leitura não
+# espera o banco e serve a versão anterior até a atualização terminar
+def test_location_registry_serves_previous_index(monkeypatch):
+    registry = LocationRegistry(reload_seconds=300, refresh_delay=60)
+    previous = registry._build_index()
+    registry._index = previous
+    registry._loaded_at = time.monotonic()
+    registry._stale = False
+    refreshes = []
+    monkeypatch.setattr(registry, "_refresh", lambda: refreshes.append(1))
+
+    for _ in range(3):
+        registry.mark_stale()
+        assert registry.index() is previous
+    assert refreshes == []
+
+    registry.refresh_task.flush()
+    assert refreshes == [1]
+
+
+# Dependências (recursivas) de uma rota da API
+def route_dependencies(path: str):
+    route = next(route for route in app.routes if getattr(route, "path", "") == path)
+    pending, calls = [route.dependant], []
+    while pending:
+        dependant = pending.pop()
+        calls.append(dependant.call)
+        pending.extend(dependant.dependencies)
+    return calls
+
+
+# Teste das rotas servidas pelo registro em memória: a paginação não abre uma
+# sessão de leitura no banco
+def test_location_registry_routes_without_read_session():
+    for path in (
+        "/api/locations/cities/{country}",
+        "/api/locations/provinces/{country}",
+        "/api/locations/cities/{country}/{province}",
+    ):
+        assert get_read_db not in route_dependencies(path)
+    assert get_read_db in route_dependencies("/api/locations/by-market/{market_type}")
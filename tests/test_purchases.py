@@ -72,4 +72,22 @@ def test_get_purchase_count_by_month(client: TestClient):
     # Verifique se o formato está correto (mês -> contagem)
     for month, count in response_json.items():
         assert isinstance(month, str)
-        assert isinstance(count, int)
\ No newline at end of file
+        assert isinstance(count, int)
+
+
+# Teste da paginação keyset ("after") da listagem genérica
+def test_get_purchases_after(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/purchases?limit=5", headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    ids = [purchase["purchase_id"] for purchase in first_page]
+    assert ids == sorted(ids)
+
+    # A próxima página começa logo após o último ID recebido
+    response = client.get(f"/api/purchases?after={ids[-1]}&limit=5", headers=headers)
+    assert response.status_code == 200
+    for purchase in response.json():
+        assert purchase["purchase_id"] > ids[-1]
@@ -0,0 +1,68 @@
+import logging
+from sqlalchemy import create_engine, text
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.sql_logging import (
+    compile_cache_stats,
+    instrument_engine,
+    logger,
+    request_id_var,
+)
+from app.models.vehicle import DimVehicle
+from app.utils.fields import fetch_fields, lambda_select
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+# Teste do log de SQL: sem amostragem nada é registrado; consultas lentas
+# saem completas, com o ID da requisição
+def test_sql_logging_sample_and_slow(monkeypatch):
+    engine = instrument_engine(create_engine("sqlite://"))
+    handler = ListHandler()
+
+    monkeypatch.setattr(settings, "SQL_LOG_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 10_000)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    logger.addHandler(handler)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert handler.records == []
+
+        monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+        token = request_id_var.set("req-1")
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :value"), {"value": 42})
+        request_id_var.reset(token)
+    finally:
+        logger.removeHandler(handler)
+
+    message = handler.records[-1].getMessage()
+    assert handler.records[-1].levelno == logging.WARNING
+    assert "request_id=req-1" in message
+    assert "42" in message
+
+
+# Teste do SELECT por lambda: valores diferentes reaproveitam o SQL compilado
+def test_lambda_select_reuses_compiled_sql():
+    engine = instrument_engine(create_engine("sqlite://"))
+    DimVehicle.metadata.create_all(engine, tables=[DimVehicle.__table__])
+
+    def vehicles_by_year(session, year, columns):
+        stmt = lambda_select(DimVehicle, columns)
+        stmt += lambda s: s.where(DimVehicle.year == year)
+        return fetch_fields(session, stmt, columns)
+
+    with Session(engine) as session:
+        vehicles_by_year(session, 2020, ["vehicle_id"])
+        hits = compile_cache_stats["cache_hit"]
+        assert vehicles_by_year(session, 2021, ["vehicle_id"]) == []
+        assert compile_cache_stats["cache_hit"] == hits + 1
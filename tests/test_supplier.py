@@ -1,9 +1,15 @@
 import pytest
+import time
 from fastapi.testclient import TestClient
 from app.main import app
-from app.models import DimSupplier, DimLocations
+from app.core.config import settings
+from app.cache import init_cache
+from app.models import DimSupplier, DimLocations, SupplierGeography
 from app.core.database import get_db
-from sqlmodel import Session
+from app.services import supplier_geography
+from app.services.supplier_geography import mark_dirty, refresh_if_dirty
+from app.utils.debounce import DebouncedTask
+from sqlmodel import SQLModel, Session
 
 
 # A função de configuração do cliente de testes
@@ -26,7 +32,9 @@ def test_count_suppliers_per_location(client: TestClient):
     token = login(client)  # Faz login e obtém o token de acesso
     headers = {"Authorization": f"Bearer {token}"}
 
-    response = client.get("/api/suppliers/count-suppliers-per-location", headers=headers)
+    response = client.get(
+        "/api/suppliers/count-suppliers-per-location", headers=headers
+    )
 
     assert response.status_code == 200
     response_json = response.json()
@@ -54,4 +62,90 @@ def test_get_supplier_count_by_location(client: TestClient):
     # Verifique se o formato está correto (location_id -> contagem)
     for location_id, count in response_json.items():
         assert isinstance(int(location_id), int)
-        assert isinstance(count, int)
\ No newline at end of file
+        assert isinstance(count, int)
+
+
+# Teste do parâmetro "n" em top-locations
+def test_top_supplier_locations(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/suppliers/top-locations", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) <= 5
+
+    response = client.get("/api/suppliers/top-locations?n=2", headers=headers)
+    assert response.status_code == 200
+    top = response.json()
+    assert len(top) <= 2
+    assert [t["count"] for t in top] == sorted((t["count"] for t in top), reverse=True)
+
+
+# Teste da projeção supplier_geography: a escrita aparece após o refresh
+def test_supplier_geography_refreshed_after_write(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post(
+        "/api/locations/create",
+        json={
+            "market": "Domestic",
+            "country": "Geografia",
+            "province": "Teste",
+            "city": "Refresh",
+        },
+        headers=headers,
+    )
+    location_id = response.json()["location_id"]
+    response = client.post(
+        "/api/suppliers/create",
+        json={"supplier_name": "Projeção", "location_id": location_id},
+        headers=headers,
+    )
+    supplier_id = response.json()["supplier_id"]
+
+    time.sleep(settings.SUPPLIER_GEOGRAPHY_REFRESH_SECONDS + 1)
+    response = client.get("/api/suppliers/by-country/Geografia", headers=headers)
+    assert response.status_code == 200
+    assert [s["supplier_id"] for s in response.json()] == [supplier_id]
+
+    client.delete(f"/api/suppliers/{supplier_id}", headers=headers)
+    client.delete(f"/api/locations/{location_id}", headers=headers)
+
+
+# Teste do agrupamento: vários triggers próximos geram uma única execução
+def test_debounced_task_coalesces_triggers():
+    calls = []
+    task = DebouncedTask(0.05, lambda: calls.append(1))
+    for _ in range(5):
+        task.trigger()
+    time.sleep(0.2)
+    assert calls == [1]
+
+    task.trigger()
+    time.sleep(0.2)
+    assert calls == [1, 1]
+
+
+# Teste da flag de projeção desatualizada: um único refresh por marcação,
+# qualquer que seja o processo que o execute
+def test_supplier_geography_refreshed_once_per_mark(monkeypatch):
+    init_cache()
+    refreshes = []
+    monkeypatch.setattr(
+        supplier_geography,
+        "refresh_supplier_geography",
+        lambda: refreshes.append(1) or True,
+    )
+
+    mark_dirty()
+    refresh_if_dirty()
+    refresh_if_dirty()
+    assert refreshes == [1]
+
+
+# Teste da projeção: a materialized view não faz parte da metadata usada pelo
+# create_all (não é criada como tabela)
+def test_supplier_geography_outside_create_all():
+    assert SupplierGeography.__tablename__ not in SQLModel.metadata.tables
+    assert SupplierGeography.__table__.metadata is not SQLModel.metadata
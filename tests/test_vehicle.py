@@ -1,9 +1,18 @@
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models import DimVehicle, PropulsionType
 from app.core.database import get_db
-from sqlmodel import Session
+from app.utils.serializer import dumps
+from sqlalchemy.dialects import postgresql
+from app.utils.timeseries import (
+    BUCKET_STEPS,
+    Granularity,
+    bucket_count,
+    bucket_series,
+)
+from sqlmodel import Session, create_engine
 from datetime import date
 
 
@@ -100,3 +109,188 @@ def test_count_vehicles_by_prod_month(client: TestClient):
         assert "Month" in month  # Garante que a chave começa com "Month"
         month_number = int(month.split(" ")[1])  # Extrai o número do mês
         assert 1 <= month_number <= 12  # Garante que o número do mês é válido
+
+
+# Teste de ETag/If-None-Match na listagem paginada
+def test_get_vehicles_not_modified(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/vehicles?limit=10", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    # Com o mesmo ETag a API deve responder 304 sem corpo
+    headers["If-None-Match"] = etag
+    response = client.get("/api/vehicles?limit=10", headers=headers)
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+# ETag fraco igual para o corpo comprimido e o original; respostas pequenas
+# (mesmo as do cache) não são comprimidas
+def test_etag_is_weak_and_small_bodies_are_not_compressed(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    gzip = client.get(
+        "/api/vehicles?limit=500", headers={**headers, "Accept-Encoding": "gzip"}
+    )
+    identity = client.get(
+        "/api/vehicles?limit=500", headers={**headers, "Accept-Encoding": "identity"}
+    )
+    assert gzip.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzip.headers["etag"].startswith("W/")
+    assert gzip.headers["etag"] == identity.headers["etag"]
+
+    # Duas vezes: a segunda resposta vem do cache, com o ETag armazenado
+    for _ in range(2):
+        response = client.get(
+            "/api/vehicles/count-by-propulsion",
+            headers={**headers, "Accept-Encoding": "gzip"},
+        )
+        assert len(response.content) < 1000
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"].startswith("W/")
+
+    headers["If-None-Match"] = response.headers["etag"]
+    response = client.get("/api/vehicles/count-by-propulsion", headers=headers)
+    assert response.status_code == 304
+
+
+# Teste de atualização parcial e exclusão de um registro inexistente
+def test_patch_and_delete_missing_vehicle(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.patch(
+        "/api/vehicles/999999999", json={"model": "Ranger"}, headers=headers
+    )
+    assert response.status_code == 404
+
+    response = client.delete("/api/vehicles/999999999", headers=headers)
+    assert response.status_code == 404
+
+
+# Teste do limite máximo de página e da paginação nas rotas by-X
+def test_vehicles_page_size_limits(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/vehicles?limit=1000000", headers=headers)
+    assert response.status_code == 422
+
+    response = client.get("/api/vehicles/by-year/2020?limit=5", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) <= 5
+
+
+# Teste da série temporal: intervalos contínuos e soma por propulsão
+def test_vehicle_timeseries(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    params = {"start_date": "2020-01-15", "end_date": "2020-06-10"}
+    response = client.get("/api/vehicles/timeseries", params=params, headers=headers)
+    assert response.status_code == 200
+    points = response.json()
+    # Um ponto por mês, mesmo sem produção
+    assert [p["bucket"] for p in points] == [
+        f"2020-{month:02d}-01" for month in range(1, 7)
+    ]
+
+    # Trimestres (passo de 3 meses) atravessando a virada do ano
+    params.update(start_date="2019-11-20", granularity="quarter", by_propulsion="true")
+    response = client.get("/api/vehicles/timeseries", params=params, headers=headers)
+    assert response.status_code == 200
+    points = response.json()
+    assert [p["bucket"] for p in points] == ["2019-10-01", "2020-01-01", "2020-04-01"]
+    for point in points:
+        assert set(point["by_propulsion"]) == {p.value for p in PropulsionType}
+        assert sum(point["by_propulsion"].values()) == point["count"]
+
+    params.update(start_date="2021-01-01")
+    response = client.get("/api/vehicles/timeseries", params=params, headers=headers)
+    assert response.status_code == 400
+
+    # Intervalos demais para a granularidade
+    params.update(start_date="1900-01-01", end_date="2020-01-01", granularity="day")
+    response = client.get("/api/vehicles/timeseries", params=params, headers=headers)
+    assert response.status_code == 422
+
+
+# Passo do generate_series: intervalos aceitos pelo Postgres ("quarter" não é)
+def test_timeseries_bucket_steps():
+    for granularity in Granularity:
+        sql = str(
+            bucket_series(date(2020, 1, 1), date(2020, 12, 31), granularity).compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+        assert f"CAST('{BUCKET_STEPS[granularity]}' AS INTERVAL)" in sql
+    assert BUCKET_STEPS[Granularity.QUARTER] == "3 months"
+
+
+# Quantidade de intervalos igual à do generate_series (inclusive nas pontas)
+def test_timeseries_bucket_count():
+    start, end = date(2020, 1, 15), date(2020, 6, 10)
+    assert bucket_count(start, end, Granularity.DAY) == 148
+    # 13/01/2020 e 08/06/2020 são segundas-feiras
+    assert bucket_count(start, end, Granularity.WEEK) == 22
+    assert bucket_count(start, end, Granularity.MONTH) == 6
+    assert bucket_count(start, end, Granularity.QUARTER) == 2
+    assert bucket_count(date(2019, 12, 31), date(2020, 1, 1), Granularity.QUARTER) == 2
+
+
+# Serialização de um objeto expirado pelo commit: as colunas são recarregadas
+# pelo ORM em vez de omitidas
+def test_serialization_loads_expired_columns():
+    engine = create_engine("sqlite://")
+    DimVehicle.metadata.create_all(engine, tables=[DimVehicle.__table__])
+    with Session(engine) as session:
+        vehicle = DimVehicle(
+            model="Ranger",
+            prod_date=date(2021, 3, 4),
+            year=2021,
+            propulsion=PropulsionType.HYBRID,
+        )
+        session.add(vehicle)
+        session.commit()  # expire_on_commit: __dict__ fica sem as colunas
+        assert "model" not in vars(vehicle)
+
+        data = orjson.loads(dumps(vehicle))
+        assert data["model"] == "Ranger"
+        assert data["prod_date"] == "2021-03-04"
+        assert data["vehicle_id"] == vehicle.vehicle_id
+
+
+# Serialização com orjson: datas em ISO, enums pelo valor e os campos do modelo
+def test_vehicle_serialization(client: TestClient):
+    vehicle = DimVehicle(
+        vehicle_id=1,
+        model="Ranger",
+        prod_date=date(2021, 3, 4),
+        year=2021,
+        propulsion=PropulsionType.HYBRID,
+    )
+    assert orjson.loads(dumps([vehicle])) == [
+        {
+            "vehicle_id": 1,
+            "model": "Ranger",
+            "prod_date": "2021-03-04",
+            "year": 2021,
+            "propulsion": "Hybrid",
+            "change_seq": None,
+        }
+    ]
+    # Chaves não textuais (ex: contagens por ano) viram texto
+    assert orjson.loads(dumps({2021: 3})) == {"2021": 3}
+
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/api/vehicles?limit=1", headers=headers)
+    assert response.headers["content-type"] == "application/json"
+    record = response.json()[0]
+    assert date.fromisoformat(record["prod_date"])
+    assert record["propulsion"] in {p.value for p in PropulsionType}
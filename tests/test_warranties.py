@@ -1,9 +1,20 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api.routes.warranties import get_top_warranties, top_sample_percent
+from app.cache import query_cache_key
 from app.models import FactWarranties
-from app.core.database import get_db
-from sqlmodel import Session
+from app.core.database import get_db, get_engine
+from app.services.warranties import WarrantyDimension
+from app.services.partitions import (
+    DEFAULT_PARTITION,
+    archive_year,
+    create_partitions,
+    partition_name,
+    partition_years,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, text
 from datetime import date
 
 
@@ -94,3 +105,274 @@ def test_count_warranties_by_year(client: TestClient):
         year_number = int(year.split(" ")[1])
         assert isinstance(year_number, int)
         assert isinstance(count, int)
+
+
+# Teste de projeção parcial de campos (?fields=)
+def test_get_warranties_with_fields(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get(
+        "/api/warranties?limit=10&fields=claim_key,repair_date", headers=headers
+    )
+
+    assert response.status_code == 200
+    # Apenas os campos pedidos devem ser retornados (sem os textos longos)
+    for warranty in response.json():
+        assert set(warranty.keys()) == {"claim_key", "repair_date"}
+
+    # Campos inexistentes devem ser rejeitados
+    response = client.get("/api/warranties?fields=foo", headers=headers)
+    assert response.status_code == 400
+
+
+# Teste de atualização em massa exigindo IDs ou filtro (não ambos)
+def test_bulk_update_warranties_requires_selection(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    body = {"values": {"classified_issue": "recall"}}
+    response = client.patch("/api/warranties/bulk", json=body, headers=headers)
+    assert response.status_code == 422
+
+    # Filtro sem nenhuma linha correspondente não altera nada
+    body["filter"] = {"part_id": 999999999}
+    response = client.patch("/api/warranties/bulk", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["updated"] == 0
+
+
+# Teste da contagem por ano restrita a um intervalo (poda de partições)
+def test_count_warranties_by_year_range(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get(
+        "/api/warranties/count-by-year?start_year=2021&end_year=2022", headers=headers
+    )
+
+    assert response.status_code == 200
+    for year in response.json():
+        assert int(year.split(" ")[1]) in (2021, 2022)
+
+
+# Teste da taxa de falhas por modelo, ano e propulsão
+def test_failure_rate(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/warranties/failure-rate", headers=headers)
+    assert response.status_code == 200
+    rates = response.json()
+    assert len(rates) > 0
+    for rate in rates:
+        assert {"model", "year", "propulsion"} <= set(rate)
+        assert rate["vehicles"] > 0
+        assert rate["vehicles_with_claims"] <= rate["vehicles"]
+        assert rate["claims_per_vehicle"] == pytest.approx(
+            rate["claims"] / rate["vehicles"]
+        )
+
+    # Filtros reduzem apenas o numerador: a frota de cada modelo é a mesma
+    fleet = {}
+    for rate in rates:
+        fleet[rate["model"]] = fleet.get(rate["model"], 0) + rate["vehicles"]
+    params = {"group_by": "model", "market": "Domestic", "start_date": "2023-01-01"}
+    response = client.get(
+        "/api/warranties/failure-rate", params=params, headers=headers
+    )
+    assert response.status_code == 200
+    for rate in response.json():
+        assert set(rate) == {
+            "model",
+            "vehicles",
+            "claims",
+            "vehicles_with_claims",
+            "claims_per_vehicle",
+        }
+        assert rate["vehicles"] == fleet[rate["model"]]
+
+
+# Teste das rotas de top-N (exato e aproximado)
+def test_top_warranties(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for dimension, column in [
+        ("part", "part_id"),
+        ("location", "location_id"),
+        ("vehicle", "vehicle_id"),
+        ("classified_issue", "classified_issue"),
+    ]:
+        response = client.get(f"/api/warranties/top/{dimension}?n=3", headers=headers)
+        assert response.status_code == 200
+        top = response.json()
+        assert 0 < len(top) <= 3
+        assert all(set(item) == {column, "count"} for item in top)
+        counts = [item["count"] for item in top]
+        assert counts == sorted(counts, reverse=True)
+
+    response = client.get(
+        "/api/warranties/top/part?approximate=true&sample_percent=50", headers=headers
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/warranties/top/supplier", headers=headers)
+    assert response.status_code == 422
+
+
+# Teste da chave do cache de top-N: "sample_percent" só conta no modo aproximado
+def test_top_warranties_cache_key_ignores_unused_sample():
+    def key(approximate: bool, sample_percent: float):
+        params = {
+            "dimension": WarrantyDimension.PART,
+            "n": 10,
+            "sample_percent": top_sample_percent(approximate, sample_percent),
+        }
+        return query_cache_key(get_top_warranties, params)
+
+    assert key(False, 1.0) == key(False, 50.0)
+    assert "sample_percent" not in key(False, 50.0)
+    assert key(True, 1.0) != key(True, 50.0)
+
+
+# Teste da busca textual: ranking, trechos destacados e filtros
+def test_search_warranties(client: TestClient):
+    token = login(client)  # Faz login e obtém o token de acesso
+    headers = {"Authorization": f"Bearer {token}"}
+
+    existing = client.get("/api/warranties?limit=1", headers=headers).json()[0]
+    warranty = {
+        name: existing[name]
+        for name in ("vehicle_id", "part_id", "location_id", "purchase_id")
+    }
+    warranty.update(
+        repair_date="2022-03-15",
+        client_complaint="Transmission <i>shudders</i> violently when accelerating",
+        tech_comment="Replaced torque converter after shuddering reproduced",
+    )
+    response = client.post("/api/warranties/create", json=warranty, headers=headers)
+    assert response.status_code == 200
+    claim_key = response.json()["claim_key"]
+
+    # Busca com radicais: "shudder" encontra "shudders" e "shuddering"
+    params = {"q": "shudder torque", "start_date": "2022-01-01"}
+    response = client.get("/api/warranties/search", params=params, headers=headers)
+    assert response.status_code == 200
+    results = {r["claim_key"]: r for r in response.json()}
+    assert claim_key in results
+    # Só os destaques são HTML: a marcação do texto vem escapada
+    snippet = results[claim_key]["complaint_snippet"]
+    assert "<b>" in snippet
+    assert "<i>" not in snippet
+    assert "&lt;i&gt;" in snippet
+    assert "client_complaint" not in results[claim_key]
+    ranks = [r["rank"] for r in response.json()]
+    assert ranks == sorted(ranks, reverse=True)
+
+    params["part_id"] = warranty["part_id"] + 1
+    response = client.get("/api/warranties/search", params=params, headers=headers)
+    assert claim_key not in [r["claim_key"] for r in response.json()]
+
+    response = client.get("/api/warranties/search", headers=headers)
+    assert response.status_code == 422
+
+    client.delete(f"/api/warranties/{claim_key}", headers=headers)
+
+
+# Teste da manutenção das partições: um ano do meio arquivado não é recriado,
+# apenas os anos seguintes ao último (tudo desfeito no rollback)
+def test_create_partitions_skips_archived_years(tmp_path):
+    with get_engine().connect() as connection:
+        transaction = connection.begin()
+        try:
+            years = partition_years(connection)
+            archived = years[len(years) // 2]
+            archive_year(connection, archived, str(tmp_path), drop=True)
+
+            assert create_partitions(connection, years[-1]) == []
+            assert create_partitions(connection, years[-1] + 1) == [
+                partition_name(years[-1] + 1)
+            ]
+            assert archived not in partition_years(connection)
+        finally:
+            transaction.rollback()
+
+
+# Teste da partição default com linhas de um ano futuro: a criação do ano move
+# as linhas para a nova partição (tudo desfeito no rollback)
+def test_create_partitions_moves_default_rows():
+    with get_engine().connect() as connection:
+        transaction = connection.begin()
+        try:
+            year = partition_years(connection)[-1] + 1
+            claim_key = connection.execute(
+                text(
+                    "INSERT INTO factwarranties (vehicle_id, repair_date, "
+                    "client_complaint, tech_comment, part_id, classified_issue, "
+                    "location_id, purchase_id) "
+                    "SELECT vehicle_id, :repair_date, client_complaint, "
+                    "tech_comment, part_id, classified_issue, location_id, "
+                    "purchase_id FROM factwarranties LIMIT 1 RETURNING claim_key"
+                ),
+                {"repair_date": date(year, 6, 1)},
+            ).scalar()
+
+            assert create_partitions(connection, year) == [partition_name(year)]
+
+            def partition_of_row():
+                return connection.execute(
+                    text(
+                        "SELECT tableoid::regclass::text FROM factwarranties "
+                        "WHERE claim_key = :claim_key"
+                    ),
+                    {"claim_key": claim_key},
+                ).scalar()
+
+            assert partition_of_row() == partition_name(year)
+            # A default continua anexada
+            assert (
+                connection.execute(
+                    text(
+                        "SELECT count(*) FROM pg_inherits "
+                        "WHERE inhrelid = CAST(:name AS regclass)"
+                    ),
+                    {"name": DEFAULT_PARTITION},
+                ).scalar()
+                == 1
+            )
+        finally:
+            transaction.rollback()
+
+
+# Teste da unicidade do claim_key entre partições (a chave primária do banco é
+# (claim_key, repair_date)); a troca de partição por UPDATE continua permitida
+def test_claim_key_unique_across_partitions():
+    with get_engine().connect() as connection:
+        transaction = connection.begin()
+        try:
+            claim_key, repair_date = connection.execute(
+                text("SELECT claim_key, repair_date FROM factwarranties LIMIT 1")
+            ).one()
+            other_year = date(repair_date.year + 1, 6, 1)
+
+            connection.execute(
+                text(
+                    "UPDATE factwarranties SET repair_date = :repair_date "
+                    "WHERE claim_key = :claim_key"
+                ),
+                {"repair_date": other_year, "claim_key": claim_key},
+            )
+            with pytest.raises(IntegrityError):
+                connection.execute(
+                    text(
+                        "INSERT INTO factwarranties (claim_key, vehicle_id, "
+                        "repair_date, part_id, location_id, purchase_id) "
+                        "SELECT claim_key, vehicle_id, :repair_date, part_id, "
+                        "location_id, purchase_id FROM factwarranties "
+                        "WHERE claim_key = :claim_key"
+                    ),
+                    {"repair_date": repair_date, "claim_key": claim_key},
+                )
+        finally:
+            transaction.rollback()